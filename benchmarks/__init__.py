@@ -0,0 +1 @@
+"""Benchmarks for Jarvis AI Assistant."""
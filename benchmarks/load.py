@@ -0,0 +1,333 @@
+"""End-to-end load benchmark for AgentOrchestrator against a fake Ollama server.
+
+Each concurrency level runs that many conversations in parallel threads,
+sharing one LLMEngine, and reports turn latency percentiles,
+time-to-first-token, throughput, errors and process RSS. Before the levels,
+the latency of a first turn is measured with the model unloaded (cold) and
+after a background warm-up (warm).
+
+Usage:
+    python -m benchmarks.load --concurrency 1 8 32 --turns 200 \\
+        --token-delay 0.005 --output load.json
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from jarvis.agent_orchestrator import AgentOrchestrator
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.llm_engine import LLMConfig, LLMEngine
+from jarvis.preference_manager import PreferenceManager
+from jarvis.testing.fake_ollama import FakeOllamaServer
+from jarvis.warmup import ModelWarmer
+
+ERROR_PREFIX = "I encountered an error"
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the pct-th percentile of values by linear interpolation.
+    
+    Args:
+        values: Samples
+        pct: Percentile between 0 and 100
+        
+    Returns:
+        Interpolated percentile, or 0.0 for no samples
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """Summarize latency samples in seconds."""
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "max": max(values, default=0.0)
+    }
+
+
+def rss_bytes() -> int:
+    """Return the current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except OSError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def git_commit() -> Optional[str]:
+    """Return the checked-out commit, if running inside a git work tree."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_conversation(
+    engine: LLMEngine,
+    preferences: PreferenceManager,
+    turns: int,
+    stream: bool,
+    prompt: str
+) -> List[Dict[str, Any]]:
+    """Run one conversation and time each of its turns.
+    
+    Returns:
+        One record per turn with latency, ttft and error
+    """
+    orchestrator = AgentOrchestrator(
+        llm_engine=engine,
+        conversation_buffer=ConversationBuffer(max_turns=10),
+        preference_manager=preferences
+    )
+    records = []
+    for turn in range(turns):
+        user_input = f"{prompt} (turn {turn})"
+        start = time.perf_counter()
+        if stream:
+            response = "".join(orchestrator.process_input_stream(user_input))
+        else:
+            response = orchestrator.process_input(user_input)
+        latency = time.perf_counter() - start
+        
+        metadata = orchestrator.conversation_buffer.turns[-1].assistant_message.metadata
+        records.append({
+            "latency": latency,
+            "ttft": metadata.get("time_to_first_token", latency),
+            "error": response.startswith(ERROR_PREFIX) or "error" in metadata
+        })
+    orchestrator.close()
+    return records
+
+
+def measure_first_turn(endpoint: str, warm: bool, prompt: str = "Hello") -> Optional[float]:
+    """Time the first turn of a fresh engine, starting from an unloaded model.
+    
+    Args:
+        endpoint: Ollama (or fake) endpoint
+        warm: Whether to preload the model with ModelWarmer before the turn
+        prompt: User input sent
+        
+    Returns:
+        Seconds until the reply was complete, or None if the turn failed
+    """
+    engine = LLMEngine(LLMConfig(endpoint=endpoint))
+    warmer = None
+    try:
+        engine.load_model(keep_alive="0")
+        if warm:
+            warmer = ModelWarmer(engine)
+            warmer.wait()
+        start = time.perf_counter()
+        engine.generate(prompt, [])
+        return time.perf_counter() - start
+    except (ConnectionError, RuntimeError):
+        return None
+    finally:
+        if warmer is not None:
+            warmer.close()
+        engine.close()
+
+
+def run_level(
+    endpoint: str,
+    concurrency: int,
+    turns: int,
+    stream: bool = True,
+    prompt: str = "Tell me something interesting",
+    preferences_dir: Optional[Path] = None
+) -> Dict[str, Any]:
+    """Benchmark one concurrency level.
+    
+    Args:
+        endpoint: Ollama (or fake) endpoint
+        concurrency: Number of conversations running in parallel
+        turns: Total turns, split evenly across conversations
+        stream: Whether to use process_input_stream
+        prompt: User input sent each turn
+        preferences_dir: Directory for the shared preference file
+        
+    Returns:
+        Result record for the level
+    """
+    per_conversation = max(1, turns // concurrency)
+    engine = LLMEngine(LLMConfig(endpoint=endpoint, pool_size=max(10, concurrency)))
+    preferences = PreferenceManager(config_dir=preferences_dir)
+    
+    peak_rss = rss_bytes()
+    sampling = threading.Event()
+    
+    def sample_rss() -> None:
+        nonlocal peak_rss
+        while not sampling.wait(0.05):
+            peak_rss = max(peak_rss, rss_bytes())
+    
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(run_conversation, engine, preferences, per_conversation, stream, prompt)
+            for _ in range(concurrency)
+        ]
+        records = [record for future in futures for record in future.result()]
+    duration = time.perf_counter() - start
+    
+    sampling.set()
+    sampler.join()
+    engine.close()
+    preferences.close()
+    
+    ok = [record for record in records if not record["error"]]
+    return {
+        "concurrency": concurrency,
+        "turns": len(records),
+        "errors": len(records) - len(ok),
+        "duration_s": duration,
+        "turns_per_second": len(records) / duration if duration else 0.0,
+        "latency_s": summarize([record["latency"] for record in ok]),
+        "ttft_s": summarize([record["ttft"] for record in ok]),
+        "rss_bytes": rss_bytes(),
+        "rss_peak_bytes": max(peak_rss, rss_bytes())
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(prog="benchmarks.load", description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--turns", type=int, default=100, help="Turns per concurrency level")
+    parser.add_argument("--no-stream", action="store_true", help="Use process_input")
+    parser.add_argument("--reply-words", type=int, default=50, help="Words in each fake reply")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="Seconds per reply token")
+    parser.add_argument("--first-token-delay", type=float, default=0.02, help="Prefill seconds")
+    parser.add_argument("--load-delay", type=float, default=1.0, help="Model load seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of HTTP errors")
+    parser.add_argument(
+        "--stream-error-rate", type=float, default=0.0, help="Fraction of streams cut off"
+    )
+    parser.add_argument(
+        "--endpoint",
+        default=None,
+        help="Benchmark a real Ollama endpoint instead of the fake server"
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Write results JSON here")
+    return parser
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every concurrency level and collect the results."""
+    config = {
+        key: (str(value) if isinstance(value, Path) else value)
+        for key, value in vars(args).items()
+    }
+    reply_text = " ".join(["word"] * args.reply_words)
+    
+    server = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        server = FakeOllamaServer(
+            reply=lambda prompt: reply_text,
+            token_delay=args.token_delay,
+            first_token_delay=args.first_token_delay,
+            error_rate=args.error_rate,
+            stream_error_rate=args.stream_error_rate,
+            load_delay=args.load_delay
+        ).start()
+        endpoint = server.url
+    
+    try:
+        first_turn = {
+            "cold": measure_first_turn(endpoint, warm=False),
+            "warm": measure_first_turn(endpoint, warm=True)
+        }
+        with tempfile.TemporaryDirectory() as preferences_dir:
+            results = [
+                run_level(
+                    endpoint,
+                    concurrency,
+                    args.turns,
+                    stream=not args.no_stream,
+                    preferences_dir=Path(preferences_dir)
+                )
+                for concurrency in args.concurrency
+            ]
+    finally:
+        if server is not None:
+            server.stop()
+    
+    return {
+        "benchmark": "load",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "first_turn_s": first_turn,
+        "results": results
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the load benchmark from the command line."""
+    args = build_parser().parse_args(argv)
+    report = run(args)
+    
+    first_turn = {
+        key: "failed" if value is None else f"{value * 1000:.1f}ms"
+        for key, value in report["first_turn_s"].items()
+    }
+    print(f"first turn: cold={first_turn['cold']}  warm={first_turn['warm']}")
+    for level in report["results"]:
+        print(
+            f"concurrency={level['concurrency']:>3}  "
+            f"turns/s={level['turns_per_second']:8.1f}  "
+            f"p50={level['latency_s']['p50'] * 1000:7.1f}ms  "
+            f"p95={level['latency_s']['p95'] * 1000:7.1f}ms  "
+            f"p99={level['latency_s']['p99'] * 1000:7.1f}ms  "
+            f"ttft p50={level['ttft_s']['p50'] * 1000:6.1f}ms  "
+            f"errors={level['errors']}  "
+            f"rss={level['rss_peak_bytes'] / 2**20:.0f}MiB"
+        )
+    
+    output = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Per-turn memory benchmark for the conversation data models.
+
+Builds turns the way AgentOrchestrator records them, once with the current
+slotted Message/ConversationTurn and once with the previous dataclass
+layout, and reports the bytes allocated per turn as measured by
+tracemalloc, with and without the message text itself.
+
+Usage:
+    python -m benchmarks.memory --turns 20000 --output memory.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.load import git_commit
+from jarvis.models import ConversationTurn, Message
+
+# Metadata the engine and orchestrator attach to a typical streamed reply
+ASSISTANT_METADATA = {
+    "model": "mistral:7b",
+    "prepare_time": 0.0004,
+    "http_time": 1.9,
+    "parse_time": 0.002,
+    "time_to_first_token": 0.31,
+    "prompt_eval_count": 412,
+    "eval_count": 96,
+    "eval_duration": 1.6,
+    "tokens_per_second": 60.0,
+    "total_time": 1.93
+}
+
+
+@dataclass
+class LegacyMessage:
+    """Message layout before the slotted rewrite, kept for comparison."""
+    role: str
+    content: str
+    timestamp: datetime = field(default_factory=datetime.now)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    _token_count: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+
+
+@dataclass
+class LegacyTurn:
+    """ConversationTurn layout before the slotted rewrite."""
+    user_message: LegacyMessage
+    assistant_message: LegacyMessage
+    tool_calls: List[Any] = field(default_factory=list)
+
+
+def build_current(index: int, with_metadata: bool) -> ConversationTurn:
+    """Build one turn with the current models."""
+    return ConversationTurn(
+        Message(role="user", content=f"Question number {index} about something"),
+        Message(
+            role="assistant",
+            content=f"Answer number {index}, " + "with a few words of detail " * 4,
+            metadata=dict(ASSISTANT_METADATA) if with_metadata else None
+        )
+    )
+
+
+def build_legacy(index: int, with_metadata: bool) -> LegacyTurn:
+    """Build one turn with the previous dataclass models."""
+    return LegacyTurn(
+        LegacyMessage(role="user", content=f"Question number {index} about something"),
+        LegacyMessage(
+            role="assistant",
+            content=f"Answer number {index}, " + "with a few words of detail " * 4,
+            metadata=dict(ASSISTANT_METADATA) if with_metadata else {}
+        )
+    )
+
+
+def measure(build: Callable[[int, bool], Any], turns: int, with_metadata: bool) -> Dict[str, float]:
+    """Measure memory allocated per turn.
+    
+    Args:
+        build: Function building the turn with the given index
+        turns: Number of turns to build
+        with_metadata: Whether assistant messages carry timing metadata
+        
+    Returns:
+        Bytes per turn in total and excluding message text
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build(i, with_metadata) for i in range(turns)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    text = sum(
+        sys.getsizeof(turn.user_message.content) + sys.getsizeof(turn.assistant_message.content)
+        for turn in held
+    )
+    # The list holding the turns is not part of the per-turn cost
+    total = after - before - sys.getsizeof(held)
+    return {
+        "bytes_per_turn": total / turns,
+        "overhead_bytes_per_turn": (total - text) / turns
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(prog="benchmarks.memory", description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20000, help="Turns built per measurement")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    return parser
+
+
+def run(turns: int) -> Dict[str, Any]:
+    """Measure both layouts with and without assistant metadata."""
+    results = []
+    for with_metadata in (False, True):
+        legacy = measure(build_legacy, turns, with_metadata)
+        current = measure(build_current, turns, with_metadata)
+        results.append({
+            "metadata": with_metadata,
+            "legacy": legacy,
+            "current": current,
+            "saved_bytes_per_turn": legacy["bytes_per_turn"] - current["bytes_per_turn"],
+            "saved_fraction_of_overhead": 1 - (
+                current["overhead_bytes_per_turn"] / legacy["overhead_bytes_per_turn"]
+            )
+        })
+    return {
+        "benchmark": "memory",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"turns": turns},
+        "results": results
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the memory benchmark from the command line."""
+    args = build_parser().parse_args(argv)
+    report = run(args.turns)
+    
+    for result in report["results"]:
+        print(
+            f"metadata={'yes' if result['metadata'] else 'no ':<3}  "
+            f"legacy={result['legacy']['bytes_per_turn']:7.0f} B/turn  "
+            f"slotted={result['current']['bytes_per_turn']:7.0f} B/turn  "
+            f"saved={result['saved_bytes_per_turn']:5.0f} B/turn "
+            f"({result['saved_fraction_of_overhead']:.0%} of object overhead)"
+        )
+    
+    output = json.dumps(report, indent=2)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""Microbenchmarks for the conversation buffer, prompt and preference hot paths.
+
+Each benchmark reports the best mean time per call over several timed
+batches. Message sizes are drawn by hypothesis with a fixed seed, so every
+run times the same inputs. Buffer benchmarks run at several buffer sizes,
+from 10 to 1M turns.
+
+Results are compared with a baseline file, and the exit status is 1 if any
+benchmark is slower than its baseline by more than the threshold, also when
+timed a second time. Timings are absolute, so a baseline only means
+something on the machine and Python version that recorded it; the one in
+the repository is a reference, and a warning is printed when it came from
+elsewhere. Regenerate it on the machine that runs the comparison, e.g. on
+the base commit before a change:
+    python -m benchmarks.micro --update-baseline
+
+Usage:
+    python -m benchmarks.micro --scales 10 1000 100000 1000000 --threshold 0.3 \\
+        --output micro.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timezone
+from itertools import cycle
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from hypothesis import HealthCheck, Phase, given, settings
+from hypothesis import strategies as st
+
+from benchmarks.load import git_commit
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.llm_engine import LLMConfig, LLMEngine
+from jarvis.models import Message, PersonalityConfig
+from jarvis.preference_manager import PreferenceManager
+
+DEFAULT_SCALES = (10, 1_000, 100_000, 1_000_000)
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# export_to_json builds the whole document in memory, so larger buffers are skipped
+EXPORT_MAX_TURNS = 100_000
+
+# Token budget used by the budgeted get_context_for_llm benchmark
+CONTEXT_TOKENS = 4096
+
+# Distinct message sizes drawn; buffers reuse them cyclically
+SIZE_SAMPLES = 200
+MAX_MESSAGE_CHARS = 2000
+
+# Minimum duration of a timed batch of calls
+BATCH_SECONDS = 0.05
+
+# Timing a call that touches the disk varies far more between runs
+IO_THRESHOLD = 1.0
+
+# Slowdowns smaller than this are within the run-to-run jitter of
+# sub-microsecond operations and never count as regressions
+MIN_REGRESSION_SECONDS = 250e-9
+
+TEXT = (
+    "The quick brown fox explains recursion, then asks why the stack overflowed. "
+    "Jarvis suggests memoization and a base case. "
+) * (MAX_MESSAGE_CHARS // 100 + 1)
+
+
+def message_sizes(count: int = SIZE_SAMPLES, max_chars: int = MAX_MESSAGE_CHARS) -> List[int]:
+    """Draw message lengths with hypothesis, reproducibly.
+    
+    Hypothesis favours boundary values (empty-ish and maximal messages) next
+    to typical ones, which a uniform draw would rarely hit.
+    
+    Args:
+        count: Number of lengths to draw
+        max_chars: Longest message
+        
+    Returns:
+        Lengths in characters, the same on every call
+    """
+    sizes: List[int] = []
+    
+    @settings(
+        max_examples=count,
+        derandomize=True,
+        database=None,
+        phases=[Phase.generate],
+        suppress_health_check=list(HealthCheck),
+        deadline=None
+    )
+    @given(st.integers(min_value=1, max_value=max_chars))
+    def draw(size: int) -> None:
+        sizes.append(size)
+    
+    draw()
+    return sizes
+
+
+def message_pairs(sizes: Sequence[int]) -> List[Tuple[str, str]]:
+    """Build (user, assistant) message texts of the given sizes."""
+    return [
+        (TEXT[:user_size], TEXT[:assistant_size])
+        for user_size, assistant_size in zip(sizes, sizes[1:] + sizes[:1])
+    ]
+
+
+def measure(operation: Callable[[], Any], repeat: int, number: Optional[int] = None) -> float:
+    """Return the best mean seconds per call over repeat batches.
+    
+    Args:
+        operation: Call to time
+        repeat: Timed batches; the fastest counts, as the others were slowed
+            down by unrelated activity on the machine
+        number: Calls per batch. By default, enough for a batch to take
+            BATCH_SECONDS, so timer resolution and one-off stalls matter less.
+            
+    Returns:
+        Seconds per call
+    """
+    timer = timeit.Timer(operation)
+    if number is None:
+        number = 1
+        while timer.timeit(number) < BATCH_SECONDS:
+            number *= 2
+    return min(timer.repeat(number=number, repeat=repeat)) / number
+
+
+def fill_buffer(turns: int, pairs: Sequence[Tuple[str, str]]) -> ConversationBuffer:
+    """Build a full buffer of the given size; message texts are shared between turns."""
+    buffer = ConversationBuffer(max_turns=turns)
+    texts = cycle(pairs)
+    for _ in range(turns):
+        user, assistant = next(texts)
+        buffer.add_turn(Message(role="user", content=user), Message(role="assistant", content=assistant))
+    return buffer
+
+
+def buffer_benchmarks(
+    scales: Sequence[int],
+    pairs: Sequence[Tuple[str, str]],
+    repeat: int
+) -> Iterator[Dict[str, Any]]:
+    """Time ConversationBuffer operations on a full buffer of each size.
+    
+    get_context_for_llm returns a lazy view, so the benchmarks iterate it
+    the way prompt formatting does; creating the view alone costs nothing.
+    """
+    for turns in scales:
+        buffer = fill_buffer(turns, pairs)
+        # Pre-built messages, so only add_turn (including the eviction) is timed
+        messages = cycle([
+            (Message(role="user", content=user), Message(role="assistant", content=assistant))
+            for user, assistant in pairs
+        ])
+        yield {
+            "name": f"buffer.add_turn[{turns}]",
+            "scale": turns,
+            "seconds": measure(lambda: buffer.add_turn(*next(messages)), repeat)
+        }
+        yield {
+            "name": f"buffer.get_context_for_llm[{turns}]",
+            "scale": turns,
+            "seconds": measure(lambda: list(buffer.get_context_for_llm()), repeat)
+        }
+        buffer.max_tokens = CONTEXT_TOKENS
+        yield {
+            "name": f"buffer.get_context_for_llm_budget[{turns}]",
+            "scale": turns,
+            "seconds": measure(lambda: list(buffer.get_context_for_llm(reserved_tokens=200)), repeat)
+        }
+        if turns <= EXPORT_MAX_TURNS:
+            yield {
+                "name": f"buffer.export_to_json[{turns}]",
+                "scale": turns,
+                "seconds": measure(buffer.export_to_json, repeat)
+            }
+        del buffer
+
+
+def prompt_benchmarks(pairs: Sequence[Tuple[str, str]], repeat: int) -> Iterator[Dict[str, Any]]:
+    """Time prompt assembly for a typical ten-turn context."""
+    engine = LLMEngine(LLMConfig())
+    buffer = fill_buffer(10, pairs)
+    personality = PersonalityConfig(tone="mentor", verbosity="detailed", response_style=pairs[0][1])
+    summary = pairs[1][1]
+    try:
+        yield {
+            "name": "llm_engine.format_prompt",
+            "scale": 10,
+            "seconds": measure(
+                lambda: engine.format_prompt(pairs[2][0], buffer.get_context_for_llm(), personality, summary),
+                repeat
+            )
+        }
+        yield {
+            "name": "llm_engine._build_system_prompt",
+            "scale": None,
+            "seconds": measure(lambda: engine._build_system_prompt(personality), repeat)
+        }
+    finally:
+        engine.close()
+
+
+def preference_benchmarks(sizes: Sequence[int], repeat: int) -> Iterator[Dict[str, Any]]:
+    """Time PreferenceManager reads and writes of a realistic preferences file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        config_dir = Path(tmp)
+        manager = PreferenceManager(config_dir, write_delay=0)
+        preferences = manager.load_preferences()
+        preferences["personality"]["response_style"] = TEXT[:sizes[0]]
+        preferences["study_topics"] = {f"topic {i}": TEXT[:size] for i, size in enumerate(sizes[:20])}
+        manager.save_preferences(preferences)
+        
+        yield {
+            "name": "preferences.load",
+            "scale": None,
+            "seconds": measure(manager.load_preferences, repeat)
+        }
+        yield {
+            "name": "preferences.load_cold",
+            "scale": None,
+            "seconds": measure(lambda: PreferenceManager(config_dir).load_preferences(), repeat)
+        }
+        
+        edits = cycle(range(2))
+        
+        def edit() -> None:
+            preferences["personality"]["tone"] = ("mentor", "neutral")[next(edits)]
+            manager.save_preferences(preferences)
+        
+        yield {
+            "name": "preferences.save",
+            "scale": None,
+            "seconds": measure(edit, repeat),
+            "threshold": IO_THRESHOLD
+        }
+        manager.write_delay = 3600
+        yield {
+            "name": "preferences.save_coalesced",
+            "scale": None,
+            "seconds": measure(edit, repeat)
+        }
+        manager.write_delay = 0
+        manager.close()
+
+
+def run(scales: Sequence[int], repeat: int = 5, pattern: Optional[str] = None) -> Dict[str, Any]:
+    """Run every benchmark whose name contains pattern.
+    
+    Args:
+        scales: Buffer sizes in turns
+        repeat: Timed batches per benchmark; the fastest counts
+        pattern: Substring selecting benchmarks by name. None runs all.
+        
+    Returns:
+        Report with one result per benchmark
+    """
+    sizes = message_sizes()
+    pairs = message_pairs(sizes)
+    groups = [
+        ("buffer.", lambda: buffer_benchmarks(scales, pairs, repeat)),
+        ("llm_engine.", lambda: prompt_benchmarks(pairs, repeat)),
+        ("preferences.", lambda: preference_benchmarks(sizes, repeat))
+    ]
+    results = []
+    for prefix, benchmarks in groups:
+        # A pattern naming another group skips this one's setup entirely
+        if (
+            pattern is not None and "." in pattern
+            and not pattern.startswith(prefix) and not prefix.startswith(pattern)
+        ):
+            continue
+        for result in benchmarks():
+            if pattern is None or pattern in result["name"]:
+                results.append(result)
+    return {
+        "benchmark": "micro",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "scales": list(scales),
+            "repeat": repeat,
+            "message_sizes": {"count": len(sizes), "mean": sum(sizes) / len(sizes), "max": max(sizes)}
+        },
+        "results": results
+    }
+
+
+def compare(
+    results: Sequence[Dict[str, Any]],
+    baseline: Dict[str, Any],
+    threshold: float
+) -> List[Dict[str, Any]]:
+    """Find benchmarks that got slower than the baseline by more than threshold.
+    
+    Benchmarks missing from the baseline are not compared. A benchmark may
+    carry its own, looser "threshold" for noisy operations, and slowdowns
+    below MIN_REGRESSION_SECONDS are ignored.
+    
+    Args:
+        results: Current results
+        baseline: Report previously written with --update-baseline
+        threshold: Allowed slowdown as a fraction, e.g. 0.25 for 25%
+        
+    Returns:
+        One entry per regression with name, baseline and current seconds
+        and the relative change
+    """
+    previous = {result["name"]: result["seconds"] for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["name"])
+        if not before:
+            continue
+        change = result["seconds"] / before - 1
+        if (
+            change > max(threshold, result.get("threshold", 0.0))
+            and result["seconds"] - before > MIN_REGRESSION_SECONDS
+        ):
+            regressions.append({
+                "name": result["name"],
+                "baseline": before,
+                "current": result["seconds"],
+                "change": change
+            })
+    return regressions
+
+
+def format_seconds(seconds: float) -> str:
+    """Format a duration with a unit suited to microbenchmarks."""
+    if seconds < 1e-6:
+        return f"{seconds * 1e9:.0f}ns"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(prog="benchmarks.micro", description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SCALES),
+        help="Buffer sizes in turns"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed batches per benchmark")
+    parser.add_argument("-k", "--filter", default=None, help="Only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.3,
+        help="Allowed slowdown against the baseline, as a fraction"
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store these results as the new baseline instead of comparing"
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Write results JSON here")
+    return parser
+
+
+def recheck(results: List[Dict[str, Any]], names: Sequence[str], repeat: int) -> None:
+    """Time the named benchmarks again, keeping the faster of the two timings.
+    
+    A one-off stall on a busy machine then no longer fails the gate; a real
+    slowdown shows up in both runs.
+    
+    Args:
+        results: Results to update in place
+        names: Benchmarks to run again
+        repeat: Timed batches per benchmark in the first run; twice as
+            many are used now
+    """
+    by_name = {result["name"]: result for result in results}
+    for name in names:
+        result = by_name[name]
+        scales = [result["scale"]] if result["scale"] else []
+        for retry in run(scales, 2 * repeat, name)["results"]:
+            if retry["name"] == name:
+                result["seconds"] = min(result["seconds"], retry["seconds"])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the microbenchmarks from the command line.
+    
+    Returns:
+        Process exit status: 1 if a benchmark regressed, 0 otherwise
+    """
+    args = build_parser().parse_args(argv)
+    report = run(args.scales, args.repeat, args.filter)
+    
+    baseline: Dict[str, Any] = {}
+    if not args.update_baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        recorded = (baseline.get("platform"), baseline.get("python"))
+        if recorded != (report["platform"], report["python"]):
+            print(
+                f"warning: {args.baseline} was recorded on {recorded[0]} with Python {recorded[1]}; "
+                "timings are only comparable on the same machine, so regenerate it with "
+                "--update-baseline before comparing",
+                file=sys.stderr
+            )
+    suspects = compare(report["results"], baseline, args.threshold)
+    recheck(report["results"], [suspect["name"] for suspect in suspects], args.repeat)
+    regressions = compare(report["results"], baseline, args.threshold)
+    
+    previous = {result["name"]: result["seconds"] for result in baseline.get("results", [])}
+    for result in report["results"]:
+        line = f"{result['name']:<44}{format_seconds(result['seconds']):>12}"
+        if previous.get(result["name"]):
+            line += f"  {result['seconds'] / previous[result['name']] - 1:+7.1%}"
+        print(line)
+    
+    output = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(output + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(output + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['name']}: {format_seconds(regression['baseline'])} -> "
+            f"{format_seconds(regression['current'])} ({regression['change']:+.0%})",
+            file=sys.stderr
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
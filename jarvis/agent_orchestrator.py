@@ -1,56 +1,287 @@
 """Agent Orchestrator - Central coordinator for all agent operations."""
 
-from typing import Optional
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
 from datetime import datetime
 
-from jarvis.llm_engine import LLMEngine, LLMConfig
+from jarvis.llm_engine import (
+    BaseLLMEngine,
+    CancellationToken,
+    GenerationCancelled,
+    LLMEngine,
+    LLMConfig,
+    PromptCache
+)
 from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.metrics import MetricsRegistry
 from jarvis.preference_manager import PreferenceManager
-from jarvis.models import Message
+from jarvis.models import BatchResult, ConversationTurn, Message, ToolCall, estimate_tokens
+from jarvis.tools import (
+    TOOL_CALL_OPEN,
+    Tool,
+    ToolExecutor,
+    ToolMarkupFilter,
+    parse_tool_calls,
+    tool_messages
+)
 
+if TYPE_CHECKING:
+    # numpy and the summarizer are only loaded when a caller uses them
+    from jarvis.memory_index import MemoryIndex
+    from jarvis.summarizer import ConversationSummarizer
 
-class AgentOrchestrator:
-    """Central coordinator for all agent operations."""
+
+class StreamingTurn:
+    """Collects a streamed response and its timings until the turn is committed."""
+    
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.metadata: Dict[str, Any] = {}
+        self._start = time.perf_counter()
+    
+    def add(self, token: str) -> None:
+        """Record a token, noting time-to-first-token on the first one.
+        
+        Args:
+            token: Response text fragment
+        """
+        if not self.chunks:
+            self.metadata["time_to_first_token"] = time.perf_counter() - self._start
+        self.chunks.append(token)
+    
+    def fail(self, error: Exception) -> Optional[str]:
+        """Record a generation failure.
+        
+        Args:
+            error: Exception raised by the engine
+            
+        Returns:
+            Error text to show the user if nothing was streamed yet, else None
+        """
+        self.metadata["error"] = str(error)
+        if self.chunks:
+            return None
+        error_text = f"I encountered an error: {str(error)}"
+        self.chunks.append(error_text)
+        return error_text
+    
+    @property
+    def content(self) -> str:
+        """Full response text received so far."""
+        return "".join(self.chunks)
+    
+    def finish(self) -> Dict[str, Any]:
+        """Stop the clock and return the turn metadata.
+        
+        Returns:
+            Metadata for the assistant message
+        """
+        self.metadata["total_time"] = time.perf_counter() - self._start
+        return self.metadata
+
+
+class BaseOrchestrator:
+    """Conversation state and bookkeeping shared by sync and async orchestrators."""
+    
+    # Whether process_input runs the tools passed to __init__
+    supports_tools = False
+    # Whether _create_summarizer can build a summarizer for this engine
+    supports_summaries = False
+    # Whether a memory_index may be searched and fed on the turn path
+    supports_memory = False
     
-    def __init__(self, llm_config: Optional[LLMConfig] = None):
+    def __init__(
+        self,
+        llm_config: Optional[LLMConfig] = None,
+        llm_engine: Optional[BaseLLMEngine] = None,
+        conversation_buffer: Optional[ConversationBuffer] = None,
+        preference_manager: Optional[PreferenceManager] = None,
+        max_context_tokens: Optional[int] = None,
+        summarize_history: bool = False,
+        memory_index: Optional["MemoryIndex"] = None,
+        memory_top_k: int = 3,
+        metrics: Optional[MetricsRegistry] = None,
+        tools: Optional[Sequence[Tool]] = None,
+        max_tool_rounds: int = 4
+    ):
         """Initialize Agent Orchestrator.
         
         Args:
             llm_config: LLM configuration. Uses defaults if not provided.
+            llm_engine: Shared engine to use instead of creating one
+            conversation_buffer: Existing conversation to continue
+            preference_manager: Shared preference manager
+            max_context_tokens: Token budget for conversation history sent to
+                the LLM, including the system prompt and current input. Only
+                applies when no conversation_buffer is given.
+            summarize_history: Fold turns evicted from the buffer into a
+                running summary in the background
+            memory_index: Long-term index that every turn is added to and
+                that relevant older turns are recalled from
+            memory_top_k: Maximum number of turns recalled per input
+            metrics: Registry aggregating per-turn timings. A private one is
+                created if not provided.
+            tools: Tools the model may call while answering. Results of pure
+                tools are memoized for the life of this orchestrator.
+            max_tool_rounds: Maximum rounds of tool calls per turn; the
+                generation after the last round is not offered tools
+                
+        Raises:
+            ValueError: If tools, summarize_history or memory_index are
+                given to an orchestrator that does not support them
         """
-        self.llm_engine = LLMEngine(llm_config)
-        self.conversation_buffer = ConversationBuffer(max_turns=10)
-        self.preference_manager = PreferenceManager()
+        if tools and not self.supports_tools:
+            raise ValueError(f"{type(self).__name__} does not support tools")
+        if summarize_history and not self.supports_summaries:
+            raise ValueError(f"{type(self).__name__} does not support summarize_history")
+        if memory_index is not None and not self.supports_memory:
+            raise ValueError(f"{type(self).__name__} does not support memory_index")
+        self._owns_engine = llm_engine is None
+        if llm_engine is None:
+            llm_engine = self._create_engine(llm_config)
+        if conversation_buffer is None:
+            conversation_buffer = ConversationBuffer(max_turns=10, max_tokens=max_context_tokens)
+        if preference_manager is None:
+            preference_manager = PreferenceManager()
+        
+        self.llm_engine = llm_engine
+        self.conversation_buffer = conversation_buffer
+        self.preference_manager = preference_manager
         self.personality = self.preference_manager.get_personality_config()
+        self.prompt_cache = PromptCache()
+        self.summarizer: Optional["ConversationSummarizer"] = None
+        if summarize_history:
+            self.summarizer = self._create_summarizer()
+        self.memory_index = memory_index
+        self.memory_top_k = memory_top_k
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.tool_executor = ToolExecutor(tools) if tools else None
+        self.max_tool_rounds = max_tool_rounds
     
-    def process_input(self, user_input: str) -> str:
-        """Process user input and generate response.
+    def _create_engine(self, llm_config: Optional[LLMConfig]) -> BaseLLMEngine:
+        """Create the LLM engine used by this orchestrator.
+        
+        Args:
+            llm_config: LLM configuration
+            
+        Returns:
+            LLM engine instance
+        """
+        raise NotImplementedError
+    
+    def _create_summarizer(self) -> "ConversationSummarizer":
+        """Create the background summarizer for evicted turns.
+        
+        Only called when supports_summaries is set.
+        
+        Returns:
+            Summarizer attached to the conversation buffer
+        """
+        raise NotImplementedError
+    
+    def _get_context(self, user_input: str) -> List[Dict[str, str]]:
+        """Get conversation context, leaving room for the rest of the prompt.
+        
+        Older turns recalled from the memory index are prepended as one
+        system message.
         
         Args:
             user_input: User's input text
             
         Returns:
-            Assistant's response
+            Context messages for the LLM
         """
-        # Get conversation context
-        context = self.conversation_buffer.get_context_for_llm()
+        recalled = self._recall(user_input)
         
-        # Generate response using LLM
-        try:
-            response = self.llm_engine.generate(
-                prompt=user_input,
-                context=context,
-                personality=self.personality
+        reserved = 0
+        if self.conversation_buffer.max_tokens is not None:
+            reserved = self.llm_engine.estimate_prompt_tokens(
+                user_input, self.personality, self.conversation_buffer.summary
             )
+            if recalled is not None:
+                reserved += estimate_tokens(recalled["content"])
+        context = self.conversation_buffer.get_context_for_llm(reserved_tokens=reserved)
+        if recalled is not None:
+            return [recalled] + list(context)
+        return context
+    
+    def _recall(self, user_input: str) -> Optional[Dict[str, str]]:
+        """Look up older turns relevant to the input in the memory index.
+        
+        Turns still in the conversation buffer are skipped, since they are
+        already part of the context.
+        
+        Args:
+            user_input: User's input text
+            
+        Returns:
+            System message listing the recalled exchanges, or None
+        """
+        if self.memory_index is None or self.memory_top_k <= 0:
+            return None
+        
+        buffered = self.conversation_buffer.turns
+        oldest = buffered[0].user_message.created_at if buffered else None
+        session_id = self.conversation_buffer.session_id
+        try:
+            hits = self.memory_index.search(user_input, k=self.memory_top_k + len(buffered))
         except Exception as e:
-            response = f"I encountered an error: {str(e)}"
+            # Answer without recalled turns rather than fail the turn
+            self.memory_index.error = str(e)
+            return None
+        exchanges = []
+        for _, record in hits:
+            in_buffer = (
+                record["session_id"] == session_id
+                and oldest is not None
+                and datetime.fromisoformat(record["timestamp"]).timestamp() >= oldest
+            )
+            if in_buffer:
+                continue
+            exchanges.append(f"User: {record['user']}\nAssistant: {record['assistant']}")
+            if len(exchanges) == self.memory_top_k:
+                break
         
-        # Add turn to conversation buffer
-        user_message = Message(role="user", content=user_input)
-        assistant_message = Message(role="assistant", content=response)
-        self.conversation_buffer.add_turn(user_message, assistant_message)
+        if not exchanges:
+            return None
+        return {
+            "role": "system",
+            "content": "Relevant earlier exchanges:\n\n" + "\n\n".join(exchanges)
+        }
+    
+    def _record_turn(
+        self,
+        user_input: str,
+        response: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        tool_calls: Optional[List[ToolCall]] = None
+    ) -> None:
+        """Add a completed turn to the conversation buffer and record its metrics.
         
-        return response
+        Args:
+            user_input: User's input text
+            response: Assistant's response text
+            metadata: Metadata for the assistant message
+            tool_calls: Tools run while answering
+        """
+        user_message = Message(role="user", content=user_input)
+        assistant_message = Message(
+            role="assistant",
+            content=response,
+            metadata=metadata
+        )
+        self.conversation_buffer.add_turn(user_message, assistant_message, tool_calls or None)
+        self.metrics.observe_turn(assistant_message.metadata)
+        if self.memory_index is not None:
+            # Embedding runs in the background; failures land in memory_index.error
+            self.memory_index.add(
+                ConversationTurn(user_message=user_message, assistant_message=assistant_message),
+                self.conversation_buffer.session_id
+            )
     
     def export_conversation(self) -> str:
         """Export conversation history to JSON.
@@ -67,6 +298,9 @@ class AgentOrchestrator:
             Confirmation message
         """
         self.conversation_buffer.clear()
+        self.prompt_cache.reset()
+        if self.tool_executor is not None:
+            self.tool_executor.clear_memo()
         return "Conversation history cleared."
     
     def update_personality(self, **kwargs) -> None:
@@ -86,3 +320,369 @@ class AgentOrchestrator:
         # Save updated personality
         self.preference_manager.set_personality_config(personality)
         self.personality = personality
+
+
+class AgentOrchestrator(BaseOrchestrator):
+    """Central coordinator for all agent operations."""
+    
+    supports_tools = True
+    supports_summaries = True
+    supports_memory = True
+    
+    def _create_engine(self, llm_config: Optional[LLMConfig]) -> LLMEngine:
+        return LLMEngine(llm_config)
+    
+    def _create_summarizer(self) -> "ConversationSummarizer":
+        from jarvis.summarizer import ConversationSummarizer
+        
+        return ConversationSummarizer(self.llm_engine, self.conversation_buffer)
+    
+    def process_input(
+        self,
+        user_input: str,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> str:
+        """Process user input and generate response.
+        
+        If cancel_token is cancelled mid-generation, the partial response is
+        stored and returned, with metadata["truncated"] set.
+        
+        When tools are configured, the calls the model requests are run
+        concurrently and their results fed back for another generation,
+        until the model answers without calling tools. The calls are
+        stored with the turn, and any text the model wrote before calling
+        them is kept in the response.
+        
+        Args:
+            user_input: User's input text
+            cancel_token: Token for stopping the generation early
+            
+        Returns:
+            Assistant's response
+        """
+        # Get conversation context
+        context = self._get_context(user_input)
+        
+        # Generate response using LLM
+        metadata = {}
+        tool_calls: List[ToolCall] = []
+        exchanged: List[Dict[str, Any]] = []
+        # Text written before the tool calls of earlier rounds
+        preamble = ""
+        start = time.perf_counter()
+        try:
+            for round_number in count():
+                tools = self._offered_tools(round_number)
+                response = self.llm_engine.generate(
+                    prompt=user_input,
+                    context=context,
+                    personality=self.personality,
+                    prompt_cache=self.prompt_cache,
+                    metadata=metadata,
+                    summary=self.conversation_buffer.summary,
+                    cancel_token=cancel_token,
+                    tools=tools,
+                    tool_messages=exchanged or None
+                )
+                if not self._run_tools(tools, response, metadata, tool_calls, exchanged):
+                    response = preamble + response
+                    break
+                preamble += response.partition(TOOL_CALL_OPEN)[0]
+        except GenerationCancelled as e:
+            response = preamble + e.partial.partition(TOOL_CALL_OPEN)[0]
+            self._mark_truncated(metadata)
+        except Exception as e:
+            metadata["error"] = str(e)
+            response = f"I encountered an error: {str(e)}"
+        metadata["total_time"] = time.perf_counter() - start
+        
+        # Add turn to conversation buffer
+        self._record_turn(user_input, response, metadata, tool_calls)
+        
+        return response
+    
+    def process_input_stream(
+        self,
+        user_input: str,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> Iterator[str]:
+        """Process user input and stream the response as it is generated.
+        
+        The complete response is added to the conversation buffer once the
+        stream ends. Time-to-first-token and total generation time are
+        stored in the assistant message metadata. If cancel_token is
+        cancelled, the stream ends early and the text so far is stored with
+        metadata["truncated"] set.
+        
+        When tools are offered, text is still yielded as it arrives, but
+        from the first sign of a tool call (see ToolMarkupFilter) the rest
+        of the round is held back until the round ends; it is only yielded
+        if no tools were called. Tool-call markup is thus never shown or
+        stored, and the turn matches what process_input records.
+        
+        Args:
+            user_input: User's input text
+            cancel_token: Token for stopping the generation early
+            
+        Yields:
+            Response text fragments
+        """
+        context = self._get_context(user_input)
+        
+        turn = StreamingTurn()
+        tool_calls: List[ToolCall] = []
+        exchanged: List[Dict[str, Any]] = []
+        try:
+            for round_number in count():
+                tools = self._offered_tools(round_number)
+                tokens = self.llm_engine.generate_stream(
+                    prompt=user_input,
+                    context=context,
+                    personality=self.personality,
+                    prompt_cache=self.prompt_cache,
+                    metadata=turn.metadata,
+                    summary=self.conversation_buffer.summary,
+                    cancel_token=cancel_token,
+                    tools=tools,
+                    tool_messages=exchanged or None
+                )
+                if tools is None:
+                    for token in tokens:
+                        turn.add(token)
+                        yield token
+                    break
+                markup = ToolMarkupFilter()
+                round_tokens: List[str] = []
+                for token in tokens:
+                    round_tokens.append(token)
+                    shown = markup.feed(token, "tool_calls" in turn.metadata)
+                    if shown:
+                        turn.add(shown)
+                        yield shown
+                response = "".join(round_tokens)
+                if not self._run_tools(tools, response, turn.metadata, tool_calls, exchanged):
+                    rest = markup.flush()
+                    if rest:
+                        turn.add(rest)
+                        yield rest
+                    break
+        except GenerationCancelled:
+            self._mark_truncated(turn.metadata)
+        except Exception as e:
+            error_text = turn.fail(e)
+            if error_text:
+                yield error_text
+        
+        self._record_turn(user_input, turn.content, turn.finish(), tool_calls)
+    
+    def _offered_tools(self, round_number: int) -> Optional[List[Dict[str, Any]]]:
+        """Return the tool schemas to offer in a generation round, if any."""
+        if self.tool_executor is None or round_number >= self.max_tool_rounds:
+            return None
+        return self.tool_executor.schemas()
+    
+    def _run_tools(
+        self,
+        offered: Optional[List[Dict[str, Any]]],
+        response: str,
+        metadata: Dict[str, Any],
+        tool_calls: List[ToolCall],
+        exchanged: List[Dict[str, Any]]
+    ) -> bool:
+        """Run the tool calls requested in a generation round.
+        
+        Args:
+            offered: Tool schemas offered in the round
+            response: Text generated in the round
+            metadata: Turn metadata; the engine's raw tool calls are removed
+                from it and the time spent in tools is added as tool_time
+            tool_calls: List collecting every call of the turn
+            exchanged: Messages carrying calls and results back to the model
+            
+        Returns:
+            Whether tools were run, so another round is needed
+        """
+        requested = parse_tool_calls(metadata.pop("tool_calls", None), response)
+        if not offered or not requested:
+            return False
+        start = time.perf_counter()
+        self.tool_executor.run(requested)
+        metadata["tool_time"] = metadata.get("tool_time", 0.0) + time.perf_counter() - start
+        for call in requested:
+            self.metrics.observe_tool_call(call)
+        tool_calls.extend(requested)
+        exchanged.extend(tool_messages(response, requested))
+        return True
+    
+    def _mark_truncated(self, metadata: Dict[str, Any]) -> None:
+        """Flag a cancelled turn and drop carried KV-cache state.
+        
+        Ollama never returned a context for the cancelled turn, so carrying
+        the previous one forward would hide the partial exchange from the
+        model.
+        """
+        metadata["truncated"] = True
+        self.prompt_cache.reset()
+    
+    def process_batch(
+        self,
+        inputs: Iterable[Union[str, Sequence[str]]],
+        max_concurrency: int = 4
+    ) -> List[BatchResult]:
+        """Run independent prompts or sessions through a bounded worker pool.
+        
+        Each item gets a fresh conversation sharing this orchestrator's
+        engine, preferences and metrics; this orchestrator's own history is
+        neither used nor changed. A string is a single-turn item, a sequence
+        of strings a session whose turns run in order and stop at the first
+        error.
+        
+        At most max_concurrency items are in flight, capped at the engine's
+        connection pool size, and inputs are consumed only as slots free up,
+        so a large generator never floods Ollama or memory.
+        
+        Args:
+            inputs: Prompts or sessions of prompts
+            max_concurrency: Maximum number of items generating at once
+            
+        Returns:
+            One result per input item, in input order
+            
+        Raises:
+            ValueError: If max_concurrency is less than 1
+        """
+        return list(self.iter_batch(inputs, max_concurrency))
+    
+    def iter_batch(
+        self,
+        inputs: Iterable[Union[str, Sequence[str]]],
+        max_concurrency: int = 4
+    ) -> Iterator[BatchResult]:
+        """Streaming form of process_batch.
+        
+        Results are yielded in input order as soon as they and every item
+        before them are done, even while the next input is still awaited,
+        so output can be written while later inputs are being read.
+        
+        Args:
+            inputs: Prompts or sessions of prompts
+            max_concurrency: Maximum number of items generating at once
+            
+        Yields:
+            One result per input item, in input order
+            
+        Raises:
+            ValueError: If max_concurrency is less than 1
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        max_concurrency = min(max_concurrency, self.llm_engine.config.pool_size)
+        
+        # Input is read on its own thread, so a result that finishes while
+        # the next line is still being waited for is yielded at once. The
+        # queue of submitted items is bounded, so a slow consumer also
+        # stops the reader instead of buffering the whole input.
+        slots = threading.Semaphore(max_concurrency)
+        submitted: "queue.Queue[Optional[Future]]" = queue.Queue(maxsize=2 * max_concurrency)
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="jarvis-batch")
+        
+        def hand_over(future: Optional[Future]) -> None:
+            if not stop.is_set():
+                submitted.put(future)
+        
+        def read_inputs() -> None:
+            try:
+                for index, item in enumerate(inputs):
+                    slots.acquire()
+                    if stop.is_set():
+                        return
+                    future = pool.submit(self._run_batch_item, index, item)
+                    future.add_done_callback(lambda _: slots.release())
+                    hand_over(future)
+            except BaseException as e:
+                # Re-raised by the consumer, as if it had read the input itself
+                failed: Future = Future()
+                failed.set_exception(e)
+                hand_over(failed)
+            finally:
+                hand_over(None)
+        
+        reader = threading.Thread(target=read_inputs, name="jarvis-batch-input", daemon=True)
+        reader.start()
+        try:
+            while True:
+                future = submitted.get()
+                if future is None:
+                    break
+                yield future.result()
+        finally:
+            # Unblock the reader if the consumer stopped early
+            stop.set()
+            slots.release()
+            while True:
+                try:
+                    submitted.get_nowait()
+                except queue.Empty:
+                    break
+            pool.shutdown(wait=True)
+    
+    def _run_batch_item(self, index: int, item: Union[str, Sequence[str]]) -> BatchResult:
+        """Run one batch item in its own conversation.
+        
+        Args:
+            index: Position of the item in the batch
+            item: Prompt or session of prompts
+            
+        Returns:
+            Result of the item; failures are recorded, never raised
+        """
+        prompts = [item] if isinstance(item, str) else list(item)
+        result = BatchResult(index=index, inputs=prompts)
+        buffer = ConversationBuffer(
+            max_turns=self.conversation_buffer.max_turns,
+            max_tokens=self.conversation_buffer.max_tokens
+        )
+        worker = AgentOrchestrator(
+            llm_engine=self.llm_engine,
+            conversation_buffer=buffer,
+            preference_manager=self.preference_manager,
+            metrics=self.metrics
+        )
+        
+        start = time.perf_counter()
+        try:
+            for prompt in prompts:
+                response = worker.process_input(prompt)
+                metadata = buffer.turns[-1].assistant_message.metadata
+                result.responses.append(response)
+                result.metadata.append(metadata)
+                if "error" in metadata:
+                    result.error = metadata["error"]
+                    break
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.total_time = time.perf_counter() - start
+            buffer.close()
+        return result
+    
+    def close(self) -> None:
+        """Release resources held by the orchestrator.
+        
+        A shared engine is left open for its other users.
+        """
+        self.preference_manager.flush()
+        if self.memory_index is not None:
+            try:
+                self.memory_index.flush()
+            except Exception as e:
+                # The turns stay queued for the index owner's close()
+                self.memory_index.error = str(e)
+        if self.summarizer is not None:
+            self.summarizer.close()
+        if self.tool_executor is not None:
+            self.tool_executor.close()
+        self.conversation_buffer.close()
+        if self._owns_engine:
+            self.llm_engine.close()
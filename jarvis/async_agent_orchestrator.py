@@ -0,0 +1,93 @@
+"""Asyncio Agent Orchestrator for serving many conversations on one event loop."""
+
+import time
+from typing import AsyncIterator, Optional
+
+from jarvis.agent_orchestrator import BaseOrchestrator, StreamingTurn
+from jarvis.async_llm_engine import AsyncLLMEngine
+from jarvis.llm_engine import LLMConfig
+
+
+class AsyncAgentOrchestrator(BaseOrchestrator):
+    """Non-blocking counterpart of AgentOrchestrator.
+    
+    Each instance holds one conversation. Many instances can share an event
+    loop; pass the same AsyncLLMEngine to share its connection pool.
+    
+    Tools, history summaries and the memory index are not supported: they
+    block on numpy or synchronous HTTP calls, which would stall the loop.
+    """
+    
+    def _create_engine(self, llm_config: Optional[LLMConfig]) -> AsyncLLMEngine:
+        return AsyncLLMEngine(llm_config)
+    
+    async def process_input(self, user_input: str) -> str:
+        """Process user input and generate response.
+        
+        Args:
+            user_input: User's input text
+            
+        Returns:
+            Assistant's response
+        """
+        context = self._get_context(user_input)
+        
+        metadata = {}
+        start = time.perf_counter()
+        try:
+            response = await self.llm_engine.generate(
+                prompt=user_input,
+                context=context,
+                personality=self.personality,
+                prompt_cache=self.prompt_cache,
+                metadata=metadata,
+                summary=self.conversation_buffer.summary
+            )
+        except Exception as e:
+            metadata["error"] = str(e)
+            response = f"I encountered an error: {str(e)}"
+        metadata["total_time"] = time.perf_counter() - start
+        
+        self._record_turn(user_input, response, metadata)
+        
+        return response
+    
+    async def process_input_stream(self, user_input: str) -> AsyncIterator[str]:
+        """Process user input and stream the response as it is generated.
+        
+        Args:
+            user_input: User's input text
+            
+        Yields:
+            Response text fragments
+        """
+        context = self._get_context(user_input)
+        
+        turn = StreamingTurn()
+        try:
+            async for token in self.llm_engine.generate_stream(
+                prompt=user_input,
+                context=context,
+                personality=self.personality,
+                prompt_cache=self.prompt_cache,
+                metadata=turn.metadata,
+                summary=self.conversation_buffer.summary
+            ):
+                turn.add(token)
+                yield token
+        except Exception as e:
+            error_text = turn.fail(e)
+            if error_text:
+                yield error_text
+        
+        self._record_turn(user_input, turn.content, turn.finish())
+    
+    async def close(self) -> None:
+        """Release resources held by the orchestrator.
+        
+        A shared engine is left open for its other users.
+        """
+        self.preference_manager.flush()
+        self.conversation_buffer.close()
+        if self._owns_engine:
+            await self.llm_engine.close()
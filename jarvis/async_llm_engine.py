@@ -0,0 +1,246 @@
+"""Asyncio LLM Engine for driving many conversations from one event loop."""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+from jarvis.llm_engine import BaseLLMEngine, LLMConfig, PromptCache
+from jarvis.model_router import ModelRouter
+from jarvis.response_cache import ResponseCache
+from jarvis.models import PersonalityConfig
+
+RETRY_STATUSES = (502, 503, 504)
+
+
+class AsyncLLMEngine(BaseLLMEngine):
+    """Non-blocking wrapper for Ollama API built on aiohttp.
+    
+    Shares prompt formatting and response parsing with LLMEngine, so sync and
+    async callers send identical requests.
+    """
+    
+    def __init__(
+        self,
+        config: Optional[LLMConfig] = None,
+        response_cache: Optional[ResponseCache] = None,
+        router: Optional[ModelRouter] = None
+    ):
+        """Initialize Async LLM Engine.
+        
+        The HTTP session is created lazily on first use so the engine can be
+        constructed outside a running event loop.
+        
+        Args:
+            config: LLM configuration. Uses defaults if not provided.
+            response_cache: Cache for repeated requests
+            router: Chooses the model for each turn
+            
+        Raises:
+            ValueError: If config lists several endpoints; load balancing
+                and failover are only available in LLMEngine
+        """
+        super().__init__(config, response_cache, router)
+        if len(self.config.endpoint_urls) > 1:
+            raise ValueError("AsyncLLMEngine supports a single endpoint; use LLMEngine for endpoints")
+        self._url = self.config.endpoint_urls[0]
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled client session, creating it if needed."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.pool_size,
+                force_close=not self.config.http_keep_alive
+            )
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=self.config.connect_timeout,
+                sock_read=self.config.read_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+    
+    async def close(self) -> None:
+        """Close pooled connections to Ollama."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._close_cache()
+    
+    async def __aenter__(self) -> "AsyncLLMEngine":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    async def _post(self, path: str, payload: Dict) -> aiohttp.ClientResponse:
+        """POST to Ollama, retrying connection failures and gateway errors.
+        
+        Mirrors the retry policy LLMEngine mounts on its requests session.
+        
+        Args:
+            path: API path, e.g. ``/api/chat``
+            payload: JSON request body
+            
+        Returns:
+            Response whose status has already been checked
+            
+        Raises:
+            ConnectionError: If Ollama service is not available
+            RuntimeError: If the request fails or times out
+        """
+        session = self._get_session()
+        attempt = 0
+        while True:
+            try:
+                response = await session.post(f"{self._url}{path}", json=payload)
+                if response.status in RETRY_STATUSES and attempt < self.config.max_retries:
+                    response.release()
+                else:
+                    response.raise_for_status()
+                    return response
+            except aiohttp.ClientConnectionError:
+                if attempt >= self.config.max_retries:
+                    raise self._connection_error()
+            except asyncio.TimeoutError:
+                raise RuntimeError("LLM request timed out. Try again.")
+            except Exception as e:
+                raise RuntimeError(f"LLM generation failed: {str(e)}")
+            await asyncio.sleep(self.config.retry_backoff * (2 ** attempt))
+            attempt += 1
+    
+    async def generate(
+        self,
+        prompt: str,
+        context: List[Dict[str, str]],
+        personality: Optional[PersonalityConfig] = None,
+        prompt_cache: Optional[PromptCache] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        summary: Optional[str] = None
+    ) -> str:
+        """Generate response using Ollama API.
+        
+        Args:
+            prompt: User input prompt
+            context: Conversation context
+            personality: Personality configuration
+            prompt_cache: Conversation state for reusing Ollama's KV cache
+            metadata: Dictionary to record per-turn details in
+            summary: Running summary of turns no longer in the context
+            
+        Returns:
+            Generated response text
+            
+        Raises:
+            ConnectionError: If Ollama service is not available
+            RuntimeError: If generation fails
+        """
+        with self._timed(metadata, "prepare_time"):
+            path, payload = self._prepare_request(
+                prompt, context, personality, prompt_cache, metadata, stream=False, summary=summary
+            )
+        cache_key, cached = self._cache_lookup(path, payload, metadata)
+        if cached is not None:
+            return cached
+        
+        with self._track_request():
+            try:
+                with self._timed(metadata, "http_time"):
+                    response = await self._post(path, payload)
+                    async with response:
+                        body = await response.read()
+                with self._timed(metadata, "parse_time"):
+                    result = json.loads(body)
+                    text = self._parse_response(result)
+            except (ConnectionError, RuntimeError):
+                raise
+            except asyncio.TimeoutError:
+                raise RuntimeError("LLM request timed out. Try again.")
+            except Exception as e:
+                raise RuntimeError(f"LLM generation failed: {str(e)}")
+            
+            self._finish_request(result, prompt_cache, metadata)
+            if cache_key is not None:
+                self.response_cache.put(cache_key, text)
+            return text
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        context: List[Dict[str, str]],
+        personality: Optional[PersonalityConfig] = None,
+        prompt_cache: Optional[PromptCache] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        summary: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Generate response using Ollama API, yielding tokens as they arrive.
+        
+        Args:
+            prompt: User input prompt
+            context: Conversation context
+            personality: Personality configuration
+            prompt_cache: Conversation state for reusing Ollama's KV cache
+            metadata: Dictionary to record per-turn details in
+            summary: Running summary of turns no longer in the context
+            
+        Yields:
+            Response text fragments in generation order
+            
+        Raises:
+            ConnectionError: If Ollama service is not available
+            RuntimeError: If generation fails
+        """
+        with self._timed(metadata, "prepare_time"):
+            path, payload = self._prepare_request(
+                prompt, context, personality, prompt_cache, metadata, stream=True, summary=summary
+            )
+        cache_key, cached = self._cache_lookup(path, payload, metadata)
+        if cached is not None:
+            yield cached
+            return
+        
+        with self._track_request():
+            with self._timed(metadata, "http_time"):
+                response = await self._post(path, payload)
+            
+            tokens = []
+            try:
+                async with response:
+                    async for line in response.content:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        with self._timed(metadata, "parse_time"):
+                            token, chunk = self._parse_stream_line(line)
+                        if token:
+                            tokens.append(token)
+                            yield token
+                        if chunk.get("done"):
+                            self._finish_request(chunk, prompt_cache, metadata)
+                            if cache_key is not None:
+                                self.response_cache.put(cache_key, "".join(tokens))
+                            break
+            except RuntimeError:
+                raise
+            except aiohttp.ClientConnectionError:
+                raise self._connection_error()
+            except asyncio.TimeoutError:
+                raise RuntimeError("LLM request timed out. Try again.")
+            except Exception as e:
+                raise RuntimeError(f"LLM generation failed: {str(e)}")
+    
+    async def check_availability(self) -> bool:
+        """Check if Ollama service is available.
+        
+        Returns:
+            True if service is available, False otherwise
+        """
+        try:
+            async with self._get_session().get(
+                f"{self._url}/api/tags",
+                timeout=aiohttp.ClientTimeout(sock_connect=self.config.connect_timeout, total=5)
+            ) as response:
+                return response.status == 200
+        except Exception:
+            return False
@@ -1,28 +1,151 @@
 """Conversation buffer for maintaining context."""
 
 import json
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Callable, Deque, Dict, Iterator, List, Optional, Sequence, TextIO, Union, overload
+)
 from uuid import uuid4
 
-from jarvis.models import ConversationTurn, Message
+from jarvis.conversation_log import ConversationLog
+from jarvis.models import ConversationTurn, Message, ToolCall
+from jarvis.snapshot import SnapshotReader, write_snapshot
+
+# Rough per-message cost of the slotted Message and, for replies, its
+# metadata dict (see benchmarks/memory.py)
+MESSAGE_OVERHEAD_BYTES = 200
+
+
+class ContextView(Sequence[Dict[str, str]]):
+    """Read-only view of the newest messages in a ConversationBuffer.
+    
+    The view shares the buffer's message dictionaries instead of copying
+    them, so it must not be modified and is only valid until the buffer
+    changes. Call list() on it to keep a snapshot.
+    """
+    
+    def __init__(self, buffer: "ConversationBuffer", start: int):
+        self._buffer = buffer
+        self._messages = buffer._context
+        self._start = start
+        self._version = buffer._version
+    
+    def _check_valid(self) -> None:
+        """Raise if the underlying buffer changed since the view was taken."""
+        if self._buffer._version != self._version:
+            raise RuntimeError("Conversation buffer changed; context view is stale")
+    
+    def __len__(self) -> int:
+        return len(self._messages) - self._start
+    
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, str]: ...
+    
+    @overload
+    def __getitem__(self, index: slice) -> List[Dict[str, str]]: ...
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, str], List[Dict[str, str]]]:
+        self._check_valid()
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("context index out of range")
+        return self._messages[self._start + index]
+    
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        self._check_valid()
+        # Walk in from the newest end, so the cost follows the window
+        # rather than the whole buffer
+        newest_first = list(islice(reversed(self._messages), len(self)))
+        return reversed(newest_first)
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+    
+    def __repr__(self) -> str:
+        return f"ContextView({list(self)!r})"
 
 
 class ConversationBuffer:
-    """Manages conversation history with automatic turn eviction."""
+    """Manages conversation history with automatic turn eviction.
     
-    def __init__(self, max_turns: int = 10):
+    With a log_dir, every turn is also appended to a ConversationLog, so the
+    full session survives eviction and can be exported or resumed later.
+    
+    Turns dropped from the buffer are passed to on_evict, if set; a
+    ConversationSummarizer uses this to fold them into summary.
+    """
+    
+    def __init__(
+        self,
+        max_turns: int = 10,
+        max_tokens: Optional[int] = None,
+        log_dir: Optional[Path] = None
+    ):
         """Initialize conversation buffer.
         
         Args:
             max_turns: Maximum number of turns to maintain in buffer
+            max_tokens: Token budget for the LLM context. When set, only the
+                newest turns that fit within the budget are sent to the LLM.
+            log_dir: Directory for the append-only session log. None disables logging.
         """
+        self.max_tokens = max_tokens
+        self.summary: Optional[str] = None
+        self.on_evict: Optional[Callable[[ConversationTurn], None]] = None
+        self._version = 0
         self.max_turns = max_turns
-        self.turns: List[ConversationTurn] = []
         self.session_id = str(uuid4())
         self.started_at = datetime.now()
+        self.log_dir = log_dir
+        self.log: Optional[ConversationLog] = None
+        if log_dir is not None:
+            self.log = ConversationLog(self.session_id, log_dir, self.started_at)
+    
+    @property
+    def max_turns(self) -> int:
+        """Maximum number of turns kept in the buffer."""
+        return self._max_turns
+    
+    @max_turns.setter
+    def max_turns(self, max_turns: int) -> None:
+        # Turns and their formatted LLM messages live in ring buffers sized
+        # to the limit, so eviction drops from the front in O(1).
+        existing = getattr(self, "turns", ())
+        self._max_turns = max_turns
+        self.turns: Deque[ConversationTurn] = deque(maxlen=max_turns)
+        self._context: Deque[Dict[str, str]] = deque(maxlen=2 * max_turns)
+        for turn in existing:
+            self._append(turn)
     
-    def add_turn(self, user_message: Message, assistant_message: Message) -> None:
+    def _append(self, turn: ConversationTurn) -> None:
+        """Append a turn and its LLM messages, evicting the oldest if full."""
+        self._version += 1
+        if self.turns and len(self.turns) == self.turns.maxlen and self.on_evict is not None:
+            self.on_evict(self.turns[0])
+        self.turns.append(turn)
+        self._context.append({
+            "role": turn.user_message.role,
+            "content": turn.user_message.content
+        })
+        self._context.append({
+            "role": turn.assistant_message.role,
+            "content": turn.assistant_message.content
+        })
+    
+    def add_turn(
+        self,
+        user_message: Message,
+        assistant_message: Message,
+        tool_calls: Optional[List[ToolCall]] = None
+    ) -> None:
         """Add a conversation turn to the buffer.
         
         Automatically evicts oldest turn if buffer exceeds max_turns.
@@ -30,34 +153,44 @@ class ConversationBuffer:
         Args:
             user_message: User's message
             assistant_message: Assistant's response
+            tool_calls: Tools run while answering
         """
         turn = ConversationTurn(
             user_message=user_message,
-            assistant_message=assistant_message
+            assistant_message=assistant_message,
+            tool_calls=tool_calls
         )
-        self.turns.append(turn)
-        
-        # Evict oldest turn if we exceed the limit
-        if len(self.turns) > self.max_turns:
-            self.turns.pop(0)
+        self._append(turn)
+        if self.log is not None:
+            self.log.append(turn)
     
-    def get_context_for_llm(self) -> List[Dict[str, str]]:
+    def get_context_for_llm(self, reserved_tokens: int = 0) -> ContextView:
         """Format conversation history for LLM prompt.
         
+        Messages are formatted once when a turn is added, so this returns a
+        read-only view instead of building a new list on every call.
+        
+        In token budget mode, the newest turns whose combined size fits in
+        max_tokens minus reserved_tokens are kept; older turns are skipped.
+        
+        Args:
+            reserved_tokens: Tokens already claimed by the rest of the prompt,
+                such as the system prompt and the current user input
+                
         Returns:
-            List of message dictionaries with role and content
+            Read-only sequence of message dictionaries with role and content
         """
-        messages = []
-        for turn in self.turns:
-            messages.append({
-                "role": turn.user_message.role,
-                "content": turn.user_message.content
-            })
-            messages.append({
-                "role": turn.assistant_message.role,
-                "content": turn.assistant_message.content
-            })
-        return messages
+        start = 0
+        if self.max_tokens is not None:
+            budget = self.max_tokens - reserved_tokens
+            start = len(self.turns)
+            for turn in reversed(self.turns):
+                cost = turn.user_message.token_count + turn.assistant_message.token_count
+                if cost > budget:
+                    break
+                budget -= cost
+                start -= 1
+        return ContextView(self, 2 * start)
     
     def export_to_json(self) -> str:
         """Export conversation buffer to JSON format.
@@ -69,31 +202,179 @@ class ConversationBuffer:
             "session_id": self.session_id,
             "started_at": self.started_at.isoformat(),
             "max_turns": self.max_turns,
-            "turns": [
-                {
-                    "user_message": {
-                        "role": turn.user_message.role,
-                        "content": turn.user_message.content,
-                        "timestamp": turn.user_message.timestamp.isoformat(),
-                        "metadata": turn.user_message.metadata
-                    },
-                    "assistant_message": {
-                        "role": turn.assistant_message.role,
-                        "content": turn.assistant_message.content,
-                        "timestamp": turn.assistant_message.timestamp.isoformat(),
-                        "metadata": turn.assistant_message.metadata
-                    }
-                }
-                for turn in self.turns
-            ]
+            "max_tokens": self.max_tokens,
+            "summary": self.summary,
+            "turns": [turn.to_dict() for turn in self.turns]
         }
         return json.dumps(data, indent=2)
     
+    def export_to_file(self, fp: TextIO) -> None:
+        """Stream the conversation as JSON to an open text file.
+        
+        The output has the same shape as export_to_json and can be read back
+        with from_json. When a log is attached, every turn of the session is
+        written, including turns already evicted from the buffer; turns are
+        copied one at a time, so memory use does not grow with session length.
+        
+        Args:
+            fp: Writable text file
+        """
+        header = {
+            "session_id": self.session_id,
+            "started_at": self.started_at.isoformat(),
+            "max_turns": self.max_turns,
+            "max_tokens": self.max_tokens,
+            "summary": self.summary
+        }
+        if self.log is not None:
+            turn_lines: Iterator[str] = self.log.iter_turn_lines()
+        else:
+            turn_lines = (json.dumps(turn.to_dict()) for turn in self.turns)
+        
+        fp.write(json.dumps(header)[:-1] + ', "turns": [')
+        for i, line in enumerate(turn_lines):
+            fp.write(("," if i else "") + "\n" + line)
+        fp.write("\n]}\n")
+    
+    @classmethod
+    def resume(
+        cls,
+        session_id: str,
+        log_dir: Optional[Path] = None,
+        max_turns: int = 10,
+        max_tokens: Optional[int] = None
+    ) -> "ConversationBuffer":
+        """Rebuild a buffer from the newest turns of a session log.
+        
+        Only the end of the log is read, and new turns keep being appended
+        to the same log.
+        
+        Args:
+            session_id: Session to resume
+            log_dir: Directory holding the log. Defaults to ~/.jarvis/logs/
+            max_turns: Maximum number of turns to maintain in buffer
+            max_tokens: Token budget for the LLM context
+            
+        Returns:
+            ConversationBuffer holding the session's latest turns
+            
+        Raises:
+            FileNotFoundError: If no log exists for the session
+        """
+        log = ConversationLog.open_existing(session_id, log_dir)
+        header = log.header()
+        buffer = cls(max_turns=max_turns, max_tokens=max_tokens)
+        buffer.session_id = header["session_id"]
+        buffer.started_at = datetime.fromisoformat(header["started_at"])
+        buffer.log_dir = log.log_dir
+        buffer.log = log
+        for turn in log.tail(max_turns):
+            buffer._append(turn)
+        return buffer
+    
+    @classmethod
+    def from_json(cls, json_str: str) -> "ConversationBuffer":
+        """Rebuild a conversation buffer from export_to_json output.
+        
+        Args:
+            json_str: JSON string produced by export_to_json
+            
+        Returns:
+            ConversationBuffer with the same session id, start time and turns
+        """
+        data = json.loads(json_str)
+        buffer = cls(max_turns=data["max_turns"], max_tokens=data.get("max_tokens"))
+        buffer.session_id = data["session_id"]
+        buffer.started_at = datetime.fromisoformat(data["started_at"])
+        buffer.summary = data.get("summary")
+        for turn in data["turns"]:
+            buffer._append(ConversationTurn.from_dict(turn))
+        return buffer
+    
+    def save_snapshot(self, path: Union[str, Path]) -> int:
+        """Write the buffer to a compact binary snapshot.
+        
+        Snapshots are several times smaller than export_to_json output and
+        much faster to load; see jarvis/snapshot.py for the format. The file
+        is replaced atomically.
+        
+        Args:
+            path: Destination file
+            
+        Returns:
+            Size of the snapshot in bytes
+        """
+        header = {
+            "session_id": self.session_id,
+            "started_at": self.started_at.isoformat(),
+            "max_turns": self.max_turns,
+            "max_tokens": self.max_tokens,
+            "summary": self.summary
+        }
+        return write_snapshot(path, header, self.turns)
+    
+    @classmethod
+    def load_snapshot(
+        cls,
+        path: Union[str, Path],
+        max_turns: Optional[int] = None
+    ) -> "ConversationBuffer":
+        """Rebuild a conversation buffer from a save_snapshot file.
+        
+        The file is memory-mapped and only the turns that fit in the buffer
+        are decompressed.
+        
+        Args:
+            path: Snapshot file
+            max_turns: Buffer size. Defaults to the size it was saved with.
+            
+        Returns:
+            ConversationBuffer with the same session id, start time and turns
+            
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is not a valid snapshot
+        """
+        with SnapshotReader(path) as snapshot:
+            header = snapshot.header
+            if max_turns is None:
+                max_turns = header["max_turns"]
+            buffer = cls(max_turns=max_turns, max_tokens=header.get("max_tokens"))
+            buffer.session_id = header["session_id"]
+            buffer.started_at = datetime.fromisoformat(header["started_at"])
+            buffer.summary = header.get("summary")
+            for turn in snapshot.tail(max_turns):
+                buffer._append(turn)
+        return buffer
+    
+    def estimate_size(self) -> int:
+        """Estimate the memory held by buffered messages.
+        
+        Returns:
+            Approximate size in bytes of message contents plus per-message overhead
+        """
+        size = 0
+        for turn in self.turns:
+            for message in (turn.user_message, turn.assistant_message):
+                size += MESSAGE_OVERHEAD_BYTES + len(message.content.encode("utf-8"))
+        return size
+    
     def clear(self) -> None:
         """Clear all conversation history from the buffer."""
+        self._version += 1
         self.turns.clear()
+        self._context.clear()
+        self.summary = None
         self.session_id = str(uuid4())
         self.started_at = datetime.now()
+        if self.log is not None:
+            self.log.close()
+            self.log = ConversationLog(self.session_id, self.log_dir, self.started_at)
+    
+    def close(self) -> None:
+        """Close the session log, if any."""
+        if self.log is not None:
+            self.log.close()
     
     def __len__(self) -> int:
         """Return the number of turns in the buffer."""
@@ -0,0 +1,157 @@
+"""Append-only on-disk log of conversation turns."""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from jarvis.models import ConversationTurn
+
+# Bytes read per step when scanning a log backwards for its tail
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+class ConversationLog:
+    """Durable JSONL log holding every turn of one session.
+    
+    The first line is a session header; each following line is one turn as
+    produced by ConversationTurn.to_dict. Lines are only ever appended, so a
+    crash can at worst lose the turn being written.
+    """
+    
+    def __init__(
+        self,
+        session_id: str,
+        log_dir: Optional[Path] = None,
+        started_at: Optional[datetime] = None,
+        fsync: bool = False
+    ):
+        """Open (or create) the log for a session.
+        
+        Args:
+            session_id: Session whose turns are logged
+            log_dir: Directory for logs. Defaults to ~/.jarvis/logs/
+            started_at: Session start time recorded in a new log's header
+            fsync: Whether to fsync after every turn for crash durability
+        """
+        if log_dir is None:
+            log_dir = Path.home() / ".jarvis" / "logs"
+        
+        self.session_id = session_id
+        self.log_dir = log_dir
+        self.path = log_dir / f"{session_id}.jsonl"
+        self.fsync = fsync
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() == 0:
+            self._write({
+                "session_id": session_id,
+                "started_at": (started_at or datetime.now()).isoformat()
+            })
+    
+    @classmethod
+    def open_existing(cls, session_id: str, log_dir: Optional[Path] = None) -> "ConversationLog":
+        """Open the log of an earlier session.
+        
+        Args:
+            session_id: Session whose log to open
+            log_dir: Directory for logs. Defaults to ~/.jarvis/logs/
+            
+        Returns:
+            ConversationLog appending to the existing file
+            
+        Raises:
+            FileNotFoundError: If no log exists for the session
+        """
+        if log_dir is None:
+            log_dir = Path.home() / ".jarvis" / "logs"
+        path = log_dir / f"{session_id}.jsonl"
+        if not path.exists():
+            raise FileNotFoundError(f"No conversation log for session {session_id}")
+        return cls(session_id, log_dir)
+    
+    def _write(self, record: Dict[str, Any]) -> None:
+        """Append one JSON record as a line."""
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+    
+    def append(self, turn: ConversationTurn) -> None:
+        """Append a turn to the log.
+        
+        Args:
+            turn: Conversation turn to record
+        """
+        self._write(turn.to_dict())
+    
+    def header(self) -> Dict[str, Any]:
+        """Read the session header record.
+        
+        Returns:
+            Dictionary with session_id and started_at
+        """
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.loads(f.readline())
+    
+    def iter_turns(self) -> Iterator[ConversationTurn]:
+        """Stream every logged turn from oldest to newest.
+        
+        Yields:
+            Conversation turns
+        """
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                if line.strip():
+                    yield ConversationTurn.from_dict(json.loads(line))
+    
+    def iter_turn_lines(self) -> Iterator[str]:
+        """Stream the raw JSON of every logged turn without decoding it.
+        
+        Yields:
+            One JSON object per turn, without the trailing newline
+        """
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                line = line.rstrip("\n")
+                if line:
+                    yield line
+    
+    def tail(self, count: int) -> List[ConversationTurn]:
+        """Read the newest turns by scanning backwards from the end of the file.
+        
+        Only the blocks holding the requested turns are read, so resuming a
+        long session costs the same as resuming a short one.
+        
+        Args:
+            count: Number of turns to read
+            
+        Returns:
+            Up to count turns, oldest first
+        """
+        if count <= 0:
+            return []
+        
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            # One extra newline is needed to be sure the oldest line is complete
+            while position > 0 and data.count(b"\n") <= count + 1:
+                step = min(TAIL_BLOCK_SIZE, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        
+        # The first line is either cut off mid-record or the session header
+        lines = data.split(b"\n")[1:]
+        turns = [json.loads(line) for line in lines if line.strip()][-count:]
+        return [ConversationTurn.from_dict(turn) for turn in turns]
+    
+    def close(self) -> None:
+        """Close the log file."""
+        self._file.close()
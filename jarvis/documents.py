@@ -0,0 +1,355 @@
+"""Chunked ingestion and map-reduce summarization of long documents."""
+
+import hashlib
+import json
+import re
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from jarvis.llm_engine import LLMEngine
+from jarvis.models import CHARS_PER_TOKEN, DocumentSummary
+from jarvis.response_cache import ResponseCache
+
+# Text files are handed to the chunker in pages of about this many characters
+TEXT_PAGE_CHARS = 16 * 1024
+
+# Once a chunk holds half its token budget, it ends after any paragraph whose
+# CRC is a multiple of this. Boundaries then depend on nearby text rather than
+# on everything before them, so after an edit the chunking realigns within a
+# chunk or two and the rest of the document hits the cache.
+BOUNDARY_DIVISOR = 4
+
+# Part of every cache key; bump it when the prompts change
+PROMPT_VERSION = 1
+
+# Summaries kept by the default chunk cache. It also grows to hold every
+# summary of the document being summarized, so a long document never evicts
+# its own early chunks before a rerun can reuse them.
+CHUNK_CACHE_ENTRIES = 20_000
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+@dataclass
+class Chunk:
+    """A run of consecutive paragraphs summarized in one request.
+    
+    Attributes:
+        index: Position of the chunk in the document, from 0
+        text: Paragraphs separated by blank lines
+        first_page: Page the chunk starts on, from 1
+        last_page: Page the chunk ends on
+    """
+    index: int
+    text: str
+    first_page: int
+    last_page: int
+
+
+def iter_pages(path: Union[str, Path]) -> Iterator[str]:
+    """Yield the text of a document one page at a time.
+    
+    PDFs are read with pypdf from an open file, so pages are parsed only as
+    their text is extracted. Other files are read as UTF-8 text and split
+    into pages of about TEXT_PAGE_CHARS at blank lines.
+    
+    Args:
+        path: PDF or text file
+        
+    Yields:
+        Text of each page
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".pdf":
+        # Imported here so plain text documents work without pypdf installed
+        from pypdf import PdfReader
+        
+        with open(path, "rb") as f:
+            for page in PdfReader(f).pages:
+                yield page.extract_text() or ""
+        return
+    
+    with open(path, encoding="utf-8", errors="replace") as f:
+        lines: List[str] = []
+        size = 0
+        for line in f:
+            lines.append(line)
+            size += len(line)
+            # Prefer ending a page between paragraphs, but bound its size
+            if size >= TEXT_PAGE_CHARS and (not line.strip() or size >= 4 * TEXT_PAGE_CHARS):
+                yield "".join(lines)
+                lines = []
+                size = 0
+        if lines:
+            yield "".join(lines)
+
+
+def _count_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _paragraphs(page: str, max_tokens: int) -> Iterator[str]:
+    """Split a page into whitespace-normalized paragraphs of at most max_tokens."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    for block in _PARAGRAPH_BREAK.split(page):
+        paragraph = " ".join(block.split())
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            yield paragraph[:cut]
+            paragraph = paragraph[cut:].lstrip()
+        if paragraph:
+            yield paragraph
+
+
+def iter_chunks(pages: Iterable[str], max_tokens: int = 1000) -> Iterator[Chunk]:
+    """Split pages into chunks of at most max_tokens, reading pages lazily.
+    
+    Chunks are made of whole paragraphs; a page break also ends a
+    paragraph, and paragraphs longer than max_tokens are split at words.
+    See BOUNDARY_DIVISOR for where chunks end.
+    
+    Args:
+        pages: Page texts, e.g. from iter_pages
+        max_tokens: Estimated token budget of a chunk
+        
+    Yields:
+        Chunks in document order
+    """
+    parts: List[str] = []
+    tokens = 0
+    first_page = last_page = 1
+    index = 0
+    for number, page in enumerate(pages, 1):
+        for paragraph in _paragraphs(page, max_tokens):
+            size = _count_tokens(paragraph)
+            if parts and tokens + size > max_tokens:
+                yield Chunk(index, "\n\n".join(parts), first_page, last_page)
+                index += 1
+                parts, tokens = [], 0
+            if not parts:
+                first_page = number
+            parts.append(paragraph)
+            tokens += size
+            last_page = number
+            if (
+                tokens >= max_tokens // 2
+                and zlib.crc32(paragraph.encode("utf-8")) % BOUNDARY_DIVISOR == 0
+            ):
+                yield Chunk(index, "\n\n".join(parts), first_page, last_page)
+                index += 1
+                parts, tokens = [], 0
+    if parts:
+        yield Chunk(index, "\n\n".join(parts), first_page, last_page)
+
+
+class DocumentSummarizer:
+    """Summarizes documents of any length with bounded memory.
+    
+    Pages are read one at a time and split into chunks (see iter_chunks),
+    which are summarized concurrently, max_concurrency at a time. Every
+    fan_in consecutive summaries are combined into one on the same worker
+    pool, and so on up the tree until a single summary is left, so
+    reductions overlap with the chunks still being summarized. Only the
+    chunks in flight and fewer than fan_in summaries per tree level are held
+    at once, however long the document is.
+    
+    Every summary is cached under a hash of the text it summarizes, so
+    summarizing an edited document again only pays for the chunks that
+    changed and the summaries above them.
+    """
+    
+    def __init__(
+        self,
+        llm_engine: LLMEngine,
+        cache: Optional[ResponseCache] = None,
+        chunk_tokens: int = 1000,
+        fan_in: int = 6,
+        summary_words: int = 150,
+        max_concurrency: int = 4
+    ):
+        """Initialize summarizer.
+        
+        Args:
+            llm_engine: Engine used to write summaries
+            cache: Store for chunk summaries. Defaults to
+                ~/.jarvis/chunk_cache.db, holding CHUNK_CACHE_ENTRIES
+                summaries or those of the longest document summarized. A
+                cache passed in is used as is, so size it for the longest
+                document.
+            chunk_tokens: Token budget of each chunk
+            fan_in: Summaries combined into one at each reduce step
+            summary_words: Length requested for every summary
+            max_concurrency: Chunks summarized at once
+            
+        Raises:
+            ValueError: If fan_in is below 2
+        """
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.llm_engine = llm_engine
+        self._owns_cache = cache is None
+        if cache is None:
+            cache = ResponseCache(
+                max_entries=CHUNK_CACHE_ENTRIES,
+                path=Path.home() / ".jarvis" / "chunk_cache.db"
+            )
+        self.cache = cache
+        self.chunk_tokens = chunk_tokens
+        self.fan_in = fan_in
+        self.summary_words = summary_words
+        self.max_concurrency = max_concurrency
+    
+    def summarize(self, path: Union[str, Path]) -> DocumentSummary:
+        """Summarize a PDF or text file.
+        
+        Args:
+            path: Document to summarize
+            
+        Returns:
+            The summary with page, chunk and cache counts
+            
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the document contains no text
+            ConnectionError: If Ollama cannot be reached
+        """
+        return self.summarize_pages(iter_pages(path))
+    
+    def summarize_pages(self, pages: Iterable[str]) -> DocumentSummary:
+        """Summarize a document given as page texts.
+        
+        Args:
+            pages: Page texts, consumed lazily
+            
+        Returns:
+            The summary with page, chunk and cache counts
+            
+        Raises:
+            ValueError: If the pages contain no text
+        """
+        start = time.perf_counter()
+        result = DocumentSummary()
+        levels: List[List[Future]] = []
+        in_flight: Deque[Future] = deque()
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="jarvis-doc")
+        try:
+            for chunk in iter_chunks(pages, self.chunk_tokens):
+                result.chunks += 1
+                result.pages = chunk.last_page
+                if self._owns_cache:
+                    # A tree over n chunks has fewer than n reductions
+                    self.cache.max_entries = max(self.cache.max_entries, 2 * result.chunks)
+                in_flight.append(pool.submit(self._summarize, "chunk", chunk.text))
+                if len(in_flight) >= self.max_concurrency:
+                    self._add(levels, in_flight.popleft(), result, pool)
+            while in_flight:
+                self._add(levels, in_flight.popleft(), result, pool)
+            
+            if not result.chunks:
+                raise ValueError("Document contains no text")
+            result.summary = self._finish(levels, result, pool).result()[0]
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        
+        result.total_time = time.perf_counter() - start
+        return result
+    
+    def _add(
+        self,
+        levels: List[List[Future]],
+        future: Future,
+        result: DocumentSummary,
+        pool: ThreadPoolExecutor
+    ) -> None:
+        """Collect a chunk summary, reducing every level that reaches fan_in."""
+        _, cached = future.result()
+        if cached:
+            result.cached_chunks += 1
+        level = 0
+        while True:
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(future)
+            if len(levels[level]) < self.fan_in:
+                return
+            future = self._reduce(levels[level], result, pool)
+            levels[level] = []
+            level += 1
+    
+    def _finish(
+        self,
+        levels: List[List[Future]],
+        result: DocumentSummary,
+        pool: ThreadPoolExecutor
+    ) -> Future:
+        """Reduce the partial groups left on each level into the final summary."""
+        carry: List[Future] = []
+        for level in levels:
+            # Higher levels cover earlier text, so the carry goes last
+            group = level + carry
+            carry = [self._reduce(group, result, pool)] if len(group) > 1 else group
+        return carry[0]
+    
+    def _reduce(self, group: List[Future], result: DocumentSummary, pool: ThreadPoolExecutor) -> Future:
+        """Submit the reduction of a group of summaries still being written.
+        
+        The pool runs tasks in submission order, so by the time a reduction
+        starts the summaries it waits for are running or done, and waiting
+        for them cannot deadlock.
+        """
+        result.reductions += 1
+        return pool.submit(self._combine, group)
+    
+    def _combine(self, group: Sequence[Future]) -> Tuple[str, bool]:
+        return self._summarize("reduce", "\n\n".join(future.result()[0] for future in group))
+    
+    def _cache_key(self, kind: str, text: str) -> str:
+        """Build the cache key of a summary from a hash of its input."""
+        key_data = json.dumps([
+            PROMPT_VERSION,
+            self.llm_engine.config.model,
+            self.summary_words,
+            kind,
+            hashlib.sha256(text.encode("utf-8")).hexdigest()
+        ])
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+    
+    def _summarize(self, kind: str, text: str) -> Tuple[str, bool]:
+        """Summarize a chunk, or combine summaries when kind is "reduce".
+        
+        Returns:
+            Tuple of the summary and whether it came from the cache
+        """
+        key = self._cache_key(kind, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+        summary = self.llm_engine.generate(prompt=self._build_prompt(kind, text), context=[]).strip()
+        self.cache.put(key, summary)
+        return summary, False
+    
+    def _build_prompt(self, kind: str, text: str) -> str:
+        """Build the instruction for summarizing a chunk or combining summaries."""
+        if kind == "reduce":
+            task = (
+                "The texts below summarize consecutive parts of one document. "
+                "Combine them into a single summary of all of them, in order."
+            )
+        else:
+            task = "Summarize the following part of a document."
+        return (
+            f"{task} Keep key facts, definitions, names and numbers. "
+            f"Reply with the summary only, in at most {self.summary_words} words.\n\n{text}"
+        )
+    
+    def close(self) -> None:
+        """Close the chunk cache if this summarizer created it."""
+        if self._owns_cache:
+            self.cache.close()
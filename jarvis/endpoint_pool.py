@@ -0,0 +1,213 @@
+"""Load balancing and failover across several Ollama servers."""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Weight of the newest observation in each endpoint's latency average
+EWMA_ALPHA = 0.3
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class Endpoint:
+    """One Ollama server with its load, observed latency and breaker state.
+    
+    Attributes are updated by EndpointPool under its lock and should be
+    treated as read-only elsewhere.
+    """
+    
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.requests = 0
+        self.errors = 0
+    
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r}, state={self.state!r}, outstanding={self.outstanding})"
+
+
+class EndpointPool:
+    """Chooses an endpoint per request and keeps failing ones out of rotation.
+    
+    Requests go to the endpoint with the lowest expected wait, estimated as
+    its observed latency times the requests it would then have outstanding;
+    endpoints not observed yet are tried first. Each endpoint has a circuit
+    breaker: failure_threshold consecutive failures, or one failed health
+    check, open it and it is skipped until reset_timeout has passed. Then a
+    single trial request is let through (half-open) and closes the breaker
+    again if it succeeds. A passing health check closes it right away.
+    
+    If every breaker is open, the endpoint that failed longest ago is tried
+    anyway, so a lone server is never locked out longer than it is down.
+    """
+    
+    def __init__(
+        self,
+        urls: Sequence[str],
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0
+    ):
+        """Initialize pool.
+        
+        Args:
+            urls: Base URLs of the Ollama servers
+            failure_threshold: Consecutive failures that open an endpoint's breaker
+            reset_timeout: Seconds an open breaker waits before a trial request
+            
+        Raises:
+            ValueError: If no URLs are given
+        """
+        if not urls:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def __len__(self) -> int:
+        return len(self.endpoints)
+    
+    def _usable(self, endpoint: Endpoint, now: float) -> bool:
+        """Whether an endpoint may take a request; caller holds the lock."""
+        if endpoint.state == CLOSED:
+            return True
+        return endpoint.state == OPEN and now - endpoint.opened_at >= self.reset_timeout
+    
+    @staticmethod
+    def _expected_wait(endpoint: Endpoint) -> float:
+        return (endpoint.outstanding + 1) * (endpoint.latency or 0.0)
+    
+    def acquire(self, exclude: Sequence[Endpoint] = ()) -> Optional[Endpoint]:
+        """Pick the endpoint for a request and count the request as outstanding.
+        
+        Every acquired endpoint must be handed back with release().
+        
+        Args:
+            exclude: Endpoints already tried for this request
+            
+        Returns:
+            Chosen endpoint, or None if every endpoint is excluded
+        """
+        now = time.monotonic()
+        with self._lock:
+            remaining = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+            if not remaining:
+                return None
+            candidates = [endpoint for endpoint in remaining if self._usable(endpoint, now)]
+            if candidates:
+                chosen = min(candidates, key=lambda e: (self._expected_wait(e), e.outstanding))
+            else:
+                chosen = min(remaining, key=lambda e: e.opened_at)
+            if chosen.state == OPEN:
+                chosen.state = HALF_OPEN
+            chosen.outstanding += 1
+            chosen.requests += 1
+            return chosen
+    
+    def has_alternative(self, exclude: Sequence[Endpoint]) -> bool:
+        """Whether an endpoint outside exclude could take a request now."""
+        now = time.monotonic()
+        with self._lock:
+            return any(
+                self._usable(endpoint, now)
+                for endpoint in self.endpoints if endpoint not in exclude
+            )
+    
+    def release(self, endpoint: Endpoint, latency: Optional[float] = None, failed: bool = False) -> None:
+        """Record the outcome of a request started with acquire().
+        
+        Args:
+            endpoint: Endpoint the request went to
+            latency: Seconds until the response arrived, if it did
+            failed: Whether the endpoint failed, e.g. it refused the
+                connection, timed out or answered with a gateway error
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if failed:
+                self._record_failure(endpoint)
+                return
+            endpoint.failures = 0
+            endpoint.state = CLOSED
+            if latency is not None:
+                if endpoint.latency is None:
+                    endpoint.latency = latency
+                else:
+                    endpoint.latency += EWMA_ALPHA * (latency - endpoint.latency)
+    
+    def _record_failure(self, endpoint: Endpoint) -> None:
+        """Count a failure and open the breaker if needed; caller holds the lock."""
+        endpoint.errors += 1
+        endpoint.failures += 1
+        if endpoint.state == HALF_OPEN or endpoint.failures >= self.failure_threshold:
+            endpoint.state = OPEN
+            endpoint.opened_at = time.monotonic()
+    
+    def report_health(self, endpoint: Endpoint, healthy: bool) -> None:
+        """Apply the result of a health check to an endpoint's breaker.
+        
+        Args:
+            endpoint: Endpoint that was checked
+            healthy: Whether it answered
+        """
+        with self._lock:
+            if healthy:
+                if endpoint.state != HALF_OPEN:
+                    endpoint.state = CLOSED
+                    endpoint.failures = 0
+            elif endpoint.state != OPEN:
+                endpoint.state = OPEN
+                endpoint.opened_at = time.monotonic()
+    
+    def start_health_checks(self, probe: Callable[[str], bool], interval: float) -> None:
+        """Check every endpoint now and then every interval seconds, on a daemon thread.
+        
+        Args:
+            probe: Function returning whether the server at a URL is up
+            interval: Seconds between rounds of checks
+        """
+        def run() -> None:
+            while True:
+                for endpoint in self.endpoints:
+                    self.report_health(endpoint, probe(endpoint.url))
+                if self._stop.wait(interval):
+                    return
+        
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return the state of every endpoint.
+        
+        Returns:
+            One dictionary per endpoint with url, state, outstanding,
+            latency, requests and errors
+        """
+        with self._lock:
+            return [
+                {
+                    "url": endpoint.url,
+                    "state": endpoint.state,
+                    "outstanding": endpoint.outstanding,
+                    "latency": endpoint.latency,
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors
+                }
+                for endpoint in self.endpoints
+            ]
+    
+    def close(self) -> None:
+        """Stop health checks. A check in progress is left to finish on its own."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
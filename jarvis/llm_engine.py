@@ -1,9 +1,30 @@
 """LLM Engine wrapper for Ollama integration."""
 
-from typing import List, Dict, Optional
+import json
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from jarvis.models import Message, PersonalityConfig
+from jarvis.endpoint_pool import Endpoint, EndpointPool
+from jarvis.model_router import ModelProfile, ModelRouter
+from jarvis.models import Message, PersonalityConfig, estimate_tokens
+from jarvis.response_cache import ResponseCache
+
+# Fields of Ollama's final response chunk copied into turn metadata
+OLLAMA_COUNTS = ("prompt_eval_count", "eval_count")
+OLLAMA_DURATIONS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+
+# Read timeout for loading model weights, which can take far longer than a turn
+LOAD_READ_TIMEOUT = 300.0
+
+# Gateway errors that count against an endpoint and make a request fail over
+FAILOVER_STATUSES = (502, 503, 504)
 
 
 class LLMConfig:
@@ -14,30 +35,240 @@ class LLMConfig:
         model: str = "mistral:7b",
         endpoint: str = "http://localhost:11434",
         temperature: float = 0.7,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        pool_size: int = 10,
+        http_keep_alive: bool = True,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        keep_alive: Optional[str] = None,
+        reuse_context: bool = False,
+        cache_responses: bool = False,
+        cache_max_temperature: float = 0.7,
+        embedding_model: str = "nomic-embed-text",
+        route_models: Optional[List[ModelProfile]] = None,
+        speed_weight: float = 0.5,
+        endpoints: Optional[List[str]] = None,
+        health_check_interval: float = 10.0,
+        failure_threshold: int = 3,
+        circuit_reset_timeout: float = 30.0,
+        hedge_after: Optional[float] = None
     ):
         self.model = model
         self.endpoint = endpoint
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.pool_size = pool_size
+        self.http_keep_alive = http_keep_alive
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        # How long Ollama keeps the model loaded after a request, e.g. "30m".
+        # None leaves the server default in place.
+        self.keep_alive = keep_alive
+        # Carry Ollama's returned context forward between turns so only the
+        # new user message is prefilled (see PromptCache)
+        self.reuse_context = reuse_context
+        # Serve repeated requests from ResponseCache; sampling above
+        # cache_max_temperature is considered too random to cache
+        self.cache_responses = cache_responses
+        self.cache_max_temperature = cache_max_temperature
+        # Model used by LLMEngine.embed for the long-term memory index
+        self.embedding_model = embedding_model
+        # Models to route turns between (see ModelRouter); model stays the
+        # default for carried-context turns and availability checks
+        self.route_models = route_models
+        self.speed_weight = speed_weight
+        # Several Ollama servers to balance between (see EndpointPool); when
+        # set, it replaces endpoint. Health checks run every
+        # health_check_interval seconds when there is more than one; 0 disables them.
+        self.endpoints = endpoints
+        self.health_check_interval = health_check_interval
+        self.failure_threshold = failure_threshold
+        self.circuit_reset_timeout = circuit_reset_timeout
+        # Send a non-streamed request to a second endpoint as well if the
+        # first has not answered after this many seconds. None disables it.
+        self.hedge_after = hedge_after
+    
+    @property
+    def endpoint_urls(self) -> List[str]:
+        """Ollama servers to use, in order of preference."""
+        return list(self.endpoints) if self.endpoints else [self.endpoint]
+    
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """Connect and read timeouts in the form accepted by requests."""
+        return (self.connect_timeout, self.read_timeout)
+
+
+class GenerationCancelled(Exception):
+    """Raised when a generation is stopped through its CancellationToken.
+    
+    Attributes:
+        partial: Response text received before the generation was stopped
+    """
+    
+    def __init__(self, partial: str = ""):
+        super().__init__("Generation cancelled")
+        self.partial = partial
+
+
+class CancellationToken:
+    """Thread-safe flag for stopping an in-flight generation.
+    
+    Pass one to LLMEngine.generate or generate_stream and call cancel()
+    from anywhere, e.g. another thread or a signal handler. The engine
+    registers a callback that cuts off the HTTP stream, so a read blocked
+    waiting for Ollama returns at once, and Ollama stops generating when
+    it notices the hang-up. The engine then raises GenerationCancelled
+    with the partial text.
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+    
+    def cancel(self) -> None:
+        """Request cancellation. Calling it again has no further effect."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation was requested."""
+        return self._event.is_set()
+    
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Run callback when cancel() is called, or now if it already was.
+        
+        Args:
+            callback: Function taking no arguments. It runs on the thread
+                that calls cancel() and should not block.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+    
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """Stop running a callback added with add_callback.
+        
+        Args:
+            callback: Function passed to add_callback earlier
+        """
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class PromptCache:
+    """Per-conversation state for reusing Ollama's KV cache across turns.
+    
+    With LLMConfig.reuse_context enabled, turns are sent to ``/api/generate``
+    together with the token context Ollama returned for the previous turn.
+    The already-evaluated prefix is then reused instead of re-prefilling the
+    system prompt and history every turn. A conversation only enters this
+    mode from an empty history; until then the regular ``/api/chat`` path
+    is used.
+    """
+    
+    def __init__(self):
+        self.context: Optional[List[int]] = None
+        self.system_prompt: Optional[str] = None
+        self.tokens_saved = 0
+    
+    def reset(self) -> None:
+        """Forget carried state, e.g. after the conversation is cleared."""
+        self.context = None
+        self.system_prompt = None
+        self.tokens_saved = 0
 
 
-class LLMEngine:
-    """Wrapper for Ollama API with prompt management."""
+class BaseLLMEngine:
+    """Prompt construction and Ollama protocol handling shared by all engines."""
     
-    def __init__(self, config: Optional[LLMConfig] = None):
+    def __init__(
+        self,
+        config: Optional[LLMConfig] = None,
+        response_cache: Optional[ResponseCache] = None,
+        router: Optional[ModelRouter] = None
+    ):
         """Initialize LLM Engine.
         
         Args:
             config: LLM configuration. Uses defaults if not provided.
+            response_cache: Cache for repeated requests. When not provided, a
+                default cache is created if config.cache_responses is set.
+            router: Chooses the model for each turn. When not provided, one is
+                created if config.route_models is set.
         """
         self.config = config or LLMConfig()
+        self._owns_cache = response_cache is None
+        if response_cache is None and self.config.cache_responses:
+            response_cache = ResponseCache()
+        self.response_cache = response_cache
+        if router is None and self.config.route_models:
+            router = ModelRouter(self.config.route_models, self.config.speed_weight)
+        self.router = router
+        
+        self._activity_lock = threading.Lock()
+        self._active_requests = 0
+        self._last_request_end = time.monotonic()
+    
+    @contextmanager
+    def _track_request(self) -> Iterator[None]:
+        """Count a request as in flight for the duration of the block."""
+        with self._activity_lock:
+            self._active_requests += 1
+        try:
+            yield
+        finally:
+            with self._activity_lock:
+                self._active_requests -= 1
+                self._last_request_end = time.monotonic()
+    
+    @staticmethod
+    @contextmanager
+    def _timed(metadata: Optional[Dict[str, Any]], key: str) -> Iterator[None]:
+        """Add the wall-clock duration of the block to metadata[key], in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if metadata is not None:
+                metadata[key] = metadata.get(key, 0.0) + time.perf_counter() - start
+    
+    @property
+    def busy(self) -> bool:
+        """Whether a generation request is currently in flight."""
+        return self._active_requests > 0
+    
+    def idle_seconds(self) -> float:
+        """Return how long the engine has been without requests.
+        
+        Returns:
+            Seconds since the last request finished, or 0 while one is in flight
+        """
+        with self._activity_lock:
+            if self._active_requests:
+                return 0.0
+            return time.monotonic() - self._last_request_end
     
     def format_prompt(
         self,
         user_input: str,
         context: List[Dict[str, str]],
-        personality: Optional[PersonalityConfig] = None
+        personality: Optional[PersonalityConfig] = None,
+        summary: Optional[str] = None
     ) -> List[Dict[str, str]]:
         """Format prompt with context and personality.
         
@@ -45,6 +276,7 @@ class LLMEngine:
             user_input: Current user input
             context: Previous conversation messages
             personality: Personality configuration
+            summary: Running summary of turns no longer in the context
             
         Returns:
             List of formatted messages for the LLM
@@ -56,6 +288,10 @@ class LLMEngine:
             system_prompt = self._build_system_prompt(personality)
             messages.append({"role": "system", "content": system_prompt})
         
+        # Add summary of older turns
+        if summary:
+            messages.append({"role": "system", "content": self._build_summary_prompt(summary)})
+        
         # Add conversation context
         messages.extend(context)
         
@@ -64,6 +300,29 @@ class LLMEngine:
         
         return messages
     
+    def estimate_prompt_tokens(
+        self,
+        user_input: str,
+        personality: Optional[PersonalityConfig] = None,
+        summary: Optional[str] = None
+    ) -> int:
+        """Estimate the tokens format_prompt adds around the conversation context.
+        
+        Args:
+            user_input: Current user input
+            personality: Personality configuration
+            summary: Running summary of older turns
+            
+        Returns:
+            Approximate tokens used by the system prompts and user input
+        """
+        tokens = estimate_tokens(user_input)
+        if personality:
+            tokens += estimate_tokens(self._build_system_prompt(personality))
+        if summary:
+            tokens += estimate_tokens(self._build_summary_prompt(summary))
+        return tokens
+    
     def _build_system_prompt(self, personality: PersonalityConfig) -> str:
         """Build system prompt based on personality configuration.
         
@@ -91,11 +350,583 @@ class LLMEngine:
         
         return f"{tone_desc} {verbosity_desc} {personality.response_style}"
     
+    def _build_summary_prompt(self, summary: str) -> str:
+        """Build the system message carrying the summary of older turns.
+        
+        Args:
+            summary: Running conversation summary
+            
+        Returns:
+            System message content
+        """
+        return f"Summary of the earlier conversation: {summary}"
+    
+    def _options(self) -> Dict[str, Any]:
+        """Build the generation options sent with every request."""
+        return {
+            "temperature": self.config.temperature,
+            "num_predict": self.config.max_tokens
+        }
+    
+    def _build_payload(
+        self,
+        messages: List[Dict[str, str]],
+        stream: bool,
+        model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the JSON body for an ``/api/chat`` request.
+        
+        Args:
+            messages: Formatted messages for the LLM
+            stream: Whether Ollama should stream the response
+            model: Model to use instead of config.model
+            
+        Returns:
+            Request payload dictionary
+        """
+        payload = {
+            "model": model or self.config.model,
+            "messages": messages,
+            "stream": stream,
+            "options": self._options()
+        }
+        if self.config.keep_alive is not None:
+            payload["keep_alive"] = self.config.keep_alive
+        return payload
+    
+    def _build_generate_payload(
+        self,
+        prompt: str,
+        prompt_cache: PromptCache,
+        stream: bool
+    ) -> Dict[str, Any]:
+        """Build the JSON body for an ``/api/generate`` request that carries context.
+        
+        The system prompt is only sent on the first turn; later turns rely on
+        the returned context, which already contains it.
+        
+        Args:
+            prompt: User input prompt
+            prompt_cache: Carried conversation state
+            stream: Whether Ollama should stream the response
+            
+        Returns:
+            Request payload dictionary
+        """
+        payload = {
+            "model": self.config.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": self._options()
+        }
+        if prompt_cache.context is None:
+            if prompt_cache.system_prompt:
+                payload["system"] = prompt_cache.system_prompt
+        else:
+            payload["context"] = prompt_cache.context
+        if self.config.keep_alive is not None:
+            payload["keep_alive"] = self.config.keep_alive
+        return payload
+    
+    def _prepare_request(
+        self,
+        prompt: str,
+        context: List[Dict[str, str]],
+        personality: Optional[PersonalityConfig],
+        prompt_cache: Optional[PromptCache],
+        metadata: Optional[Dict[str, Any]],
+        stream: bool,
+        summary: Optional[str] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_messages: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Choose the API path for a turn and build its payload.
+        
+        The summary is only sent on the ``/api/chat`` path; carried Ollama
+        context already holds the full conversation. Requests offering
+        tools, or continuing after tool calls, always use ``/api/chat``,
+        since ``/api/generate`` supports neither.
+        
+        Args:
+            prompt: User input prompt
+            context: Conversation context
+            personality: Personality configuration
+            prompt_cache: Carried conversation state, if the caller keeps one
+            metadata: Dictionary to record per-turn details in
+            stream: Whether Ollama should stream the response
+            summary: Running summary of turns no longer in the context
+            tools: Tool schemas the model may call
+            tool_messages: Tool calls and results of this turn so far,
+                appended after the user input
+                
+        Returns:
+            Tuple of API path and request payload
+        """
+        uses_tools = bool(tools or tool_messages)
+        if self.config.reuse_context and prompt_cache is not None and not uses_tools:
+            system_prompt = self._build_system_prompt(personality) if personality else None
+            if prompt_cache.system_prompt != system_prompt:
+                # A different system prompt invalidates the carried prefix
+                prompt_cache.reset()
+                prompt_cache.system_prompt = system_prompt
+            
+            if prompt_cache.context is not None or len(context) == 0:
+                if metadata is not None:
+                    metadata["prompt_eval_saved"] = len(prompt_cache.context or [])
+                    metadata["model"] = self.config.model
+                    if self.router is not None:
+                        metadata["route_reason"] = "carried context belongs to the default model"
+                return "/api/generate", self._build_generate_payload(prompt, prompt_cache, stream)
+        
+        messages = self.format_prompt(prompt, context, personality, summary)
+        if tool_messages:
+            messages.extend(tool_messages)
+        model = self._choose_model(prompt, messages, metadata)
+        payload = self._build_payload(messages, stream, model)
+        if tools:
+            payload["tools"] = tools
+        return "/api/chat", payload
+    
+    def _choose_model(
+        self,
+        prompt: str,
+        messages: List[Dict[str, str]],
+        metadata: Optional[Dict[str, Any]]
+    ) -> str:
+        """Pick the model for a chat request and record the choice.
+        
+        Args:
+            prompt: User input prompt
+            messages: Formatted messages for the LLM
+            metadata: Dictionary to record the model and routing reason in
+            
+        Returns:
+            Model name
+        """
+        model = self.config.model
+        reason = None
+        if self.router is not None:
+            prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+            model, reason = self.router.route(prompt, prompt_tokens)
+        if metadata is not None:
+            metadata["model"] = model
+            if reason is not None:
+                metadata["route_reason"] = reason
+        return model
+    
+    def _cache_lookup(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Look up a request in the response cache.
+        
+        Requests that carry Ollama context are never cached, since their
+        returned context is needed for the next turn, and neither are
+        requests offering tools, since only the text of a reply is cached.
+        
+        Args:
+            path: API path chosen for the request
+            payload: Request payload
+            metadata: Dictionary to record the cache outcome in
+            
+        Returns:
+            Tuple of the cache key (None if caching is bypassed) and the
+            cached response (None on a miss)
+        """
+        if (
+            self.response_cache is None
+            or path != "/api/chat"
+            or self.config.temperature > self.config.cache_max_temperature
+            or "tools" in payload
+        ):
+            return None, None
+        
+        key = ResponseCache.make_key(payload)
+        cached = self.response_cache.get(key)
+        if metadata is not None:
+            metadata["cache"] = "miss" if cached is None else "hit"
+        return key, cached
+    
+    def _close_cache(self) -> None:
+        """Close the response cache if this engine created it."""
+        if self.response_cache is not None and self._owns_cache:
+            self.response_cache.close()
+    
+    def _finish_request(
+        self,
+        result: Dict[str, Any],
+        prompt_cache: Optional[PromptCache],
+        metadata: Optional[Dict[str, Any]]
+    ) -> None:
+        """Record details from a final response chunk.
+        
+        Ollama's token counts and timings are copied into metadata, with
+        durations converted from nanoseconds to seconds.
+        
+        Args:
+            result: Non-streamed response body or final streamed chunk
+            prompt_cache: Carried conversation state to update
+            metadata: Dictionary to record per-turn details in
+        """
+        if prompt_cache is not None and "context" in result:
+            prompt_cache.tokens_saved += len(prompt_cache.context or [])
+            prompt_cache.context = result["context"]
+        if metadata is not None:
+            for key in OLLAMA_COUNTS:
+                if key in result:
+                    metadata[key] = result[key]
+            for key in OLLAMA_DURATIONS:
+                if key in result:
+                    metadata[key] = result[key] / 1e9
+            if result.get("eval_count") and result.get("eval_duration"):
+                metadata["tokens_per_second"] = result["eval_count"] / (result["eval_duration"] / 1e9)
+        if self.router is not None:
+            self.router.observe(result, metadata.get("model") if metadata is not None else None)
+    
+    @staticmethod
+    def _record_tool_calls(result: Dict[str, Any], metadata: Optional[Dict[str, Any]]) -> None:
+        """Collect tool calls from a response body or streamed chunk into metadata["tool_calls"]."""
+        calls = result.get("message", {}).get("tool_calls")
+        if calls and metadata is not None:
+            metadata.setdefault("tool_calls", []).extend(calls)
+    
+    def _parse_response(self, result: Dict[str, Any]) -> str:
+        """Extract the assistant text from a non-streamed response.
+        
+        Args:
+            result: Decoded ``/api/chat`` or ``/api/generate`` response body
+            
+        Returns:
+            Generated response text
+        """
+        if "message" in result:
+            return result["message"].get("content", "")
+        return result.get("response", "")
+    
+    def _parse_stream_line(self, line: bytes) -> Tuple[str, Dict[str, Any]]:
+        """Parse one NDJSON chunk of a streamed response.
+        
+        Args:
+            line: Raw chunk line
+            
+        Returns:
+            Tuple of the text fragment in the chunk and the decoded chunk
+            
+        Raises:
+            RuntimeError: If Ollama reported an error mid-stream
+        """
+        chunk = json.loads(line)
+        if "error" in chunk:
+            raise RuntimeError(f"LLM generation failed: {chunk['error']}")
+        return self._parse_response(chunk), chunk
+    
+    @staticmethod
+    def _connection_error() -> ConnectionError:
+        """Build the error raised when Ollama cannot be reached."""
+        return ConnectionError(
+            "Cannot connect to Ollama. Make sure Ollama is running "
+            "(install from https://ollama.ai and run 'ollama serve')"
+        )
+
+
+class LLMEngine(BaseLLMEngine):
+    """Wrapper for Ollama API with prompt management.
+    
+    Requests are spread over config.endpoint_urls by an EndpointPool. When
+    an endpoint refuses the connection or answers with a gateway error, the
+    request moves on to the next one straight away, and endpoints that keep
+    failing are skipped until they recover.
+    """
+    
+    def __init__(
+        self,
+        config: Optional[LLMConfig] = None,
+        response_cache: Optional[ResponseCache] = None,
+        router: Optional[ModelRouter] = None
+    ):
+        """Initialize LLM Engine.
+        
+        Args:
+            config: LLM configuration. Uses defaults if not provided.
+            response_cache: Cache for repeated requests
+            router: Chooses the model for each turn
+        """
+        super().__init__(config, response_cache, router)
+        self.pool = EndpointPool(
+            self.config.endpoint_urls,
+            failure_threshold=self.config.failure_threshold,
+            reset_timeout=self.config.circuit_reset_timeout
+        )
+        self.session = self._create_session()
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+        if len(self.pool) > 1 and self.config.health_check_interval:
+            self.pool.start_health_checks(self._probe, self.config.health_check_interval)
+    
+    def _create_session(self) -> requests.Session:
+        """Create a pooled HTTP session for talking to Ollama.
+        
+        Connections are reused across calls so each turn skips the TCP
+        handshake. With a single endpoint, connection failures and gateway
+        errors are retried with exponential backoff; read errors are not,
+        since the request may already be generating on the server. With
+        several endpoints, failing over to another one replaces retries.
+        
+        Returns:
+            Configured requests session
+        """
+        retries = self.config.max_retries if len(self.pool) == 1 else 0
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            status_forcelist=FAILOVER_STATUSES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            backoff_factor=self.config.retry_backoff,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=len(self.pool),
+            pool_maxsize=self.config.pool_size,
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.config.http_keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+    
+    def close(self) -> None:
+        """Close pooled connections to Ollama and stop health checks."""
+        self.pool.close()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+        self._close_cache()
+    
+    def _send(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        stream: bool = False,
+        timeout: Optional[Tuple[float, float]] = None,
+        tried: Optional[List[Endpoint]] = None
+    ) -> Tuple[requests.Response, Endpoint, float]:
+        """POST to the best endpoint, failing over until one answers.
+        
+        Endpoints that fail are released here; the returned one is still
+        counted as outstanding and must be released by the caller.
+        
+        Args:
+            path: API path, e.g. "/api/chat"
+            payload: JSON request body
+            stream: Whether to stream the response body
+            timeout: Connect and read timeouts. Defaults to config.timeout.
+            tried: Endpoints not to use; every endpoint tried is added to it
+            
+        Returns:
+            Tuple of the response, its endpoint and the seconds it took to arrive
+            
+        Raises:
+            requests.exceptions.ConnectionError: If no endpoint could be reached
+            requests.exceptions.RequestException: If the request failed otherwise
+        """
+        tried = [] if tried is None else tried
+        while True:
+            endpoint = self.pool.acquire(exclude=tried)
+            if endpoint is None:
+                raise requests.exceptions.ConnectionError("No Ollama endpoint could be reached")
+            tried.append(endpoint)
+            start = time.perf_counter()
+            try:
+                response = self.session.post(
+                    f"{endpoint.url}{path}",
+                    json=payload,
+                    stream=stream,
+                    timeout=timeout or self.config.timeout
+                )
+            except requests.exceptions.ConnectionError:
+                self.pool.release(endpoint, failed=True)
+                continue
+            except BaseException as e:
+                self.pool.release(endpoint, failed=isinstance(e, requests.exceptions.Timeout))
+                raise
+            latency = time.perf_counter() - start
+            if response.status_code in FAILOVER_STATUSES and self.pool.has_alternative(tried):
+                response.close()
+                self.pool.release(endpoint, failed=True)
+                continue
+            return response, endpoint, latency
+    
+    def _release(self, endpoint: Endpoint, latency: float, response: requests.Response) -> None:
+        """Hand an endpoint back to the pool once its response is finished."""
+        self.pool.release(endpoint, latency, failed=response.status_code in FAILOVER_STATUSES)
+    
+    def _post(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None,
+        timeout: Optional[Tuple[float, float]] = None
+    ) -> requests.Response:
+        """Send a non-streamed request, hedging it if config.hedge_after is set.
+        
+        Args:
+            path: API path
+            payload: JSON request body
+            metadata: Dictionary to record the endpoint used in
+            timeout: Connect and read timeouts. Defaults to config.timeout.
+            
+        Returns:
+            Response with its body already read
+        """
+        if self.config.hedge_after is not None and len(self.pool) > 1:
+            response, endpoint, latency = self._send_hedged(path, payload, metadata, timeout)
+        else:
+            response, endpoint, latency = self._send(path, payload, timeout=timeout)
+        self._release(endpoint, latency, response)
+        if metadata is not None and len(self.pool) > 1:
+            metadata["endpoint"] = endpoint.url
+        return response
+    
+    def _send_hedged(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]],
+        timeout: Optional[Tuple[float, float]]
+    ) -> Tuple[requests.Response, Endpoint, float]:
+        """Race a second endpoint against a request that is slow to answer.
+        
+        The request is sent as usual; if no answer has arrived after
+        config.hedge_after seconds, the same request goes to another
+        endpoint and whichever answers first is used. The other request is
+        not cancelled on the server, so hedging trades extra load for lower
+        tail latency.
+        """
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=2 * self.config.pool_size,
+                    thread_name_prefix="jarvis-hedge"
+                )
+        tried: List[Endpoint] = []
+        primary = self._hedge_executor.submit(self._send, path, payload, False, timeout, tried)
+        try:
+            return primary.result(timeout=self.config.hedge_after)
+        except FuturesTimeout:
+            pass
+        if not self.pool.has_alternative(tried):
+            return primary.result()
+        
+        backup = self._hedge_executor.submit(self._send, path, payload, False, timeout, tried)
+        if metadata is not None:
+            metadata["hedged"] = True
+        error: Optional[BaseException] = None
+        for future in as_completed([primary, backup]):
+            error = future.exception()
+            if error is None:
+                other = backup if future is primary else primary
+                other.add_done_callback(self._discard_response)
+                return future.result()
+        raise error
+    
+    def _discard_response(self, future: "Future[Tuple[requests.Response, Endpoint, float]]") -> None:
+        """Release the endpoint of a request whose answer is no longer wanted."""
+        if future.exception() is None:
+            response, endpoint, latency = future.result()
+            response.close()
+            self._release(endpoint, latency, response)
+    
+    def _send_cancellable(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        cancel_token: CancellationToken
+    ) -> Tuple[requests.Response, Endpoint, float]:
+        """Send a streamed request, giving up as soon as cancel_token is cancelled.
+        
+        Ollama sends the response headers together with the first token, so
+        waiting for them lasts the whole prompt evaluation. The request is
+        sent on its own thread; if the token is cancelled first, the answer
+        is closed and its endpoint released whenever it arrives.
+        
+        Raises:
+            GenerationCancelled: If cancel_token was cancelled first
+        """
+        sent: "Future[Tuple[requests.Response, Endpoint, float]]" = Future()
+        
+        def send() -> None:
+            try:
+                sent.set_result(self._send(path, payload, stream=True))
+            except BaseException as e:
+                sent.set_exception(e)
+        
+        woken = threading.Event()
+        sent.add_done_callback(lambda _: woken.set())
+        cancel_token.add_callback(woken.set)
+        threading.Thread(target=send, name="jarvis-send", daemon=True).start()
+        try:
+            woken.wait()
+        finally:
+            cancel_token.remove_callback(woken.set)
+        if not sent.done():
+            sent.add_done_callback(self._discard_response)
+            raise GenerationCancelled()
+        return sent.result()
+    
+    @staticmethod
+    def _abort_stream(response: requests.Response) -> None:
+        """Cut off a streamed response that another thread may be reading.
+        
+        Closing the response would wait for the blocked read to finish;
+        shutting the socket down makes that read return at once.
+        """
+        try:
+            sock = socket.socket(fileno=response.raw.fileno())
+        except (OSError, ValueError):
+            # Already closed
+            return
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        finally:
+            # The descriptor still belongs to the response
+            sock.detach()
+    
+    def _probe(self, url: str) -> bool:
+        """Health check: whether the Ollama server at url answers."""
+        try:
+            response = self.session.get(
+                f"{url}/api/tags",
+                timeout=(self.config.connect_timeout, 5)
+            )
+            return response.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+    
+    def __enter__(self) -> "LLMEngine":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
     def generate(
         self,
         prompt: str,
         context: List[Dict[str, str]],
-        personality: Optional[PersonalityConfig] = None
+        personality: Optional[PersonalityConfig] = None,
+        prompt_cache: Optional[PromptCache] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        summary: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_messages: Optional[List[Dict[str, Any]]] = None
     ) -> str:
         """Generate response using Ollama API.
         
@@ -103,6 +934,13 @@ class LLMEngine:
             prompt: User input prompt
             context: Conversation context
             personality: Personality configuration
+            prompt_cache: Conversation state for reusing Ollama's KV cache
+            metadata: Dictionary to record per-turn details in
+            summary: Running summary of turns no longer in the context
+            cancel_token: Token for stopping the generation early
+            tools: Tool schemas the model may call. Calls it makes are
+                listed in metadata["tool_calls"] in Ollama's format.
+            tool_messages: Tool calls and results of this turn so far
             
         Returns:
             Generated response text
@@ -110,46 +948,257 @@ class LLMEngine:
         Raises:
             ConnectionError: If Ollama service is not available
             RuntimeError: If generation fails
+            GenerationCancelled: If cancel_token was cancelled
         """
-        messages = self.format_prompt(prompt, context, personality)
+        if cancel_token is not None:
+            # Only a streamed request can be abandoned mid-generation
+            return "".join(self.generate_stream(
+                prompt, context, personality, prompt_cache, metadata, summary, cancel_token,
+                tools, tool_messages
+            ))
         
-        try:
-            response = requests.post(
-                f"{self.config.endpoint}/api/chat",
-                json={
-                    "model": self.config.model,
-                    "messages": messages,
-                    "stream": False,
-                    "options": {
-                        "temperature": self.config.temperature,
-                        "num_predict": self.config.max_tokens
-                    }
-                },
-                timeout=30
+        with self._timed(metadata, "prepare_time"):
+            path, payload = self._prepare_request(
+                prompt, context, personality, prompt_cache, metadata, stream=False, summary=summary,
+                tools=tools, tool_messages=tool_messages
             )
-            response.raise_for_status()
+        cache_key, cached = self._cache_lookup(path, payload, metadata)
+        if cached is not None:
+            return cached
+        
+        with self._track_request():
+            try:
+                with self._timed(metadata, "http_time"):
+                    response = self._post(path, payload, metadata)
+                    response.raise_for_status()
+                
+                with self._timed(metadata, "parse_time"):
+                    result = response.json()
+                    text = self._parse_response(result)
+                self._record_tool_calls(result, metadata)
+                self._finish_request(result, prompt_cache, metadata)
+                if cache_key is not None:
+                    self.response_cache.put(cache_key, text)
+                return text
+                
+            except requests.exceptions.ConnectionError:
+                raise self._connection_error()
+            except requests.exceptions.Timeout:
+                raise RuntimeError("LLM request timed out. Try again.")
+            except Exception as e:
+                raise RuntimeError(f"LLM generation failed: {str(e)}")
+    
+    def generate_stream(
+        self,
+        prompt: str,
+        context: List[Dict[str, str]],
+        personality: Optional[PersonalityConfig] = None,
+        prompt_cache: Optional[PromptCache] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        summary: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_messages: Optional[List[Dict[str, Any]]] = None
+    ) -> Iterator[str]:
+        """Generate response using Ollama API, yielding tokens as they arrive.
+        
+        Ollama streams newline-delimited JSON chunks; each chunk carries the
+        next piece of the assistant message until a chunk with ``done`` set.
+        
+        Args:
+            prompt: User input prompt
+            context: Conversation context
+            personality: Personality configuration
+            prompt_cache: Conversation state for reusing Ollama's KV cache
+            metadata: Dictionary to record per-turn details in
+            summary: Running summary of turns no longer in the context
+            cancel_token: Token for stopping the generation early. It
+                takes effect at once, also while waiting for the first token.
+            tools: Tool schemas the model may call. Calls it makes are
+                listed in metadata["tool_calls"] in Ollama's format.
+            tool_messages: Tool calls and results of this turn so far
             
-            result = response.json()
-            return result.get("message", {}).get("content", "")
+        Yields:
+            Response text fragments in generation order
             
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError(
-                "Cannot connect to Ollama. Make sure Ollama is running "
-                "(install from https://ollama.ai and run 'ollama serve')"
+        Raises:
+            ConnectionError: If Ollama service is not available
+            RuntimeError: If generation fails
+            GenerationCancelled: If cancel_token was cancelled
+        """
+        with self._timed(metadata, "prepare_time"):
+            path, payload = self._prepare_request(
+                prompt, context, personality, prompt_cache, metadata, stream=True, summary=summary,
+                tools=tools, tool_messages=tool_messages
             )
+        cache_key, cached = self._cache_lookup(path, payload, metadata)
+        if cached is not None:
+            yield cached
+            return
+        
+        if cancel_token is not None and cancel_token.cancelled:
+            raise GenerationCancelled()
+        
+        with self._track_request():
+            try:
+                with self._timed(metadata, "http_time"):
+                    if cancel_token is None:
+                        response, endpoint, latency = self._send(path, payload, stream=True)
+                    else:
+                        response, endpoint, latency = self._send_cancellable(path, payload, cancel_token)
+                if metadata is not None and len(self.pool) > 1:
+                    metadata["endpoint"] = endpoint.url
+            except GenerationCancelled:
+                raise
+            except requests.exceptions.ConnectionError:
+                raise self._connection_error()
+            except requests.exceptions.Timeout:
+                raise RuntimeError("LLM request timed out. Try again.")
+            except Exception as e:
+                raise RuntimeError(f"LLM generation failed: {str(e)}")
+            
+            tokens = []
+            failed = False
+            abort = lambda: self._abort_stream(response)
+            if cancel_token is not None:
+                cancel_token.add_callback(abort)
+            try:
+                response.raise_for_status()
+                try:
+                    for line in response.iter_lines():
+                        if cancel_token is not None and cancel_token.cancelled:
+                            raise GenerationCancelled("".join(tokens))
+                        if not line:
+                            continue
+                        with self._timed(metadata, "parse_time"):
+                            token, chunk = self._parse_stream_line(line)
+                        self._record_tool_calls(chunk, metadata)
+                        if token:
+                            tokens.append(token)
+                            yield token
+                        if chunk.get("done"):
+                            self._finish_request(chunk, prompt_cache, metadata)
+                            if cache_key is not None:
+                                self.response_cache.put(cache_key, "".join(tokens))
+                            break
+                except (RuntimeError, GenerationCancelled):
+                    raise
+                except Exception:
+                    # A read cut off by cancel() ends in an error or an early EOF
+                    if cancel_token is None or not cancel_token.cancelled:
+                        raise
+                if cancel_token is not None and cancel_token.cancelled:
+                    raise GenerationCancelled("".join(tokens))
+            except (RuntimeError, GenerationCancelled):
+                raise
+            except requests.exceptions.ConnectionError:
+                failed = True
+                raise self._connection_error()
+            except requests.exceptions.Timeout:
+                failed = True
+                raise RuntimeError("LLM request timed out. Try again.")
+            except Exception as e:
+                raise RuntimeError(f"LLM generation failed: {str(e)}")
+            finally:
+                if cancel_token is not None:
+                    cancel_token.remove_callback(abort)
+                response.close()
+                if failed:
+                    self.pool.release(endpoint, failed=True)
+                else:
+                    self._release(endpoint, latency, response)
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with Ollama's embeddings endpoint.
+        
+        Args:
+            texts: Texts to embed in one request
+            
+        Returns:
+            One embedding vector per text
+            
+        Raises:
+            ConnectionError: If Ollama service is not available
+            RuntimeError: If embedding fails
+        """
+        with self._track_request():
+            try:
+                response = self._post(
+                    "/api/embed",
+                    {"model": self.config.embedding_model, "input": texts}
+                )
+                response.raise_for_status()
+                return response.json()["embeddings"]
+            except requests.exceptions.ConnectionError:
+                raise self._connection_error()
+            except requests.exceptions.Timeout:
+                raise RuntimeError("Embedding request timed out. Try again.")
+            except Exception as e:
+                raise RuntimeError(f"Embedding failed: {str(e)}")
+    
+    def load_model(self, model: Optional[str] = None, keep_alive: Optional[str] = None) -> float:
+        """Load a model into Ollama's memory without generating anything.
+        
+        Ollama loads the weights for a generate request with no prompt and
+        keeps them resident for keep_alive afterwards; keep_alive "0"
+        unloads the model instead. With several endpoints, every one of them
+        is asked, so whichever serves the next turn is warm.
+        
+        Args:
+            model: Model to load. Defaults to config.model.
+            keep_alive: How long to keep the model loaded. Defaults to
+                config.keep_alive, or the server default if that is None.
+                
+        Returns:
+            Seconds Ollama spent loading the weights (near zero if already
+            loaded), the longest of all endpoints that succeeded
+            
+        Raises:
+            ConnectionError: If no endpoint is available
+            RuntimeError: If loading fails on every endpoint
+        """
+        payload: Dict[str, Any] = {"model": model or self.config.model, "stream": False}
+        keep_alive = keep_alive if keep_alive is not None else self.config.keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        
+        load_times: List[float] = []
+        error: Optional[Exception] = None
+        with self._track_request():
+            for endpoint in self.pool.endpoints:
+                try:
+                    load_times.append(self._load_on(endpoint.url, payload))
+                except ConnectionError as e:
+                    self.pool.report_health(endpoint, False)
+                    error = e
+                except RuntimeError as e:
+                    error = e
+        if not load_times:
+            raise error
+        return max(load_times)
+    
+    def _load_on(self, url: str, payload: Dict[str, Any]) -> float:
+        """Send a load request to one endpoint and return its load time."""
+        timeout = (self.config.connect_timeout, max(self.config.read_timeout, LOAD_READ_TIMEOUT))
+        start = time.perf_counter()
+        try:
+            response = self.session.post(f"{url}/api/generate", json=payload, timeout=timeout)
+            response.raise_for_status()
+            result = response.json()
+        except requests.exceptions.ConnectionError:
+            raise self._connection_error()
         except requests.exceptions.Timeout:
-            raise RuntimeError("LLM request timed out. Try again.")
+            raise RuntimeError("Loading the model timed out.")
         except Exception as e:
-            raise RuntimeError(f"LLM generation failed: {str(e)}")
+            raise RuntimeError(f"Loading the model failed: {str(e)}")
+        if "load_duration" in result:
+            return result["load_duration"] / 1e9
+        return time.perf_counter() - start
     
     def check_availability(self) -> bool:
         """Check if Ollama service is available.
         
         Returns:
-            True if service is available, False otherwise
+            True if any endpoint is available, False otherwise
         """
-        try:
-            response = requests.get(f"{self.config.endpoint}/api/tags", timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        return any(self._probe(endpoint.url) for endpoint in self.pool.endpoints)
@@ -1,19 +1,484 @@
-"""Main entry point for Jarvis AI Assistant."""
+"""Main entry point for Jarvis AI Assistant.
 
+Modules are imported inside each mode so one-shot and pipeline runs start
+without loading what they do not use.
+"""
+
+import argparse
+import json
+import os
+import signal
 import sys
-from jarvis.agent_orchestrator import AgentOrchestrator
-from jarvis.llm_engine import LLMConfig
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Union
+
+if TYPE_CHECKING:
+    from jarvis.llm_engine import CancellationToken, LLMConfig
+    from jarvis.models import BatchResult
+    from jarvis.warmup import ModelWarmer
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(prog="jarvis", description="Local AI assistant")
+    parser.add_argument(
+        "--resume",
+        metavar="SESSION_ID",
+        default=None,
+        help="Continue a logged conversation from ~/.jarvis/logs"
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Recall relevant turns from past sessions (needs an Ollama embedding model)"
+    )
+    parser.add_argument(
+        "-p", "--prompt",
+        default=None,
+        help="Answer a single prompt, print the reply and exit ('-' reads it from stdin)"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="With -p, print the reply as a JSON record like the pipe mode"
+    )
+    parser.add_argument("--model", default=None, help="Ollama model to use (default: mistral:7b)")
+    parser.add_argument(
+        "--endpoint",
+        default=None,
+        help="Ollama URL, or a comma-separated list to balance between servers "
+        "(default: http://localhost:11434)"
+    )
+    parser.add_argument(
+        "--keep-alive",
+        default="30m",
+        help="How long Ollama keeps the model loaded between turns, e.g. 30m, 2h or -1 (forever)"
+    )
+    parser.add_argument(
+        "--no-warmup",
+        action="store_true",
+        help="Do not preload the model at startup or ping it to keep it loaded"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    
+    pipe_parser = subparsers.add_parser(
+        "pipe",
+        help="Answer prompts read line by line from stdin, writing JSONL to stdout"
+    )
+    pipe_parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=4,
+        help="Prompts generating at once"
+    )
+    
+    summarize_parser = subparsers.add_parser(
+        "summarize",
+        help="Summarize a PDF or text file of any length"
+    )
+    summarize_parser.add_argument("file", type=Path, help="Document to summarize")
+    summarize_parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=4,
+        help="Chunks summarized at once"
+    )
+    summarize_parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=1000,
+        help="Token budget of each chunk"
+    )
+    
+    serve_parser = subparsers.add_parser("serve", help="Run a multi-session HTTP server")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    serve_parser.add_argument(
+        "--memory-cap-mb",
+        type=float,
+        default=256,
+        help="Memory for in-memory sessions before idle ones are spilled to disk"
+    )
+    serve_parser.add_argument(
+        "--spill-dir",
+        type=Path,
+        default=None,
+        help="Directory for spilled sessions (default: ~/.jarvis/sessions)"
+    )
+    serve_parser.add_argument("--max-turns", type=int, default=10, help="Turns kept per session")
+    serve_parser.add_argument(
+        "--max-context-tokens",
+        type=int,
+        default=None,
+        help="Token budget for each session's LLM context"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run Jarvis from the command line.
+    
+    Returns:
+        Process exit status
+    """
+    args = build_parser().parse_args(argv)
+    
+    if args.command == "serve":
+        run_server(args)
+    elif args.command == "pipe":
+        return run_pipe(build_config(args, pool_size=args.concurrency), args.concurrency)
+    elif args.command == "summarize":
+        return run_summarize(
+            args.file,
+            build_config(args, pool_size=args.concurrency),
+            concurrency=args.concurrency,
+            chunk_tokens=args.chunk_tokens
+        )
+    elif args.prompt is not None:
+        prompt = sys.stdin.read() if args.prompt == "-" else args.prompt
+        return run_once(prompt, build_config(args), as_json=args.json)
+    else:
+        run_interactive(
+            resume=args.resume,
+            memory=args.memory,
+            keep_alive=args.keep_alive,
+            warmup=not args.no_warmup,
+            model=args.model,
+            endpoint=args.endpoint
+        )
+    return 0
+
+
+def build_config(args: argparse.Namespace, pool_size: int = 1) -> "LLMConfig":
+    """Build the engine configuration from command-line options.
+    
+    Args:
+        args: Parsed arguments
+        pool_size: Connections needed at once
+        
+    Returns:
+        LLM configuration
+    """
+    from jarvis.llm_engine import LLMConfig
+    
+    config = LLMConfig(keep_alive=args.keep_alive, pool_size=max(10, pool_size))
+    if args.model:
+        config.model = args.model
+    if args.endpoint:
+        set_endpoints(config, args.endpoint)
+    return config
+
+
+def set_endpoints(config: "LLMConfig", endpoint: str) -> None:
+    """Point the configuration at one Ollama URL or a comma-separated list."""
+    urls = [url.strip() for url in endpoint.split(",") if url.strip()]
+    config.endpoint = urls[0]
+    config.endpoints = urls if len(urls) > 1 else None
+
+
+def batch_record(result: "BatchResult", request: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the JSON record written for one answered prompt.
+    
+    Args:
+        result: Result of the prompt or session
+        request: Parsed input line (see read_pipe_requests)
+        
+    Returns:
+        JSON-serializable record
+    """
+    record: Dict[str, Any] = {"index": result.index}
+    if "id" in request:
+        record["id"] = request["id"]
+    if isinstance(request["prompt"], list):
+        record["responses"] = result.responses
+    else:
+        record["response"] = result.response
+    record["error"] = result.error
+    record["total_time"] = result.total_time
+    record["metadata"] = result.metadata[-1] if result.metadata else {}
+    return record
+
+
+def read_pipe_requests(lines: Iterator[str]) -> Iterator[Dict[str, Any]]:
+    """Parse prompts from input lines, skipping blank ones.
+    
+    A line is either plain prompt text or a JSON object with a "prompt"
+    (a string, or a list of strings run as one conversation) and an
+    optional "id" echoed in the output.
+    
+    Args:
+        lines: Input lines
+        
+    Yields:
+        Requests with a "prompt" and optionally an "id"
+    """
+    for line in lines:
+        text = line.rstrip("\r\n")
+        if not text.strip():
+            continue
+        if text.lstrip().startswith("{"):
+            try:
+                request = json.loads(text)
+            except ValueError:
+                request = None
+            if isinstance(request, dict) and isinstance(request.get("prompt"), (str, list)):
+                yield request
+                continue
+        yield {"prompt": text}
+
+
+def run_once(prompt: str, config: "LLMConfig", as_json: bool = False) -> int:
+    """Answer one prompt without the interactive shell.
+    
+    The reply is streamed to stdout as plain text; errors go to stderr.
+    No banner is printed and no availability probe is made.
+    
+    Args:
+        prompt: User input
+        config: LLM configuration
+        as_json: Print a JSON record with timings instead of plain text
+        
+    Returns:
+        Process exit status: 0 on success, 1 if generation failed
+    """
+    from jarvis.llm_engine import LLMEngine
+    from jarvis.preference_manager import PreferenceManager
+    
+    personality = PreferenceManager().get_personality_config()
+    engine = LLMEngine(config)
+    metadata: Dict[str, Any] = {}
+    chunks: List[str] = []
+    error = None
+    try:
+        for token in engine.generate_stream(prompt, [], personality=personality, metadata=metadata):
+            chunks.append(token)
+            if not as_json:
+                sys.stdout.write(token)
+                sys.stdout.flush()
+    except (ConnectionError, RuntimeError) as e:
+        error = str(e)
+    finally:
+        engine.close()
+    
+    if as_json:
+        record = {"response": "".join(chunks), "error": error, "metadata": metadata}
+        sys.stdout.write(json.dumps(record, default=str) + "\n")
+    elif chunks:
+        sys.stdout.write("\n")
+    if error is not None:
+        print(f"jarvis: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_pipe(config: "LLMConfig", concurrency: int = 4) -> int:
+    """Answer prompts from stdin, writing one JSON record per line to stdout.
+    
+    Prompts are independent and run concurrently through
+    AgentOrchestrator.iter_batch; records are written in input order as
+    soon as they are ready.
+    
+    Args:
+        config: LLM configuration
+        concurrency: Prompts generating at once
+        
+    Returns:
+        Process exit status: 0 if every prompt succeeded, 1 otherwise
+    """
+    from jarvis.agent_orchestrator import AgentOrchestrator
+    
+    orchestrator = AgentOrchestrator(llm_config=config)
+    # Requests still waiting for their record, by input index
+    requests: Dict[int, Dict[str, Any]] = {}
+    
+    def prompts() -> Iterator[Union[str, List[str]]]:
+        for index, request in enumerate(read_pipe_requests(sys.stdin)):
+            requests[index] = request
+            yield request["prompt"]
+    
+    failed = 0
+    try:
+        for result in orchestrator.iter_batch(prompts(), max_concurrency=concurrency):
+            record = batch_record(result, requests.pop(result.index))
+            sys.stdout.write(json.dumps(record, default=str) + "\n")
+            sys.stdout.flush()
+            if not result.ok:
+                failed += 1
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into head); stop quietly
+        sys.stdout = open(os.devnull, "w")
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        orchestrator.close()
+    return 1 if failed else 0
+
+
+def run_summarize(
+    path: Path,
+    config: "LLMConfig",
+    concurrency: int = 4,
+    chunk_tokens: int = 1000
+) -> int:
+    """Summarize a document, printing the summary to stdout.
+    
+    Chunk summaries are cached in ~/.jarvis/chunk_cache.db, so running this
+    again on an edited document only summarizes what changed. Progress
+    counts go to stderr.
+    
+    Args:
+        path: PDF or text file
+        config: LLM configuration
+        concurrency: Chunks summarized at once
+        chunk_tokens: Token budget of each chunk
+        
+    Returns:
+        Process exit status: 0 on success, 1 if summarization failed
+    """
+    from jarvis.documents import DocumentSummarizer
+    from jarvis.llm_engine import LLMEngine
+    
+    engine = LLMEngine(config)
+    summarizer = DocumentSummarizer(engine, chunk_tokens=chunk_tokens, max_concurrency=concurrency)
+    try:
+        result = summarizer.summarize(path)
+    except (OSError, ValueError, ImportError, ConnectionError, RuntimeError) as e:
+        print(f"jarvis: {e}", file=sys.stderr)
+        return 1
+    finally:
+        summarizer.close()
+        engine.close()
+    
+    print(result.summary)
+    print(
+        f"({result.pages} pages, {result.chunks} chunks, {result.cached_chunks} cached, "
+        f"{result.total_time:.1f}s)",
+        file=sys.stderr
+    )
+    return 0
+
 
+def describe_start(metadata: Dict[str, Any], warm: bool, warmer: Optional["ModelWarmer"]) -> str:
+    """Describe whether the first turn found the model loaded.
+    
+    Args:
+        metadata: Assistant metadata of the first turn
+        warm: Whether the warm-up had finished when the turn was sent
+        warmer: Background warmer, if warm-up is enabled
+        
+    Returns:
+        Short note for the turn's stats line
+    """
+    if warm:
+        return f"warm start, model preloaded in {warmer.load_time:.1f}s"
+    load = metadata.get("load_duration")
+    if load:
+        return f"cold start, {load:.1f}s loading the model"
+    return "cold start"
+
+
+@contextmanager
+def cancel_on_interrupt(cancel_token: "CancellationToken") -> Iterator[None]:
+    """Make Ctrl-C cancel the current turn instead of exiting.
+    
+    A second Ctrl-C during the same turn raises KeyboardInterrupt as usual.
+    
+    Args:
+        cancel_token: Token of the turn in progress
+    """
+    def handle(signum: int, frame: Any) -> None:
+        if cancel_token.cancelled:
+            raise KeyboardInterrupt
+        cancel_token.cancel()
+    
+    previous = signal.signal(signal.SIGINT, handle)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+def run_server(args: argparse.Namespace) -> None:
+    """Run the multi-session HTTP server."""
+    from jarvis.llm_engine import LLMEngine
+    from jarvis.server import serve
+    from jarvis.session_manager import SessionManager
+    from jarvis.warmup import ModelWarmer
+    
+    # Passed in, so the manager leaves it open; closed here once serving stops
+    engine = LLMEngine(build_config(args))
+    sessions = SessionManager(
+        llm_engine=engine,
+        memory_cap_bytes=int(args.memory_cap_mb * 1024 * 1024),
+        spill_dir=args.spill_dir,
+        max_turns=args.max_turns,
+        max_context_tokens=args.max_context_tokens
+    )
+    warmer = None if args.no_warmup else ModelWarmer(engine)
+    try:
+        serve(host=args.host, port=args.port, sessions=sessions)
+    finally:
+        if warmer is not None:
+            warmer.close()
+        engine.close()
 
-def main():
-    """Run Jarvis in interactive mode."""
+
+def run_interactive(
+    resume: Optional[str] = None,
+    memory: bool = False,
+    keep_alive: Optional[str] = "30m",
+    warmup: bool = True,
+    model: Optional[str] = None,
+    endpoint: Optional[str] = None
+) -> None:
+    """Run Jarvis in interactive mode.
+    
+    The model is preloaded in the background so the prompt is usable right
+    away and the first turn does not pay for loading the weights.
+    
+    Args:
+        resume: Session id of a logged conversation to continue
+        memory: Whether to index turns in ~/.jarvis/memory and recall them
+        keep_alive: How long Ollama keeps the model loaded between requests
+        warmup: Whether to preload the model and ping it while idle
+        model: Ollama model to use instead of the default
+        endpoint: Ollama URL, or comma-separated URLs, to use instead of the default
+    """
+    from jarvis.agent_orchestrator import AgentOrchestrator
+    from jarvis.conversation_buffer import ConversationBuffer
+    from jarvis.llm_engine import CancellationToken, LLMConfig
+    from jarvis.warmup import ModelWarmer
+    
     print("=" * 60)
     print("JARVIS - Local AI Assistant")
     print("=" * 60)
     print("\nInitializing...")
     
+    # Every turn is logged so the session can be exported in full or resumed
+    log_dir = Path.home() / ".jarvis" / "logs"
+    if resume:
+        try:
+            conversation_buffer = ConversationBuffer.resume(resume, log_dir)
+        except FileNotFoundError as e:
+            print(f"\n{e}")
+            sys.exit(1)
+    else:
+        conversation_buffer = ConversationBuffer(log_dir=log_dir)
+    
     # Initialize orchestrator
-    orchestrator = AgentOrchestrator()
+    llm_config = LLMConfig(keep_alive=keep_alive)
+    if model:
+        llm_config.model = model
+    if endpoint:
+        set_endpoints(llm_config, endpoint)
+    orchestrator = AgentOrchestrator(
+        llm_config=llm_config,
+        conversation_buffer=conversation_buffer,
+        summarize_history=True
+    )
+    # Start loading the model right away; it finishes while the user types
+    warmer = ModelWarmer(orchestrator.llm_engine) if warmup else None
     
     # Check if Ollama is available
     if not orchestrator.llm_engine.check_availability():
@@ -25,15 +490,31 @@ def main():
     else:
         print("✓ Ollama service connected")
         print(f"✓ Model: {orchestrator.llm_engine.config.model}")
+        if warmer is not None:
+            print(f"✓ Loading the model in the background (keep-alive {keep_alive})")
         print(f"✓ Personality: {orchestrator.personality.tone}, {orchestrator.personality.verbosity}")
+        if memory:
+            from jarvis.memory_index import MemoryIndex, OllamaEmbedder
+            
+            try:
+                orchestrator.memory_index = MemoryIndex(
+                    embedder=OllamaEmbedder(orchestrator.llm_engine)
+                )
+                print(f"✓ Memory: {len(orchestrator.memory_index)} past turns indexed")
+            except (ConnectionError, RuntimeError, ValueError) as e:
+                print(f"⚠️  Memory disabled: {e}")
     
     print("\nCommands:")
-    print("  /export  - Export conversation to JSON")
+    print("  /export  - Export conversation to JSON (/export FILE writes the full session)")
+    print("  /stats   - Show timings of recent turns (/stats prometheus for a dump)")
     print("  /clear   - Clear conversation history")
     print("  /quit    - Exit Jarvis")
+    print("  Ctrl-C while Jarvis is replying stops the reply and keeps what it said so far")
+    print(f"\nSession: {conversation_buffer.session_id} (resume with --resume)")
     print("\nReady! Start chatting...\n")
     
     # Main conversation loop
+    first_turn = True
     while True:
         try:
             # Get user input
@@ -52,6 +533,21 @@ def main():
                 print("\n" + json_output + "\n")
                 continue
             
+            elif user_input.lower().startswith("/export "):
+                path = Path(user_input[len("/export "):].strip()).expanduser()
+                with open(path, "w", encoding="utf-8") as f:
+                    orchestrator.conversation_buffer.export_to_file(f)
+                print(f"\nConversation exported to {path}\n")
+                continue
+            
+            elif user_input.lower() == "/stats":
+                print("\n" + orchestrator.metrics.format_stats() + "\n")
+                continue
+            
+            elif user_input.lower() == "/stats prometheus":
+                print("\n" + orchestrator.metrics.to_prometheus())
+                continue
+            
             elif user_input.lower() == "/clear":
                 confirm = input("Clear conversation history? (yes/no): ").strip().lower()
                 if confirm == "yes":
@@ -59,16 +555,45 @@ def main():
                     print(f"\n{message}\n")
                 continue
             
-            # Process normal input
-            response = orchestrator.process_input(user_input)
-            print(f"\nJarvis: {response}\n")
+            # Process normal input, printing tokens as they arrive
+            warm = warmer is not None and warmer.wait(0)
+            cancel_token = CancellationToken()
+            print("\nJarvis: ", end="", flush=True)
+            with cancel_on_interrupt(cancel_token):
+                for token in orchestrator.process_input_stream(user_input, cancel_token=cancel_token):
+                    print(token, end="", flush=True)
+            print("\n")
+            
+            metadata = orchestrator.conversation_buffer.turns[-1].assistant_message.metadata
+            if metadata.get("truncated"):
+                print("(reply cancelled; the partial text was kept)\n")
+            ttft = metadata.get("time_to_first_token")
+            if ttft is not None:
+                stats = f"first token in {ttft:.2f}s"
+                if metadata.get("prompt_eval_saved"):
+                    stats += f", {metadata['prompt_eval_saved']} cached prompt tokens reused"
+                if metadata.get("route_reason"):
+                    stats += f", {metadata['model']}: {metadata['route_reason']}"
+                if first_turn:
+                    stats += f", {describe_start(metadata, warm, warmer)}"
+                print(f"({stats})\n")
+            first_turn = False
             
         except KeyboardInterrupt:
             print("\n\nGoodbye!")
             break
         except Exception as e:
             print(f"\nError: {str(e)}\n")
+    
+    if warmer is not None:
+        warmer.close()
+    orchestrator.close()
+    if orchestrator.memory_index is not None:
+        try:
+            orchestrator.memory_index.close()
+        except Exception as e:
+            print(f"⚠️  Recent turns were not saved to memory: {e}")
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""Long-term memory: a vector index over past conversation turns."""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from jarvis.llm_engine import LLMEngine
+from jarvis.models import ConversationTurn
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """Offline stand-in for an embedding model.
+    
+    Words are hashed into a fixed number of buckets with a random sign, so
+    texts sharing words get similar vectors. Useful when Ollama has no
+    embedding model pulled, and in tests.
+    """
+    
+    def __init__(self, dim: int = 256):
+        """Initialize embedder.
+        
+        Args:
+            dim: Length of the produced vectors
+        """
+        self.dim = dim
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            Array of shape (len(texts), dim)
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD_RE.findall(text.lower()):
+                digest = zlib.crc32(word.encode("utf-8"))
+                vectors[row, digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        return vectors
+
+
+class OllamaEmbedder:
+    """Embeds texts with Ollama's ``/api/embed`` endpoint."""
+    
+    def __init__(self, llm_engine: LLMEngine, dim: Optional[int] = None):
+        """Initialize embedder.
+        
+        Args:
+            llm_engine: Engine whose connection pool and embedding model are used
+            dim: Vector length of the embedding model. Probed with one request
+                when not given.
+        """
+        self.llm_engine = llm_engine
+        self._dim = dim
+    
+    @property
+    def dim(self) -> int:
+        """Vector length of the embedding model."""
+        if self._dim is None:
+            self._dim = len(self.llm_engine.embed(["dimension probe"])[0])
+        return self._dim
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts in a single request.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            Array of shape (len(texts), dim)
+        """
+        return np.asarray(self.llm_engine.embed(texts), dtype=np.float32)
+
+
+class MemoryIndex:
+    """Append-only vector index over past turns, stored on disk.
+    
+    Embeddings are unit-normalized float32 rows of a memory-mapped matrix,
+    so a query is one matrix-vector product over pages the OS keeps cached,
+    and the index never has to be loaded into the Python heap. A query
+    still reads every stored vector, 4 * dim bytes per turn, so it is
+    bound by memory bandwidth: about 25 ms at 100k turns of 768 dimensions
+    (nomic-embed-text), growing linearly with both. Turn text is kept in a
+    JSONL file and only the top hits are read back.
+    
+    New turns are queued and embedded in batches of batch_size on a
+    background thread, so adding a turn never waits for the embedding
+    model. If embedding fails, the batch stays queued and is retried with
+    the next one; at most max_pending turns are kept, newest first, and the
+    failure is recorded in error.
+    
+    Files in the index directory:
+        vectors.f32: Embedding matrix, grown by doubling
+        offsets.i64: Byte offset of each row's record in entries.jsonl
+        entries.jsonl: One record per turn
+        meta.json: Row count, dimension and committed size of entries.jsonl
+    """
+    
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        embedder: Optional[Any] = None,
+        batch_size: int = 16,
+        min_score: float = 0.25,
+        initial_capacity: int = 1024,
+        max_pending: int = 256
+    ):
+        """Open (or create) a memory index.
+        
+        Args:
+            directory: Index directory. Defaults to ~/.jarvis/memory/
+            embedder: Object with a dim attribute and an embed(texts) method
+                returning an (n, dim) array. Defaults to HashingEmbedder.
+            batch_size: Queued turns that trigger an embedding batch
+            min_score: Lowest cosine similarity returned by search
+            initial_capacity: Rows allocated when the index is created
+            max_pending: Queued turns kept while embedding keeps failing
+            
+        Raises:
+            ValueError: If the embedder's dimension differs from the stored index
+        """
+        if directory is None:
+            directory = Path.home() / ".jarvis" / "memory"
+        if embedder is None:
+            embedder = HashingEmbedder()
+        
+        self.directory = directory
+        self.embedder = embedder
+        self.batch_size = batch_size
+        self.min_score = min_score
+        self.max_pending = max_pending
+        self.error: Optional[str] = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        # _lock guards the files and queue; _flush_lock keeps batches in
+        # order while the embedder runs without holding _lock
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarvis-memory")
+        self._flushing: Optional[Future] = None
+        self._meta_path = directory / "meta.json"
+        self._vectors_path = directory / "vectors.f32"
+        self._offsets_path = directory / "offsets.i64"
+        
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text())
+        else:
+            meta = {"count": 0, "dim": embedder.dim, "entries_size": 0}
+        if meta["dim"] != embedder.dim:
+            raise ValueError(
+                f"Memory index has dimension {meta['dim']}, embedder produces {embedder.dim}"
+            )
+        self.dim = meta["dim"]
+        self._count = meta["count"]
+        
+        # Drop records written after the last committed flush
+        self._entries = open(directory / "entries.jsonl", "ab+")
+        self._entries.truncate(meta["entries_size"])
+        
+        self._capacity = 0
+        self._map(max(initial_capacity, self._count))
+    
+    def _map(self, capacity: int) -> None:
+        """(Re)map the vector and offset files with room for capacity rows."""
+        for path, itemsize in ((self._vectors_path, 4 * self.dim), (self._offsets_path, 8)):
+            with open(path, "ab") as f:
+                if f.tell() < capacity * itemsize:
+                    f.truncate(capacity * itemsize)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+        )
+        self._offsets = np.memmap(self._offsets_path, dtype=np.int64, mode="r+", shape=(capacity,))
+        self._capacity = capacity
+    
+    def __len__(self) -> int:
+        """Return the number of embedded turns."""
+        return self._count
+    
+    def add(self, turn: ConversationTurn, session_id: str) -> None:
+        """Queue a turn for embedding.
+        
+        Once batch_size turns are queued, they are embedded in the
+        background.
+        
+        Args:
+            turn: Completed conversation turn
+            session_id: Session the turn belongs to
+        """
+        with self._lock:
+            self._pending.append({
+                "session_id": session_id,
+                "timestamp": turn.user_message.timestamp.isoformat(),
+                "user": turn.user_message.content,
+                "assistant": turn.assistant_message.content
+            })
+            if len(self._pending) >= self.batch_size and (
+                self._flushing is None or self._flushing.done()
+            ):
+                self._flushing = self._worker.submit(self._flush_batches)
+    
+    def _flush_batches(self) -> None:
+        """Embed full batches until fewer than batch_size turns are queued."""
+        try:
+            while self._embed_pending(self.batch_size):
+                pass
+        except Exception as e:
+            self.error = str(e)
+    
+    def flush(self) -> None:
+        """Embed all queued turns now and commit them to disk.
+        
+        Raises:
+            Exception: Whatever the embedder raised; the turns stay queued
+        """
+        flushing = self._flushing
+        if flushing is not None:
+            flushing.result()
+        self._embed_pending(None)
+    
+    def _embed_pending(self, batch_size: Optional[int]) -> bool:
+        """Embed and commit one batch of queued turns.
+        
+        Args:
+            batch_size: Turns to take, or None for all of them
+            
+        Returns:
+            False if too few turns were queued to make a batch
+            
+        Raises:
+            Exception: Whatever the embedder raised; the turns stay queued
+        """
+        with self._flush_lock:
+            with self._lock:
+                size = len(self._pending) if batch_size is None else batch_size
+                if not self._pending or len(self._pending) < size:
+                    return False
+                records = self._pending[:size]
+                del self._pending[:size]
+            try:
+                vectors = self.embedder.embed([self._embedding_text(r) for r in records])
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = records
+                    del self._pending[:-self.max_pending]
+                raise
+            self.error = None
+            vectors = np.asarray(vectors, dtype=np.float32).reshape(len(records), self.dim)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.where(norms == 0, 1.0, norms)
+            
+            with self._lock:
+                self._commit(records, vectors)
+            return True
+    
+    def _commit(self, records: List[Dict[str, Any]], vectors: np.ndarray) -> None:
+        """Append embedded turns to the index files."""
+        start = self._count
+        end = start + len(records)
+        if end > self._capacity:
+            self._vectors.flush()
+            self._offsets.flush()
+            self._map(max(end, 2 * self._capacity))
+        
+        self._entries.seek(0, os.SEEK_END)
+        for row, record in enumerate(records, start):
+            self._offsets[row] = self._entries.tell()
+            self._entries.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._entries.flush()
+        self._vectors[start:end] = vectors
+        self._vectors.flush()
+        self._offsets.flush()
+        
+        self._count = end
+        self._write_meta()
+    
+    def _write_meta(self) -> None:
+        """Atomically record the committed row count."""
+        meta = {"count": self._count, "dim": self.dim, "entries_size": self._entries.tell()}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".meta.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path)
+    
+    @staticmethod
+    def _embedding_text(record: Dict[str, Any]) -> str:
+        return f"User: {record['user']}\nAssistant: {record['assistant']}"
+    
+    def search(
+        self,
+        query: str,
+        k: int = 3,
+        min_score: Optional[float] = None
+    ) -> List[Tuple[float, Dict[str, Any]]]:
+        """Find the stored turns most similar to a query.
+        
+        Turns still queued for embedding are not searched.
+        
+        Args:
+            query: Text to match, usually the current user input
+            k: Maximum number of results
+            min_score: Lowest cosine similarity to return. Defaults to self.min_score.
+            
+        Returns:
+            (score, record) pairs, best first. Records hold session_id,
+            timestamp, user and assistant.
+        """
+        if min_score is None:
+            min_score = self.min_score
+        
+        query_vector = np.asarray(self.embedder.embed([query]), dtype=np.float32)[0]
+        norm = np.linalg.norm(query_vector)
+        if norm == 0:
+            return []
+        query_vector /= norm
+        
+        with self._lock:
+            count = self._count
+            if count == 0 or k <= 0:
+                return []
+            scores = self._vectors[:count] @ query_vector
+            k = min(k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            
+            results = []
+            for row in top:
+                score = float(scores[row])
+                if score < min_score:
+                    break
+                self._entries.seek(int(self._offsets[row]))
+                results.append((score, json.loads(self._entries.readline())))
+            return results
+    
+    def close(self) -> None:
+        """Embed queued turns and close the index files.
+        
+        Raises:
+            Exception: Whatever the embedder raised; the queued turns are lost
+        """
+        try:
+            self.flush()
+        finally:
+            self._worker.shutdown(wait=True)
+            with self._lock:
+                self._entries.close()
+                del self._vectors
+                del self._offsets
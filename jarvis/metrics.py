@@ -0,0 +1,229 @@
+"""Per-turn performance metrics with rolling histograms and Prometheus export."""
+
+import threading
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from jarvis.models import ToolCall
+
+# Bucket upper bounds in seconds, from sub-millisecond overheads up to slow turns
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200)
+
+# Turn metadata key -> (metric name, help text, buckets)
+TURN_METRICS: Dict[str, Tuple[str, str, Sequence[float]]] = {
+    "total_time": ("jarvis_turn_seconds", "Wall-clock time of a whole turn", SECONDS_BUCKETS),
+    "time_to_first_token": (
+        "jarvis_time_to_first_token_seconds", "Time until the first streamed token", SECONDS_BUCKETS
+    ),
+    "prepare_time": ("jarvis_prompt_format_seconds", "Time spent building the prompt", SECONDS_BUCKETS),
+    "http_time": ("jarvis_http_seconds", "Time spent in HTTP calls to Ollama", SECONDS_BUCKETS),
+    "parse_time": ("jarvis_parse_seconds", "Time spent decoding Ollama responses", SECONDS_BUCKETS),
+    "tool_time": ("jarvis_tool_seconds", "Time spent running tool calls per turn", SECONDS_BUCKETS),
+    "load_duration": ("jarvis_ollama_load_seconds", "Ollama model load time", SECONDS_BUCKETS),
+    "prompt_eval_duration": (
+        "jarvis_ollama_prompt_eval_seconds", "Ollama prompt evaluation time", SECONDS_BUCKETS
+    ),
+    "eval_duration": ("jarvis_ollama_eval_seconds", "Ollama generation time", SECONDS_BUCKETS),
+    "prompt_eval_count": ("jarvis_prompt_tokens", "Prompt tokens evaluated per turn", TOKEN_BUCKETS),
+    "eval_count": ("jarvis_generated_tokens", "Tokens generated per turn", TOKEN_BUCKETS),
+    "tokens_per_second": (
+        "jarvis_generation_tokens_per_second", "Generation speed reported by Ollama", RATE_BUCKETS
+    )
+}
+
+
+class Histogram:
+    """Prometheus-style histogram that also keeps a rolling window of samples.
+    
+    Bucket counts, sum and count are cumulative since start, as Prometheus
+    expects; percentiles are computed over the newest window observations
+    so they follow recent behaviour.
+    """
+    
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], window: int = 1000):
+        """Initialize histogram.
+        
+        Args:
+            name: Metric name
+            help_text: One-line description
+            buckets: Sorted bucket upper bounds
+            window: Number of recent observations kept for percentiles
+        """
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+    
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        """Return the pct-th percentile of the rolling window, or None if empty."""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+    
+    def to_prometheus(self) -> List[str]:
+        """Render the histogram in Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.bucket_counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound:g}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum:g}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Aggregates the metadata of completed turns.
+    
+    One registry can be shared by every orchestrator in a process, e.g. all
+    sessions of a server.
+    """
+    
+    def __init__(self, window: int = 1000):
+        """Initialize registry.
+        
+        Args:
+            window: Number of recent turns used for percentiles
+        """
+        self._lock = threading.Lock()
+        self.histograms = {
+            key: Histogram(name, help_text, buckets, window)
+            for key, (name, help_text, buckets) in TURN_METRICS.items()
+        }
+        self.turns = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.truncated = 0
+        self.models: Dict[str, int] = {}
+        self.tool_calls = 0
+        self.tool_errors = 0
+        self.tool_cache_hits = 0
+        self.tool_latency = Histogram(
+            "jarvis_tool_call_seconds", "Latency of individual tool calls", SECONDS_BUCKETS, window
+        )
+    
+    def observe_turn(self, metadata: Dict[str, Any]) -> None:
+        """Record the metrics of one completed turn.
+        
+        Args:
+            metadata: Assistant message metadata written by the engine and orchestrator
+        """
+        with self._lock:
+            self.turns += 1
+            if "error" in metadata:
+                self.errors += 1
+            if metadata.get("cache") == "hit":
+                self.cache_hits += 1
+            if metadata.get("truncated"):
+                self.truncated += 1
+            if "model" in metadata:
+                self.models[metadata["model"]] = self.models.get(metadata["model"], 0) + 1
+            for key, histogram in self.histograms.items():
+                value = metadata.get(key)
+                if isinstance(value, (int, float)):
+                    histogram.observe(value)
+    
+    def observe_tool_call(self, call: ToolCall) -> None:
+        """Record the outcome of one executed tool call.
+        
+        Args:
+            call: Call with its latency, error and cached fields filled in
+        """
+        with self._lock:
+            self.tool_calls += 1
+            if call.error is not None:
+                self.tool_errors += 1
+            if call.cached:
+                self.tool_cache_hits += 1
+            self.tool_latency.observe(call.latency)
+    
+    def format_stats(self) -> str:
+        """Summarize recent turns as a human-readable table.
+        
+        Returns:
+            Multi-line text with p50/p95/p99 and mean per metric
+        """
+        with self._lock:
+            lines = [
+                f"Turns: {self.turns}  errors: {self.errors}  "
+                f"cancelled: {self.truncated}  cache hits: {self.cache_hits}"
+            ]
+            if self.models:
+                lines.append("Models: " + ", ".join(
+                    f"{model} ({count})" for model, count in sorted(self.models.items())
+                ))
+            if self.tool_calls:
+                lines.append(
+                    f"Tool calls: {self.tool_calls}  errors: {self.tool_errors}  "
+                    f"memoized: {self.tool_cache_hits}"
+                )
+            lines.append(f"{'metric':<24}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}{'n':>7}")
+            for key, histogram in self.histograms.items():
+                if not histogram.recent:
+                    continue
+                values = [histogram.percentile(pct) for pct in (50, 95, 99)]
+                mean = sum(histogram.recent) / len(histogram.recent)
+                lines.append(
+                    f"{key:<24}" + "".join(f"{value:>10.3f}" for value in values + [mean])
+                    + f"{len(histogram.recent):>7}"
+                )
+            return "\n".join(lines)
+    
+    def to_prometheus(self) -> str:
+        """Render all metrics in Prometheus text exposition format.
+        
+        Returns:
+            Exposition text ending with a newline
+        """
+        with self._lock:
+            lines = [
+                "# HELP jarvis_turns_total Completed turns",
+                "# TYPE jarvis_turns_total counter",
+                f"jarvis_turns_total {self.turns}",
+                "# HELP jarvis_turn_errors_total Turns that ended in an error",
+                "# TYPE jarvis_turn_errors_total counter",
+                f"jarvis_turn_errors_total {self.errors}",
+                "# HELP jarvis_cache_hits_total Turns served from the response cache",
+                "# TYPE jarvis_cache_hits_total counter",
+                f"jarvis_cache_hits_total {self.cache_hits}",
+                "# HELP jarvis_turns_truncated_total Turns cancelled before the reply was complete",
+                "# TYPE jarvis_turns_truncated_total counter",
+                f"jarvis_turns_truncated_total {self.truncated}",
+                "# HELP jarvis_model_turns_total Turns answered per model",
+                "# TYPE jarvis_model_turns_total counter"
+            ]
+            for model, count in sorted(self.models.items()):
+                lines.append(f'jarvis_model_turns_total{{model="{model}"}} {count}')
+            lines.extend([
+                "# HELP jarvis_tool_calls_total Tool calls executed",
+                "# TYPE jarvis_tool_calls_total counter",
+                f"jarvis_tool_calls_total {self.tool_calls}",
+                "# HELP jarvis_tool_errors_total Tool calls that failed or timed out",
+                "# TYPE jarvis_tool_errors_total counter",
+                f"jarvis_tool_errors_total {self.tool_errors}",
+                "# HELP jarvis_tool_cache_hits_total Tool calls answered from memoized results",
+                "# TYPE jarvis_tool_cache_hits_total counter",
+                f"jarvis_tool_cache_hits_total {self.tool_cache_hits}"
+            ])
+            lines.extend(self.tool_latency.to_prometheus())
+            for histogram in self.histograms.values():
+                lines.extend(histogram.to_prometheus())
+            return "\n".join(lines) + "\n"
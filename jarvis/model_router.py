@@ -0,0 +1,192 @@
+"""Latency-aware routing of turns between several local models."""
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+# Output tokens a reply is expected to need, by prompt class
+EXPECTED_OUTPUT_TOKENS = {"trivial": 30, "standard": 200, "complex": 600}
+
+# Quality level a prompt class needs to be answered well
+REQUIRED_QUALITY = {"trivial": 1, "standard": 2, "complex": 3}
+
+_TRIVIAL_RE = re.compile(
+    r"^\s*(?:thanks?(?: you)?|thx|ok(?:ay)?|cool|great|nice|yes|no|yep|nope|"
+    r"hi|hello|hey|bye|good (?:morning|night|evening)|got it)\W*$",
+    re.IGNORECASE
+)
+_ARITHMETIC_RE = re.compile(r"\d\s*(?:[-+*/^%]|\*\*)\s*\(?\d")
+_COMPLEX_RE = re.compile(
+    r"```|\b(?:def|class|import|function|traceback|exception|stack trace|refactor|"
+    r"implement|debug|algorithm|optimi[sz]e|architecture|prove|derive|compare|"
+    r"step by step|explain why)\b",
+    re.IGNORECASE
+)
+
+# Weight of the newest observation in the per-model moving averages
+EWMA_ALPHA = 0.3
+
+
+@dataclass
+class ModelProfile:
+    """A model the router may choose, with priors used before it is observed.
+    
+    Attributes:
+        name: Ollama model name, e.g. "phi3:mini"
+        quality: Relative answer quality; 1 handles chit-chat, 3 handles
+            coding and multi-step reasoning
+        max_context_tokens: Context window of the model
+        tokens_per_second: Expected generation speed
+        prefill_tokens_per_second: Expected prompt evaluation speed
+    """
+    name: str
+    quality: int = 2
+    max_context_tokens: int = 4096
+    tokens_per_second: float = 30.0
+    prefill_tokens_per_second: float = 300.0
+
+
+class ModelRouter:
+    """Chooses a model per turn from prompt class, prompt size and observed speed.
+    
+    Prompts are classified as trivial, standard or complex by cheap
+    heuristics. Each model that fits the prompt is scored on two terms: its
+    estimated latency, relative to the slowest candidate, and how many
+    quality levels it falls short of what the prompt class needs. speed_weight trades
+    between them; 0 always picks the best model that fits, 1 always the
+    fastest. Speeds start from the profile's priors and follow Ollama's
+    reported eval timings as turns complete.
+    """
+    
+    def __init__(self, models: List[ModelProfile], speed_weight: float = 0.5):
+        """Initialize router.
+        
+        Args:
+            models: Candidate models
+            speed_weight: Trade-off between speed (1.0) and quality (0.0)
+            
+        Raises:
+            ValueError: If no models are given or speed_weight is out of range
+        """
+        if not models:
+            raise ValueError("ModelRouter needs at least one model")
+        if not 0.0 <= speed_weight <= 1.0:
+            raise ValueError("speed_weight must be between 0 and 1")
+        
+        self.models = {model.name: model for model in models}
+        self.speed_weight = speed_weight
+        self._lock = threading.Lock()
+        self._speeds: Dict[str, Tuple[float, float]] = {
+            model.name: (model.tokens_per_second, model.prefill_tokens_per_second)
+            for model in models
+        }
+    
+    @staticmethod
+    def classify(prompt: str) -> str:
+        """Classify a prompt by how much model it needs.
+        
+        Args:
+            prompt: Current user input
+            
+        Returns:
+            "trivial", "standard" or "complex"
+        """
+        text = prompt.strip()
+        if _TRIVIAL_RE.match(text) or (len(text) < 40 and _ARITHMETIC_RE.search(text)):
+            return "trivial"
+        if _COMPLEX_RE.search(text) or len(text) > 600:
+            return "complex"
+        return "standard"
+    
+    def estimate_latency(self, name: str, prompt_tokens: int, output_tokens: int) -> float:
+        """Estimate seconds to prefill a prompt and generate a reply.
+        
+        Args:
+            name: Model name
+            prompt_tokens: Tokens in the prompt
+            output_tokens: Expected tokens in the reply
+            
+        Returns:
+            Estimated latency in seconds
+        """
+        with self._lock:
+            tokens_per_second, prefill_per_second = self._speeds[name]
+        return prompt_tokens / prefill_per_second + output_tokens / tokens_per_second
+    
+    def route(self, prompt: str, prompt_tokens: int) -> Tuple[str, str]:
+        """Choose the model for a turn.
+        
+        Args:
+            prompt: Current user input
+            prompt_tokens: Estimated tokens in the full prompt, including context
+            
+        Returns:
+            Tuple of the model name and a short explanation of the choice
+        """
+        kind = self.classify(prompt)
+        output_tokens = EXPECTED_OUTPUT_TOKENS[kind]
+        required = REQUIRED_QUALITY[kind]
+        
+        candidates = [
+            model for model in self.models.values()
+            if model.max_context_tokens >= prompt_tokens + output_tokens
+        ]
+        if not candidates:
+            model = max(self.models.values(), key=lambda m: m.max_context_tokens)
+            return model.name, f"{kind} prompt of ~{prompt_tokens} tokens; largest context window"
+        
+        latencies = {
+            model.name: self.estimate_latency(model.name, prompt_tokens, output_tokens)
+            for model in candidates
+        }
+        slowest = max(latencies.values()) or 1.0
+        
+        def cost(model: ModelProfile) -> Tuple[float, int]:
+            shortfall = max(0, required - model.quality)
+            score = (
+                self.speed_weight * latencies[model.name] / slowest
+                + (1.0 - self.speed_weight) * shortfall
+            )
+            return (round(score, 6), -model.quality)
+        
+        best = min(candidates, key=cost)
+        reason = (
+            f"{kind} prompt of ~{prompt_tokens} tokens; "
+            f"est. {latencies[best.name]:.1f}s at speed_weight={self.speed_weight}"
+        )
+        return best.name, reason
+    
+    def observe(self, result: Dict[str, Any], model: Optional[str] = None) -> None:
+        """Update a model's speed from the timings in an Ollama response.
+        
+        Args:
+            result: Final response body or streamed chunk with eval counts and
+                durations (in nanoseconds)
+            model: Model that produced it. Defaults to result["model"].
+        """
+        name = model or result.get("model")
+        if name not in self._speeds:
+            return
+        
+        with self._lock:
+            tokens_per_second, prefill_per_second = self._speeds[name]
+            if result.get("eval_count") and result.get("eval_duration"):
+                observed = result["eval_count"] / (result["eval_duration"] / 1e9)
+                tokens_per_second += EWMA_ALPHA * (observed - tokens_per_second)
+            if result.get("prompt_eval_count") and result.get("prompt_eval_duration"):
+                observed = result["prompt_eval_count"] / (result["prompt_eval_duration"] / 1e9)
+                prefill_per_second += EWMA_ALPHA * (observed - prefill_per_second)
+            self._speeds[name] = (tokens_per_second, prefill_per_second)
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return the current speed estimates.
+        
+        Returns:
+            Mapping of model name to tokens_per_second and prefill_tokens_per_second
+        """
+        with self._lock:
+            return {
+                name: {"tokens_per_second": tps, "prefill_tokens_per_second": prefill}
+                for name, (tps, prefill) in self._speeds.items()
+            }
@@ -1,25 +1,233 @@
 """Core data models for Jarvis."""
 
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Union
+
+# Average characters per token for English text and code with Llama-family
+# tokenizers; close enough for budgeting without loading a tokenizer.
+CHARS_PER_TOKEN = 4
+
+# Tokens added by the chat template around each message (role markers etc.)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate how many tokens a piece of text occupies in the prompt.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Approximate token count, including per-message template overhead
+    """
+    return MESSAGE_TOKEN_OVERHEAD + (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
 
 
-@dataclass
 class Message:
-    """Single conversation message."""
-    role: Literal["user", "assistant", "system"]
-    content: str
-    timestamp: datetime = field(default_factory=datetime.now)
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    """Single conversation message.
+    
+    Slotted rather than a dataclass, since large servers hold many
+    thousands of these: the role is interned, the timestamp is kept as a
+    POSIX float and only turned into a datetime when read, and metadata is
+    allocated on first use.
+    """
+    
+    __slots__ = ("role", "content", "created_at", "_metadata", "_token_count")
+    
+    def __init__(
+        self,
+        role: Literal["user", "assistant", "system"],
+        content: str,
+        timestamp: Optional[Union[datetime, float]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Initialize message.
+        
+        Args:
+            role: Speaker of the message
+            content: Message text
+            timestamp: Creation time as a datetime or POSIX seconds. Defaults to now.
+            metadata: Extra per-message details, e.g. timings
+        """
+        self.role = sys.intern(role)
+        self.content = content
+        # datetime.now() keeps microsecond precision, so to_dict round-trips exactly
+        self.timestamp = datetime.now() if timestamp is None else timestamp
+        self._metadata = metadata
+        self._token_count: Optional[int] = None
+    
+    @property
+    def timestamp(self) -> datetime:
+        """Creation time as a naive local datetime."""
+        return datetime.fromtimestamp(self.created_at)
+    
+    @timestamp.setter
+    def timestamp(self, value: Union[datetime, float]) -> None:
+        self.created_at = value.timestamp() if isinstance(value, datetime) else float(value)
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Extra per-message details, allocated on first access."""
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+    
+    @metadata.setter
+    def metadata(self, value: Dict[str, Any]) -> None:
+        self._metadata = value
+    
+    @property
+    def token_count(self) -> int:
+        """Estimated prompt tokens for this message, computed once and cached."""
+        if self._token_count is None:
+            self._token_count = estimate_tokens(self.content)
+        return self._token_count
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert message to a JSON-serializable dictionary."""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp.isoformat(),
+            "metadata": self._metadata if self._metadata is not None else {}
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Message":
+        """Create a message from a dictionary produced by to_dict."""
+        return cls(
+            role=data["role"],
+            content=data["content"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            metadata=data.get("metadata") or None
+        )
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Message):
+            return NotImplemented
+        return (
+            self.role == other.role
+            and self.content == other.content
+            and self.created_at == other.created_at
+            and (self._metadata or {}) == (other._metadata or {})
+        )
+    
+    __hash__ = None  # mutable, like the dataclass it replaces
+    
+    def __repr__(self) -> str:
+        return (
+            f"Message(role={self.role!r}, content={self.content!r}, "
+            f"timestamp={self.timestamp!r}, metadata={self._metadata or {}!r})"
+        )
 
 
-@dataclass
 class ConversationTurn:
     """Complete conversation turn (user input + assistant response)."""
-    user_message: Message
-    assistant_message: Message
-    tool_calls: List[Any] = field(default_factory=list)
+    
+    __slots__ = ("user_message", "assistant_message", "_tool_calls")
+    
+    def __init__(
+        self,
+        user_message: Message,
+        assistant_message: Message,
+        tool_calls: Optional[List["ToolCall"]] = None
+    ):
+        """Initialize turn.
+        
+        Args:
+            user_message: User's input
+            assistant_message: Assistant's response
+            tool_calls: Tools invoked while answering
+        """
+        self.user_message = user_message
+        self.assistant_message = assistant_message
+        self._tool_calls = tool_calls
+    
+    @property
+    def tool_calls(self) -> List["ToolCall"]:
+        """Tools invoked while answering, allocated on first access."""
+        if self._tool_calls is None:
+            self._tool_calls = []
+        return self._tool_calls
+    
+    @tool_calls.setter
+    def tool_calls(self, value: List["ToolCall"]) -> None:
+        self._tool_calls = value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert turn to a JSON-serializable dictionary."""
+        data = {
+            "user_message": self.user_message.to_dict(),
+            "assistant_message": self.assistant_message.to_dict()
+        }
+        if self._tool_calls:
+            data["tool_calls"] = [call.to_dict() for call in self._tool_calls]
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationTurn":
+        """Create a turn from a dictionary produced by to_dict."""
+        tool_calls = data.get("tool_calls")
+        return cls(
+            user_message=Message.from_dict(data["user_message"]),
+            assistant_message=Message.from_dict(data["assistant_message"]),
+            tool_calls=[ToolCall.from_dict(call) for call in tool_calls] if tool_calls else None
+        )
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConversationTurn):
+            return NotImplemented
+        return (
+            self.user_message == other.user_message
+            and self.assistant_message == other.assistant_message
+            and (self._tool_calls or []) == (other._tool_calls or [])
+        )
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return (
+            f"ConversationTurn(user_message={self.user_message!r}, "
+            f"assistant_message={self.assistant_message!r}, tool_calls={self._tool_calls or []!r})"
+        )
+
+
+@dataclass
+class ToolCall:
+    """One tool invocation requested by the model and its outcome.
+    
+    Attributes:
+        name: Name of the tool
+        arguments: Keyword arguments the model passed
+        result: Tool output as sent back to the model
+        error: Error text if the call failed or timed out
+        latency: Seconds the call took; zero for cached results
+        cached: Whether the result was reused from an earlier identical call
+    """
+    name: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[str] = None
+    error: Optional[str] = None
+    latency: float = 0.0
+    cached: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the call to a JSON-serializable dictionary."""
+        return {
+            "name": self.name,
+            "arguments": self.arguments,
+            "result": self.result,
+            "error": self.error,
+            "latency": self.latency,
+            "cached": self.cached
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ToolCall":
+        """Create a call from a dictionary produced by to_dict."""
+        return cls(**data)
 
 
 @dataclass
@@ -30,3 +238,43 @@ class PersonalityConfig:
     response_style: str = "helpful and informative"
     voice_name: str = "Samantha"
     sound_cues_enabled: bool = True
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one item of AgentOrchestrator.process_batch.
+    
+    An item is either a single prompt or a whole session of prompts run in
+    order; responses and metadata hold one entry per completed turn.
+    """
+    index: int
+    inputs: List[str]
+    responses: List[str] = field(default_factory=list)
+    metadata: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    total_time: float = 0.0
+    
+    @property
+    def ok(self) -> bool:
+        """Whether every turn of the item completed without an error."""
+        return self.error is None
+    
+    @property
+    def response(self) -> Optional[str]:
+        """Response to the last turn that ran, if any."""
+        return self.responses[-1] if self.responses else None
+
+
+@dataclass
+class DocumentSummary:
+    """Outcome of DocumentSummarizer.summarize.
+    
+    cached_chunks counts the chunks whose summary came from the chunk cache
+    instead of the model; reductions counts the summaries of summaries.
+    """
+    summary: str = ""
+    pages: int = 0
+    chunks: int = 0
+    cached_chunks: int = 0
+    reductions: int = 0
+    total_time: float = 0.0
@@ -1,39 +1,96 @@
 """Preference management for user settings."""
 
+import atexit
+import copy
 import json
 import os
+import tempfile
+import threading
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
 from jarvis.models import PersonalityConfig
 
+_MISSING = object()
+
+# Managers with unsaved changes are flushed when the interpreter exits
+_live_managers: "weakref.WeakSet[PreferenceManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for manager in list(_live_managers):
+        manager.flush()
+
 
 class PreferenceManager:
-    """Manages loading and saving user preferences."""
+    """Manages loading and saving user preferences.
+    
+    Preferences are held in memory and only re-read when the file's mtime or
+    size changes, e.g. because another process saved it. Saves update memory
+    immediately and are written to disk after write_delay seconds, so bursts
+    of updates cost one write. Writes go to a temporary file that is renamed
+    over preferences.json, and are serialized across processes with a lock
+    file; changes made by another process in the meantime are merged.
+    """
     
-    def __init__(self, config_dir: Optional[Path] = None):
+    def __init__(self, config_dir: Optional[Path] = None, write_delay: float = 0.5):
         """Initialize preference manager.
         
         Args:
             config_dir: Directory for storing preferences. Defaults to ~/.jarvis/
+            write_delay: Seconds to coalesce saves before writing. 0 writes immediately.
         """
         if config_dir is None:
             config_dir = Path.home() / ".jarvis"
         
         self.config_dir = config_dir
         self.preferences_file = self.config_dir / "preferences.json"
+        self.lock_file = self.config_dir / "preferences.json.lock"
+        self.write_delay = write_delay
         self._ensure_config_dir()
+        
+        self._lock = threading.RLock()
+        self._preferences: Optional[dict] = None
+        self._file_stat: Optional[Tuple[int, int]] = None
+        self._pending_keys: Set[str] = set()
+        self._timer: Optional[threading.Timer] = None
+        _live_managers.add(self)
     
     def _ensure_config_dir(self) -> None:
         """Create config directory if it doesn't exist."""
         self.config_dir.mkdir(parents=True, exist_ok=True)
     
-    def load_preferences(self) -> dict:
-        """Load user preferences from JSON file.
-        
-        Returns:
-            Dictionary containing user preferences, or default preferences if file doesn't exist
-        """
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """Return the preferences file's (mtime_ns, size), or None if missing."""
+        try:
+            stat = self.preferences_file.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold an exclusive lock shared by all processes using this config dir."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    
+    def _read_file(self) -> dict:
+        """Read preferences from disk, falling back to defaults."""
         if not self.preferences_file.exists():
             return self._get_default_preferences()
         
@@ -44,15 +101,99 @@ class PreferenceManager:
             print(f"Error loading preferences: {e}. Using defaults.")
             return self._get_default_preferences()
     
+    def _current(self) -> dict:
+        """Return the in-memory preferences, reloading them if the file changed.
+        
+        Must be called with the lock held. Unsaved local changes take
+        precedence over the file until they are flushed.
+        """
+        if self._preferences is None or not self._pending_keys:
+            stat = self._stat()
+            if self._preferences is None or stat != self._file_stat:
+                self._preferences = self._read_file()
+                self._file_stat = stat
+        return self._preferences
+    
+    def load_preferences(self) -> dict:
+        """Load user preferences.
+        
+        Returns:
+            Dictionary containing user preferences, or default preferences if file doesn't exist
+        """
+        with self._lock:
+            return copy.deepcopy(self._current())
+    
     def save_preferences(self, preferences: dict) -> None:
-        """Save user preferences to JSON file.
+        """Save user preferences.
+        
+        The in-memory copy is updated immediately; the file is written after
+        write_delay seconds (or at flush/close/exit).
         
         Args:
             preferences: Dictionary containing user preferences
         """
-        self._ensure_config_dir()
-        with open(self.preferences_file, 'w') as f:
-            json.dump(preferences, f, indent=2)
+        with self._lock:
+            current = self._current()
+            changed = {
+                key for key in set(current) | set(preferences)
+                if current.get(key, _MISSING) != preferences.get(key, _MISSING)
+            }
+            self._preferences = copy.deepcopy(preferences)
+            self._pending_keys |= changed
+            self._schedule_flush()
+    
+    def _schedule_flush(self) -> None:
+        """Arrange for pending changes to be written."""
+        if self.write_delay <= 0:
+            self.flush()
+            return
+        if self._timer is None:
+            self._timer = threading.Timer(self.write_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def flush(self) -> None:
+        """Write pending changes to disk atomically."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending_keys or not self.config_dir.exists():
+                return
+            
+            with self._file_lock():
+                preferences = self._preferences
+                if self._stat() != self._file_stat:
+                    # Another process saved in the meantime; keep its changes
+                    # to keys we did not touch
+                    preferences = self._read_file()
+                    for key in self._pending_keys:
+                        if key in self._preferences:
+                            preferences[key] = self._preferences[key]
+                        else:
+                            preferences.pop(key, None)
+                
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=self.config_dir, prefix=".preferences.", suffix=".tmp"
+                )
+                try:
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump(preferences, f, indent=2)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.preferences_file)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+                
+                self._preferences = preferences
+                self._file_stat = self._stat()
+                self._pending_keys.clear()
+    
+    def close(self) -> None:
+        """Write pending changes and stop the write-behind timer."""
+        self.flush()
+        _live_managers.discard(self)
     
     def get_personality_config(self) -> PersonalityConfig:
         """Get personality configuration from preferences.
@@ -60,16 +201,16 @@ class PreferenceManager:
         Returns:
             PersonalityConfig object
         """
-        prefs = self.load_preferences()
-        personality_data = prefs.get("personality", {})
-        
-        return PersonalityConfig(
-            tone=personality_data.get("tone", "neutral"),
-            verbosity=personality_data.get("verbosity", "balanced"),
-            response_style=personality_data.get("response_style", "helpful and informative"),
-            voice_name=personality_data.get("voice_name", "Samantha"),
-            sound_cues_enabled=personality_data.get("sound_cues_enabled", True)
-        )
+        with self._lock:
+            personality_data = self._current().get("personality", {})
+            
+            return PersonalityConfig(
+                tone=personality_data.get("tone", "neutral"),
+                verbosity=personality_data.get("verbosity", "balanced"),
+                response_style=personality_data.get("response_style", "helpful and informative"),
+                voice_name=personality_data.get("voice_name", "Samantha"),
+                sound_cues_enabled=personality_data.get("sound_cues_enabled", True)
+            )
     
     def set_personality_config(self, personality: PersonalityConfig) -> None:
         """Save personality configuration to preferences.
@@ -77,15 +218,16 @@ class PreferenceManager:
         Args:
             personality: PersonalityConfig object to save
         """
-        prefs = self.load_preferences()
-        prefs["personality"] = {
-            "tone": personality.tone,
-            "verbosity": personality.verbosity,
-            "response_style": personality.response_style,
-            "voice_name": personality.voice_name,
-            "sound_cues_enabled": personality.sound_cues_enabled
-        }
-        self.save_preferences(prefs)
+        with self._lock:
+            self._current()["personality"] = {
+                "tone": personality.tone,
+                "verbosity": personality.verbosity,
+                "response_style": personality.response_style,
+                "voice_name": personality.voice_name,
+                "sound_cues_enabled": personality.sound_cues_enabled
+            }
+            self._pending_keys.add("personality")
+            self._schedule_flush()
     
     def _get_default_preferences(self) -> dict:
         """Get default preferences.
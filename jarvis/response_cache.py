@@ -0,0 +1,194 @@
+"""Response cache for repeated LLM requests."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class ResponseCache:
+    """LRU/TTL cache of generated responses with an SQLite backing store.
+    
+    Recently used entries are kept in memory; every entry is also written to
+    an SQLite database so the cache survives restarts and can be shared by
+    several processes. Both tiers hold at most max_entries responses and drop
+    entries older than ttl_seconds.
+    
+    Lookups stay read-only: the last-use times of hits are kept in memory
+    and written with the next put, where they decide what is evicted, or
+    on close.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_seconds: float = 7 * 24 * 3600,
+        path: Optional[Path] = None
+    ):
+        """Initialize response cache.
+        
+        Args:
+            max_entries: Maximum number of cached responses
+            ttl_seconds: Age after which an entry is no longer served
+            path: SQLite database file. Defaults to ~/.jarvis/response_cache.db
+        """
+        if path is None:
+            path = Path.home() / ".jarvis" / "response_cache.db"
+        
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        # Last-use times of hits not yet written to the database
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+    
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """Build a cache key from an Ollama request payload.
+        
+        The key covers the model, generation options, and a hash of all
+        messages (system prompt, context and prompt). Transport-only fields
+        such as ``stream`` and ``keep_alive`` are ignored.
+        
+        Args:
+            payload: ``/api/chat`` request payload
+            
+        Returns:
+            Hex digest identifying the request
+        """
+        messages = json.dumps(payload.get("messages", []), sort_keys=True, ensure_ascii=False)
+        key_data = json.dumps({
+            "model": payload.get("model"),
+            "options": payload.get("options", {}),
+            "messages": hashlib.sha256(messages.encode("utf-8")).hexdigest()
+        }, sort_keys=True)
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+    
+    def _expired(self, created_at: float, now: float) -> bool:
+        return now - created_at > self.ttl_seconds
+    
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached response.
+        
+        Args:
+            key: Key from make_key
+            
+        Returns:
+            Cached response text, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+            
+            if entry is None or self._expired(entry[1], now):
+                if entry is not None:
+                    self._forget(key)
+                self.misses += 1
+                return None
+            
+            self._memory.move_to_end(key)
+            self._touched[key] = now
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key: str, response: str) -> None:
+        """Store a response.
+        
+        Args:
+            key: Key from make_key
+            response: Generated response text
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, (response, now))
+            self._write_touched()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE created_at < ? OR key NOT IN "
+                "(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (now - self.ttl_seconds, self.max_entries)
+            )
+            self._db.commit()
+    
+    def _remember(self, key: str, entry: Tuple[str, float]) -> None:
+        """Insert into the in-memory LRU, evicting the least recently used."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def _write_touched(self) -> None:
+        """Write pending last-use times, in the caller's transaction."""
+        if self._touched:
+            self._db.executemany(
+                "UPDATE responses SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()]
+            )
+            self._touched.clear()
+    
+    def _forget(self, key: str) -> None:
+        """Drop an entry from both tiers."""
+        self._memory.pop(key, None)
+        self._touched.pop(key, None)
+        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._db.commit()
+    
+    def clear(self) -> None:
+        """Remove all cached responses and reset counters."""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of stored entries.
+        
+        Returns:
+            Dictionary with hits, misses, and in-memory and on-disk entry counts
+        """
+        with self._lock:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries
+            }
+    
+    def close(self) -> None:
+        """Write pending last-use times and close the backing store."""
+        with self._lock:
+            self._write_touched()
+            self._db.commit()
+            self._db.close()
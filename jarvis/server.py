@@ -0,0 +1,198 @@
+"""Local HTTP server hosting many Jarvis sessions in one process.
+
+Endpoints:
+    GET    /health                     Server and session statistics
+    GET    /metrics                    Per-turn metrics in Prometheus text format
+    POST   /sessions                   Create a session
+    GET    /sessions/<id>              Export a session's conversation
+    DELETE /sessions/<id>              Delete a session
+    POST   /sessions/<id>/messages     Send a message; body {"content": ..., "stream": bool}
+
+Streamed responses use Server-Sent Events: one ``token`` event per text
+fragment followed by a ``done`` event carrying the assistant metadata.
+"""
+
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from jarvis.llm_engine import CancellationToken
+from jarvis.session_manager import SessionManager
+
+SESSION_PATH = re.compile(r"^/sessions/([A-Za-z0-9-]+)(/messages)?$")
+
+
+class JarvisRequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to sessions held by the server's SessionManager."""
+    
+    server: "JarvisServer"
+    
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def _send_json(self, status: int, data: Optional[Dict[str, Any]] = None) -> None:
+        """Write a JSON response."""
+        body = json.dumps(data).encode("utf-8") if data is not None else b""
+        self.send_response(status)
+        if data is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_event(self, event: str, data: Dict[str, Any]) -> None:
+        """Write one Server-Sent Event and flush it to the client."""
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+    
+    def _read_json(self) -> Dict[str, Any]:
+        """Read and decode the JSON request body."""
+        length = int(self.headers.get("Content-Length", 0))
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+    
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", **self.server.sessions.stats()})
+            return
+        if self.path == "/metrics":
+            body = self.server.sessions.metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        
+        match = SESSION_PATH.match(self.path)
+        if not match or match.group(2):
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            export = self.server.sessions.export_session(match.group(1))
+        except KeyError:
+            self._send_json(404, {"error": "Unknown session"})
+            return
+        self._send_json(200, json.loads(export))
+    
+    def do_DELETE(self) -> None:
+        match = SESSION_PATH.match(self.path)
+        if not match or match.group(2):
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            self.server.sessions.delete_session(match.group(1))
+        except KeyError:
+            self._send_json(404, {"error": "Unknown session"})
+            return
+        self._send_json(204)
+    
+    def do_POST(self) -> None:
+        if self.path == "/sessions":
+            self._send_json(201, {"session_id": self.server.sessions.create_session()})
+            return
+        
+        match = SESSION_PATH.match(self.path)
+        if not match or not match.group(2):
+            self._send_json(404, {"error": "Not found"})
+            return
+        
+        try:
+            body = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": "Invalid JSON body"})
+            return
+        if not isinstance(body, dict):
+            self._send_json(400, {"error": "JSON body must be an object"})
+            return
+        content = body.get("content")
+        if not isinstance(content, str) or not content.strip():
+            self._send_json(400, {"error": "Field 'content' is required"})
+            return
+        
+        try:
+            with self.server.sessions.use(match.group(1)) as orchestrator:
+                if body.get("stream", True):
+                    self._stream_reply(orchestrator, content)
+                else:
+                    response = orchestrator.process_input(content)
+                    self._send_json(200, {"response": response})
+        except KeyError:
+            self._send_json(404, {"error": "Unknown session"})
+    
+    def _stream_reply(self, orchestrator, content: str) -> None:
+        """Stream a response as Server-Sent Events.
+        
+        If the client disconnects, generation is cancelled and the text so
+        far is kept in the conversation as a truncated reply, as in the REPL.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        
+        cancel_token = CancellationToken()
+        stream = orchestrator.process_input_stream(content, cancel_token=cancel_token)
+        try:
+            for token in stream:
+                self._send_event("token", {"token": token})
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away; stop generating for it but let the turn be recorded
+            cancel_token.cancel()
+            for _ in stream:
+                pass
+            return
+        turns = orchestrator.conversation_buffer.turns
+        self._send_event("done", turns[-1].assistant_message.metadata if turns else {})
+
+
+class JarvisServer(ThreadingHTTPServer):
+    """Threaded HTTP server owning a SessionManager."""
+    
+    daemon_threads = True
+    
+    def __init__(
+        self,
+        address: tuple,
+        sessions: SessionManager,
+        verbose: bool = False
+    ):
+        """Initialize server.
+        
+        Args:
+            address: (host, port) to listen on
+            sessions: Session manager holding the hosted conversations
+            verbose: Whether to log each request to stderr
+        """
+        super().__init__(address, JarvisRequestHandler)
+        self.sessions = sessions
+        self.verbose = verbose
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    sessions: Optional[SessionManager] = None,
+    verbose: bool = True
+) -> None:
+    """Run the Jarvis HTTP server until interrupted.
+    
+    Args:
+        host: Interface to bind
+        port: Port to listen on
+        sessions: Session manager to use. Created with defaults if not provided.
+        verbose: Whether to log each request to stderr
+    """
+    sessions = sessions or SessionManager()
+    server = JarvisServer((host, port), sessions, verbose=verbose)
+    print(f"Jarvis server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sessions.close()
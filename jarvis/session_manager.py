@@ -0,0 +1,266 @@
+"""Session manager for hosting many conversations in one process."""
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+from contextlib import contextmanager
+
+from jarvis.agent_orchestrator import AgentOrchestrator
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.llm_engine import LLMEngine
+from jarvis.metrics import MetricsRegistry
+from jarvis.preference_manager import PreferenceManager
+
+SNAPSHOT_SUFFIX = ".snap"
+
+# Memory held by a session with no turns: its orchestrator, buffer, deques
+# and prompt cache (measured with tracemalloc)
+SESSION_OVERHEAD_BYTES = 2500
+
+
+class Session:
+    """A hosted conversation and the lock serializing its turns."""
+    
+    def __init__(self, orchestrator: AgentOrchestrator):
+        self.orchestrator = orchestrator
+        self.lock = threading.Lock()
+        self.size = self.estimate_size()
+    
+    def estimate_size(self) -> int:
+        """Estimate the memory held by the session, including an empty one's."""
+        return SESSION_OVERHEAD_BYTES + self.orchestrator.conversation_buffer.estimate_size()
+    
+    @property
+    def session_id(self) -> str:
+        """Session identifier, taken from the conversation buffer."""
+        return self.orchestrator.conversation_buffer.session_id
+
+
+class SessionManager:
+    """Keeps recently used sessions in memory and spills idle ones to disk.
+    
+    Sessions are kept in least-recently-used order. When the estimated size
+    of all in-memory conversations exceeds the memory cap, the least recently
+    used idle sessions are written to the spill directory as binary snapshots
+    and dropped. They are reloaded transparently the next time they are
+    requested.
+    """
+    
+    def __init__(
+        self,
+        llm_engine: Optional[LLMEngine] = None,
+        preference_manager: Optional[PreferenceManager] = None,
+        memory_cap_bytes: int = 256 * 1024 * 1024,
+        spill_dir: Optional[Path] = None,
+        max_turns: int = 10,
+        max_context_tokens: Optional[int] = None
+    ):
+        """Initialize session manager.
+        
+        Args:
+            llm_engine: Engine shared by all sessions. Created if not provided.
+            preference_manager: Preference manager shared by all sessions
+            memory_cap_bytes: Estimated memory allowed for in-memory sessions
+            spill_dir: Directory for evicted sessions. Defaults to ~/.jarvis/sessions/
+            max_turns: Maximum number of turns kept per session
+            max_context_tokens: Token budget for each session's LLM context
+        """
+        if spill_dir is None:
+            spill_dir = Path.home() / ".jarvis" / "sessions"
+        
+        self._owns_engine = llm_engine is None
+        self.llm_engine = llm_engine or LLMEngine()
+        self.preference_manager = preference_manager or PreferenceManager()
+        self.memory_cap_bytes = memory_cap_bytes
+        self.spill_dir = spill_dir
+        self.max_turns = max_turns
+        self.max_context_tokens = max_context_tokens
+        self.metrics = MetricsRegistry()
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._total_size = 0
+        self._lock = threading.RLock()
+    
+    def _new_orchestrator(self, buffer: ConversationBuffer) -> AgentOrchestrator:
+        """Create an orchestrator for a session, sharing engine, preferences and metrics."""
+        return AgentOrchestrator(
+            llm_engine=self.llm_engine,
+            conversation_buffer=buffer,
+            preference_manager=self.preference_manager,
+            metrics=self.metrics
+        )
+    
+    def _spill_path(self, session_id: str) -> Path:
+        """Return the on-disk location of a spilled session."""
+        return self.spill_dir / f"{session_id}{SNAPSHOT_SUFFIX}"
+    
+    def _spill(self, session: Session) -> None:
+        """Write a session's conversation to the spill directory."""
+        buffer = session.orchestrator.conversation_buffer
+        buffer.save_snapshot(self._spill_path(session.session_id))
+    
+    def create_session(self) -> str:
+        """Start a new conversation.
+        
+        Returns:
+            Session id of the new conversation
+        """
+        buffer = ConversationBuffer(
+            max_turns=self.max_turns,
+            max_tokens=self.max_context_tokens
+        )
+        session = Session(self._new_orchestrator(buffer))
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._total_size += session.size
+        self._evict()
+        return session.session_id
+    
+    def _get(self, session_id: str) -> Session:
+        """Return a session, reloading it from disk if it was spilled.
+        
+        Raises:
+            KeyError: If no such session exists
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+            
+            path = self._spill_path(session_id)
+            if not path.exists():
+                raise KeyError(session_id)
+            buffer = ConversationBuffer.load_snapshot(path)
+            session = Session(self._new_orchestrator(buffer))
+            self._sessions[session_id] = session
+            self._total_size += session.size
+            path.unlink()
+            return session
+    
+    @contextmanager
+    def use(self, session_id: str) -> Iterator[AgentOrchestrator]:
+        """Lock a session for one request and yield its orchestrator.
+        
+        The session's size is re-measured afterwards and idle sessions are
+        evicted if the memory cap is exceeded.
+        
+        Args:
+            session_id: Session to use
+            
+        Yields:
+            The session's orchestrator
+            
+        Raises:
+            KeyError: If no such session exists
+        """
+        while True:
+            session = self._get(session_id)
+            session.lock.acquire()
+            with self._lock:
+                if self._sessions.get(session_id) is session:
+                    break
+            # Spilled between lookup and locking; reload it
+            session.lock.release()
+        
+        try:
+            try:
+                yield session.orchestrator
+            finally:
+                with self._lock:
+                    new_size = session.estimate_size()
+                    if self._sessions.get(session_id) is session:
+                        self._total_size += new_size - session.size
+                    session.size = new_size
+        finally:
+            session.lock.release()
+        self._evict()
+    
+    def export_session(self, session_id: str) -> str:
+        """Export a session's conversation to JSON.
+        
+        Raises:
+            KeyError: If no such session exists
+        """
+        with self.use(session_id) as orchestrator:
+            return orchestrator.export_conversation()
+    
+    def delete_session(self, session_id: str) -> None:
+        """Remove a session from memory and disk.
+        
+        Raises:
+            KeyError: If no such session exists
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._total_size -= session.size
+                return
+            path = self._spill_path(session_id)
+            if not path.exists():
+                raise KeyError(session_id)
+            path.unlink()
+    
+    def _evict(self) -> None:
+        """Spill least recently used idle sessions until under the memory cap.
+        
+        Victims are chosen and locked under the manager lock, but written to
+        disk outside it, so other sessions are not held up by the I/O. A
+        request for a victim waits on its session lock and then reloads it.
+        """
+        victims = []
+        with self._lock:
+            size = self._total_size
+            for session in self._sessions.values():
+                if size <= self.memory_cap_bytes:
+                    break
+                if session.lock.acquire(blocking=False):
+                    victims.append(session)
+                    size -= session.size
+        
+        for index, session in enumerate(victims):
+            try:
+                self._spill(session)
+                with self._lock:
+                    session_id = session.session_id
+                    if self._sessions.get(session_id) is session:
+                        del self._sessions[session_id]
+                        self._total_size -= session.size
+                    else:
+                        # Deleted while being written
+                        self._spill_path(session_id).unlink(missing_ok=True)
+            except BaseException:
+                for unspilled in victims[index:]:
+                    unspilled.lock.release()
+                raise
+            session.lock.release()
+    
+    def stats(self) -> Dict[str, int]:
+        """Return session counts and memory usage.
+        
+        Returns:
+            Dictionary with in-memory and spilled session counts and estimated bytes
+        """
+        with self._lock:
+            return {
+                "sessions_in_memory": len(self._sessions),
+                "sessions_spilled": sum(
+                    1 for path in self.spill_dir.iterdir()
+                    if path.suffix == SNAPSHOT_SUFFIX
+                ),
+                "memory_bytes": self._total_size,
+                "memory_cap_bytes": self.memory_cap_bytes
+            }
+    
+    def close(self) -> None:
+        """Spill all in-memory sessions and release the shared engine."""
+        with self._lock:
+            for session in self._sessions.values():
+                self._spill(session)
+            self._sessions.clear()
+            self._total_size = 0
+        self.preference_manager.flush()
+        if self._owns_engine:
+            self.llm_engine.close()
@@ -0,0 +1,227 @@
+"""Compact binary snapshots of conversation buffers.
+
+Layout (all integers little-endian)::
+    
+    b"JVSNAP" version:u8 reserved:u8
+    length:u32 zlib(header JSON)
+    length:u32 zlib(turn JSON)          one record per turn, oldest first
+    offset:u64 * turn_count             file offset of each turn record
+    index_offset:u64 turn_count:u32 b"JVIX"
+
+Every record is compressed on its own with a shared preset dictionary, so
+a reader can memory-map the file, find any turn through the offset index
+and decompress just the turns it needs.
+"""
+
+import json
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from jarvis.models import ConversationTurn, Message, ToolCall
+
+MAGIC = b"JVSNAP"
+VERSION = 1
+PREAMBLE = struct.Struct("<6sBB")
+LENGTH = struct.Struct("<I")
+OFFSET = struct.Struct("<Q")
+FOOTER = struct.Struct("<QI4s")
+INDEX_MAGIC = b"JVIX"
+
+# Strings common to most turns; priming zlib with them shrinks the small
+# per-turn records considerably. Changing it requires a new VERSION.
+PRESET_DICTIONARY = (
+    b'"model":"mistral:7b","route_reason":"","cache":"hit","prompt_eval_saved":'
+    b'"prepare_time":"http_time":"parse_time":"load_duration":"total_duration":'
+    b'"prompt_eval_duration":"eval_duration":"prompt_eval_count":"eval_count":'
+    b'"tokens_per_second":"time_to_first_token":"truncated":true,"error":"'
+    b'"total_time":0.'
+    b' the to of and a in is that for it you with this can be I on are as'
+)
+
+# Records are small, so an 8 KiB window compresses them as well as the
+# default 32 KiB one while making each compressor several times cheaper
+# to set up.
+WINDOW_BITS = 13
+MEM_LEVEL = 6
+
+
+def _compress(data: Dict[str, Any]) -> bytes:
+    """Serialize and compress one record."""
+    compressor = zlib.compressobj(
+        wbits=WINDOW_BITS, memLevel=MEM_LEVEL, zdict=PRESET_DICTIONARY
+    )
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return compressor.compress(raw) + compressor.flush()
+
+
+def _decompress(data: bytes) -> Any:
+    """Decompress and deserialize one record."""
+    decompressor = zlib.decompressobj(wbits=WINDOW_BITS, zdict=PRESET_DICTIONARY)
+    return json.loads((decompressor.decompress(data) + decompressor.flush()).decode("utf-8"))
+
+
+def _encode_turn(turn: ConversationTurn) -> Dict[str, Any]:
+    """Flatten a turn; roles are implied and timestamps kept as floats."""
+    user, assistant = turn.user_message, turn.assistant_message
+    record: Dict[str, Any] = {
+        "u": user.content,
+        "ut": user.created_at,
+        "a": assistant.content,
+        "at": assistant.created_at
+    }
+    if assistant._metadata:
+        record["m"] = assistant._metadata
+    if user._metadata:
+        record["um"] = user._metadata
+    if turn._tool_calls:
+        record["t"] = [call.to_dict() for call in turn._tool_calls]
+    return record
+
+
+def _decode_turn(record: Dict[str, Any]) -> ConversationTurn:
+    """Rebuild a turn encoded by _encode_turn."""
+    return ConversationTurn(
+        user_message=Message(
+            role="user", content=record["u"], timestamp=record["ut"], metadata=record.get("um")
+        ),
+        assistant_message=Message(
+            role="assistant", content=record["a"], timestamp=record["at"], metadata=record.get("m")
+        ),
+        tool_calls=[ToolCall.from_dict(call) for call in record["t"]] if "t" in record else None
+    )
+
+
+def write_snapshot(
+    path: Union[str, Path],
+    header: Dict[str, Any],
+    turns: Iterable[ConversationTurn]
+) -> int:
+    """Write a snapshot file atomically.
+    
+    Args:
+        path: Destination file
+        header: JSON-serializable session details
+        turns: Turns to store, oldest first
+        
+    Returns:
+        Size of the snapshot in bytes
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    offsets: List[int] = []
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(PREAMBLE.pack(MAGIC, VERSION, 0))
+            body = _compress(header)
+            f.write(LENGTH.pack(len(body)) + body)
+            for turn in turns:
+                offsets.append(f.tell())
+                body = _compress(_encode_turn(turn))
+                f.write(LENGTH.pack(len(body)) + body)
+            index_offset = f.tell()
+            f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+            f.write(FOOTER.pack(index_offset, len(offsets), INDEX_MAGIC))
+            size = f.tell()
+            # On disk before the rename, so a crash leaves the old or new file
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return size
+
+
+class SnapshotReader:
+    """Random access to the turns of a memory-mapped snapshot.
+    
+    Only the header is decoded on open; turns are decompressed on access.
+    
+    Usage:
+        with SnapshotReader(path) as snapshot:
+            newest = snapshot.tail(5)
+    """
+    
+    def __init__(self, path: Union[str, Path]):
+        """Open and validate a snapshot.
+        
+        Args:
+            path: Snapshot file
+            
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is not a valid snapshot
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Empty snapshot file: {self.path}")
+        try:
+            self._read_layout()
+        except (ValueError, struct.error, zlib.error) as e:
+            self._map.close()
+            raise ValueError(f"Invalid snapshot {self.path}: {e}")
+    
+    def _read_layout(self) -> None:
+        """Check the magic numbers and read the header and index position."""
+        magic, version, _ = PREAMBLE.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError("not a snapshot file")
+        if version != VERSION:
+            raise ValueError(f"unsupported snapshot version {version}")
+        self._index_offset, self._count, index_magic = FOOTER.unpack_from(
+            self._map, len(self._map) - FOOTER.size
+        )
+        if index_magic != INDEX_MAGIC:
+            raise ValueError("missing turn index; the file is truncated")
+        self.header: Dict[str, Any] = _decompress(self._read_record(PREAMBLE.size))
+    
+    def _read_record(self, offset: int) -> bytes:
+        """Return the compressed bytes of the record at offset."""
+        (length,) = LENGTH.unpack_from(self._map, offset)
+        start = offset + LENGTH.size
+        return self._map[start:start + length]
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __getitem__(self, index: int) -> ConversationTurn:
+        """Decode one turn; negative indexes count from the newest."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("snapshot turn index out of range")
+        (offset,) = OFFSET.unpack_from(self._map, self._index_offset + index * OFFSET.size)
+        return _decode_turn(_decompress(self._read_record(offset)))
+    
+    def __iter__(self) -> Iterator[ConversationTurn]:
+        for index in range(self._count):
+            yield self[index]
+    
+    def tail(self, count: Optional[int] = None) -> List[ConversationTurn]:
+        """Decode the newest turns, leaving older ones untouched.
+        
+        Args:
+            count: Number of turns wanted. None decodes all of them.
+            
+        Returns:
+            Up to count turns, oldest first
+        """
+        start = 0 if count is None else max(0, self._count - count)
+        return [self[index] for index in range(start, self._count)]
+    
+    def close(self) -> None:
+        """Unmap the file."""
+        self._map.close()
+    
+    def __enter__(self) -> "SnapshotReader":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
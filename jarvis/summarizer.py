@@ -0,0 +1,161 @@
+"""Background summarization of turns evicted from the conversation buffer."""
+
+import threading
+import time
+from typing import List, Optional
+
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.llm_engine import LLMEngine
+from jarvis.models import CHARS_PER_TOKEN, ConversationTurn
+
+
+class ConversationSummarizer:
+    """Folds evicted turns into the buffer's running summary off the request path.
+    
+    Evicted turns are queued and summarized by a daemon thread together with
+    the current summary, so the user never waits for it. The worker runs at
+    most once every min_interval seconds and only after the engine has been
+    idle for idle_delay seconds, so it does not compete with interactive
+    requests. The summary is clipped to max_summary_tokens.
+    """
+    
+    def __init__(
+        self,
+        llm_engine: LLMEngine,
+        conversation_buffer: ConversationBuffer,
+        max_summary_tokens: int = 200,
+        min_interval: float = 30.0,
+        idle_delay: float = 2.0
+    ):
+        """Attach a summarizer to a conversation buffer and start its worker.
+        
+        Args:
+            llm_engine: Engine used to write summaries
+            conversation_buffer: Buffer whose evicted turns are summarized
+            max_summary_tokens: Upper bound on the summary length
+            min_interval: Minimum seconds between summarization runs
+            idle_delay: Seconds the engine must be idle before a run starts
+        """
+        self.llm_engine = llm_engine
+        self.conversation_buffer = conversation_buffer
+        self.max_summary_tokens = max_summary_tokens
+        self.min_interval = min_interval
+        self.idle_delay = idle_delay
+        
+        self._lock = threading.Lock()
+        self._pending: List[ConversationTurn] = []
+        self._session_id = conversation_buffer.session_id
+        self._last_run: Optional[float] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        
+        conversation_buffer.on_evict = self._on_evict
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    @property
+    def pending(self) -> int:
+        """Number of evicted turns not yet folded into the summary."""
+        with self._lock:
+            return len(self._pending)
+    
+    def _on_evict(self, turn: ConversationTurn) -> None:
+        """Queue an evicted turn; called by the buffer."""
+        with self._lock:
+            if self.conversation_buffer.session_id != self._session_id:
+                # The conversation was cleared; drop turns of the old session
+                self._pending.clear()
+                self._session_id = self.conversation_buffer.session_id
+            self._pending.append(turn)
+        self._wake.set()
+    
+    def _wait_time(self) -> float:
+        """Return seconds until a run is allowed, or 0 if it may start now."""
+        wait = self.idle_delay - self.llm_engine.idle_seconds()
+        if self._last_run is not None:
+            wait = max(wait, self._last_run + self.min_interval - time.monotonic())
+        return max(wait, 0.0)
+    
+    def _run(self) -> None:
+        """Worker loop: wait for evicted turns, then for a quiet moment."""
+        while not self._stop.is_set():
+            self._wake.wait()
+            if self._stop.is_set():
+                return
+            wait = self._wait_time()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            self._wake.clear()
+            if not self.summarize_pending():
+                # Keep the remaining turns queued for the next run
+                self._wake.set()
+    
+    def summarize_pending(self) -> bool:
+        """Fold all queued turns into the summary now.
+        
+        Returns:
+            True if the summary is up to date, False if summarization failed
+            and the turns stay queued
+        """
+        with self._lock:
+            turns = self._pending
+            self._pending = []
+            session_id = self._session_id
+        if not turns:
+            return True
+        
+        self._last_run = time.monotonic()
+        try:
+            summary = self.llm_engine.generate(
+                prompt=self._build_prompt(self.conversation_buffer.summary, turns),
+                context=[]
+            )
+        except Exception:
+            with self._lock:
+                if self._session_id == session_id:
+                    self._pending[:0] = turns
+            return False
+        
+        with self._lock:
+            if self.conversation_buffer.session_id == session_id:
+                self.conversation_buffer.summary = self._clip(summary.strip())
+        return True
+    
+    def _build_prompt(self, summary: Optional[str], turns: List[ConversationTurn]) -> str:
+        """Build the instruction asking the model to update the summary.
+        
+        Args:
+            summary: Current running summary, if any
+            turns: Evicted turns to fold in
+            
+        Returns:
+            Prompt text
+        """
+        exchanges = "\n".join(
+            f"User: {turn.user_message.content}\nAssistant: {turn.assistant_message.content}"
+            for turn in turns
+        )
+        max_words = max(1, self.max_summary_tokens * 3 // 4)
+        return (
+            "Update the running summary of a conversation with the new exchanges below. "
+            "Keep names, facts, decisions and open questions; drop small talk. "
+            f"Reply with the summary only, in at most {max_words} words.\n\n"
+            f"Current summary:\n{summary or '(none)'}\n\n"
+            f"New exchanges:\n{exchanges}"
+        )
+    
+    def _clip(self, summary: str) -> str:
+        """Cut a summary down to max_summary_tokens at a word boundary."""
+        limit = self.max_summary_tokens * CHARS_PER_TOKEN
+        if len(summary) <= limit:
+            return summary
+        return summary[:limit].rsplit(" ", 1)[0]
+    
+    def close(self) -> None:
+        """Stop the worker thread. Queued turns are not summarized."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=1.0)
+        if self.conversation_buffer.on_evict == self._on_evict:
+            self.conversation_buffer.on_evict = None
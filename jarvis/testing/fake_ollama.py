@@ -0,0 +1,321 @@
+"""In-process fake of the Ollama HTTP API for tests and benchmarks."""
+
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+def tokenize(text: str) -> List[int]:
+    """Turn text into fake token ids, one per whitespace-separated word."""
+    return [zlib.crc32(word.encode("utf-8")) % 32000 for word in text.split()]
+
+
+def embed(text: str, dim: int) -> List[float]:
+    """Fake embedding: counts of hashed words, so shared words mean similar vectors."""
+    vector = [0.0] * dim
+    for token in tokenize(text.lower()):
+        vector[token % dim] += 1.0
+    return vector
+
+
+def echo_reply(prompt: str) -> str:
+    """Default reply: echo the latest user message."""
+    return f"echo: {prompt}"
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Serves /api/tags, /api/chat, /api/generate and /api/embed like Ollama does."""
+    
+    server: "_FakeHTTPServer"
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+    
+    def _send_json(self, status: int, data: Dict[str, Any]) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_chunk(self, data: Dict[str, Any]) -> None:
+        """Write one NDJSON line as an HTTP chunk, as Ollama streams replies."""
+        line = (json.dumps(data) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+    
+    def do_GET(self) -> None:
+        fake = self.server.fake
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": name} for name in fake.models]})
+        else:
+            self._send_json(404, {"error": "not found"})
+    
+    def do_POST(self) -> None:
+        fake = self.server.fake
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        fake.record(self.path, payload)
+        
+        if self.path == "/api/embed":
+            texts = payload["input"]
+            if isinstance(texts, str):
+                texts = [texts]
+            embeddings = [embed(text, fake.embedding_dim) for text in texts]
+            self._send_json(200, {"model": payload["model"], "embeddings": embeddings})
+            return
+        
+        if self.path == "/api/chat":
+            prompt = payload["messages"][-1]["content"]
+            prompt_eval_count = sum(len(tokenize(m["content"])) for m in payload["messages"])
+            new_context = None
+        elif self.path == "/api/generate":
+            prompt = payload.get("prompt", "")
+            prompt_eval_count, new_context = fake.evaluate_generate(payload)
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+        
+        load_seconds = fake.load(payload)
+        if self.path == "/api/generate" and not prompt:
+            # Load-only request, as sent to preload or unload a model
+            self._send_json(200, {
+                "model": payload.get("model"),
+                "done": True,
+                "done_reason": "load" if fake.is_loaded(payload.get("model")) else "unload",
+                "response": "",
+                "load_duration": int(load_seconds * 1e9)
+            })
+            return
+        
+        stream = payload.get("stream", True)
+        failure = fake.pick_failure(stream)
+        if failure == "status":
+            self._send_json(fake.error_status, {"error": "injected failure"})
+            return
+        
+        text = fake.reply(prompt)
+        words = text.split(" ")
+        final = {
+            "model": payload.get("model"),
+            "done": True,
+            "prompt_eval_count": prompt_eval_count,
+            "eval_count": len(words)
+        }
+        if fake.load_delay:
+            final["load_duration"] = int(load_seconds * 1e9)
+        if fake.first_token_delay:
+            final["prompt_eval_duration"] = int(fake.first_token_delay * 1e9)
+        if fake.token_delay:
+            final["eval_duration"] = int(fake.token_delay * len(words) * 1e9)
+        time.sleep(fake.first_token_delay)
+        if new_context is not None:
+            final["context"] = new_context + tokenize(text)
+            fake.kv_cache = final["context"]
+        
+        is_chat = self.path == "/api/chat"
+        if not stream:
+            time.sleep(fake.token_delay * len(words))
+            body = dict(final)
+            if is_chat:
+                body["message"] = {"role": "assistant", "content": text}
+            else:
+                body["response"] = text
+            self._send_json(200, body)
+            return
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for i, word in enumerate(words):
+            if failure == "stream" and i == len(words) // 2:
+                self._send_chunk({"error": "injected failure"})
+                self.wfile.write(b"0\r\n\r\n")
+                return
+            time.sleep(fake.token_delay)
+            token = word if i == 0 else f" {word}"
+            chunk = {"message": {"role": "assistant", "content": token}} if is_chat else {"response": token}
+            chunk["done"] = False
+            try:
+                self._send_chunk(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client hung up; stop generating like Ollama does
+                fake.count_aborted()
+                return
+        final["message" if is_chat else "response"] = (
+            {"role": "assistant", "content": ""} if is_chat else ""
+        )
+        self._send_chunk(final)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "FakeOllamaServer"
+
+
+class FakeOllamaServer:
+    """Local fake Ollama server running on a background thread.
+    
+    Models ``/api/generate`` context handling: when a request carries the
+    same context the server returned last, only the new tokens count towards
+    ``prompt_eval_count``, as they would with a warm KV cache. ``/api/chat``
+    requests are always evaluated in full.
+    
+    For load testing, replies can be slowed down per token and a fraction
+    of generation requests can fail, either with an HTTP error status or
+    with an error chunk halfway through a stream. With load_delay set, the
+    first request for each model also pays a one-off load time, and a
+    request without a prompt only loads (or, with keep_alive 0, unloads)
+    the model.
+    
+    Usage:
+        with FakeOllamaServer() as server:
+            engine = LLMEngine(LLMConfig(endpoint=server.url))
+    """
+    
+    def __init__(
+        self,
+        reply: Optional[Callable[[str], str]] = None,
+        models: Tuple[str, ...] = ("mistral:7b",),
+        embedding_dim: int = 64,
+        token_delay: float = 0.0,
+        first_token_delay: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        stream_error_rate: float = 0.0,
+        seed: int = 0,
+        load_delay: float = 0.0
+    ):
+        """Initialize fake server.
+        
+        Args:
+            reply: Function mapping the latest user prompt to the reply text
+            models: Model names reported by /api/tags
+            embedding_dim: Length of vectors returned by /api/embed
+            token_delay: Seconds spent generating each reply token
+            first_token_delay: Seconds of prompt evaluation before the first token
+            error_rate: Fraction of generation requests answered with error_status
+            error_status: HTTP status of injected errors
+            stream_error_rate: Fraction of streamed replies cut off by an error chunk
+            seed: Seed for choosing which requests fail
+            load_delay: Seconds spent loading a model that is not loaded yet
+        """
+        self.reply = reply or echo_reply
+        self.models = models
+        self.embedding_dim = embedding_dim
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stream_error_rate = stream_error_rate
+        self._random = random.Random(seed)
+        self.load_delay = load_delay
+        self.loaded_models: Set[str] = set()
+        self._load_lock = threading.Lock()
+        self.requests: List[Tuple[str, Dict[str, Any]]] = []
+        self.kv_cache: List[int] = []
+        self.aborted_streams = 0
+        self._lock = threading.Lock()
+        self._httpd: Optional[_FakeHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL to use as LLMConfig.endpoint."""
+        assert self._httpd is not None, "server not started"
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def record(self, path: str, payload: Dict[str, Any]) -> None:
+        """Remember a request for later assertions."""
+        with self._lock:
+            self.requests.append((path, payload))
+    
+    def count_aborted(self) -> None:
+        """Note a streamed reply abandoned by the client."""
+        with self._lock:
+            self.aborted_streams += 1
+    
+    def pick_failure(self, stream: bool) -> Optional[str]:
+        """Decide whether to inject a failure into a generation request.
+        
+        Args:
+            stream: Whether the reply is streamed
+            
+        Returns:
+            "status" for an HTTP error, "stream" for a mid-stream error chunk,
+            or None to answer normally
+        """
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return "status"
+        if stream and roll < self.error_rate + self.stream_error_rate:
+            return "stream"
+        return None
+    
+    def load(self, payload: Dict[str, Any]) -> float:
+        """Load the requested model if needed, honouring keep_alive 0 as unload.
+        
+        Returns:
+            Seconds spent loading
+        """
+        model = payload.get("model")
+        with self._load_lock:
+            unload_only = "messages" not in payload and not payload.get("prompt")
+            if unload_only and payload.get("keep_alive") in (0, "0"):
+                self.loaded_models.discard(model)
+                return 0.0
+            cold = model not in self.loaded_models
+            if cold:
+                time.sleep(self.load_delay)
+                self.loaded_models.add(model)
+        return self.load_delay if cold else 0.0
+    
+    def is_loaded(self, model: Optional[str]) -> bool:
+        """Whether a model is currently loaded."""
+        with self._load_lock:
+            return model in self.loaded_models
+    
+    def evaluate_generate(self, payload: Dict[str, Any]) -> Tuple[int, List[int]]:
+        """Work out prompt tokens evaluated for a /api/generate request.
+        
+        Returns:
+            Tuple of prompt_eval_count and the context before the reply
+        """
+        context = payload.get("context") or []
+        new_tokens = tokenize(payload.get("system", "")) + tokenize(payload.get("prompt", ""))
+        evaluated = len(new_tokens)
+        if context != self.kv_cache[:len(context)]:
+            evaluated += len(context)
+        return evaluated, context + new_tokens
+    
+    def start(self) -> "FakeOllamaServer":
+        """Start serving on an ephemeral localhost port."""
+        self._httpd = _FakeHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+        self._httpd.fake = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+    
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
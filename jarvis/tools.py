@@ -0,0 +1,316 @@
+"""Tools the model can call, and concurrent execution of its tool calls."""
+
+import json
+import re
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from jarvis.models import ToolCall
+
+DEFAULT_TOOL_TIMEOUT = 30.0
+
+# Fallback for models without native tool calling, which can be prompted to
+# answer with <tool_call>{"name": ..., "arguments": {...}}</tool_call>
+TOOL_CALL_OPEN = "<tool_call>"
+_TOOL_CALL_TAG = re.compile(r"<tool_call>\s*(\{.*?\})\s*</tool_call>", re.DOTALL)
+
+
+@dataclass
+class Tool:
+    """A function the model may call.
+    
+    Attributes:
+        name: Name the model uses to call the tool
+        function: Callable invoked with the call's arguments as keywords
+        description: What the tool does, shown to the model
+        parameters: JSON schema of the keyword arguments
+        timeout: Seconds a call may take before it is reported as failed
+        pure: Whether the result depends only on the arguments, so repeated
+            calls can reuse it
+        process: Run calls in a process pool instead of a thread, for
+            CPU-bound tools. The function and arguments must be picklable.
+    """
+    name: str
+    function: Callable[..., Any]
+    description: str = ""
+    parameters: Dict[str, Any] = field(default_factory=lambda: {"type": "object", "properties": {}})
+    timeout: float = DEFAULT_TOOL_TIMEOUT
+    pure: bool = False
+    process: bool = False
+    
+    def schema(self) -> Dict[str, Any]:
+        """Describe the tool in the format of Ollama's ``tools`` request field."""
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters
+            }
+        }
+
+
+def parse_tool_calls(native: Optional[List[Dict[str, Any]]], text: str = "") -> List[ToolCall]:
+    """Extract the tool calls requested by a model response.
+    
+    Args:
+        native: Tool calls returned by Ollama in message.tool_calls
+        text: Response text, searched for <tool_call> tags when the model
+            made no native calls
+            
+    Returns:
+        Requested calls, without results
+    """
+    requested: List[Tuple[Any, Any]] = []
+    if native:
+        for call in native:
+            function = call.get("function", call)
+            requested.append((function.get("name"), function.get("arguments")))
+    else:
+        for match in _TOOL_CALL_TAG.finditer(text):
+            try:
+                data = json.loads(match.group(1))
+            except ValueError:
+                continue
+            requested.append((data.get("name"), data.get("arguments", data.get("parameters"))))
+    
+    calls = []
+    for name, arguments in requested:
+        if not isinstance(name, str):
+            continue
+        if isinstance(arguments, str):
+            # Some models send the arguments as a JSON-encoded string
+            try:
+                arguments = json.loads(arguments)
+            except ValueError:
+                arguments = None
+        calls.append(ToolCall(name=name, arguments=arguments if isinstance(arguments, dict) else {}))
+    return calls
+
+
+def tool_messages(response: str, calls: List[ToolCall]) -> List[Dict[str, Any]]:
+    """Build the chat messages that feed executed calls back to the model.
+    
+    Args:
+        response: Text of the assistant message that requested the calls
+        calls: Executed calls, in the order they were requested
+        
+    Returns:
+        The assistant message with its tool calls, then one tool message per call
+    """
+    messages: List[Dict[str, Any]] = [{
+        "role": "assistant",
+        "content": response,
+        "tool_calls": [
+            {"function": {"name": call.name, "arguments": call.arguments}} for call in calls
+        ]
+    }]
+    for call in calls:
+        content = call.result if call.error is None else f"Error: {call.error}"
+        messages.append({"role": "tool", "content": content, "tool_name": call.name})
+    return messages
+
+
+class ToolMarkupFilter:
+    """Releases the streamed text of a round as long as it cannot be a tool call.
+    
+    Text is passed on as it arrives, except for a trailing fragment that
+    could be the start of a <tool_call> tag. From a complete tag on, or
+    once the engine has reported native tool calls, the rest of the round
+    is held back until it ends and shows whether tools were called.
+    """
+    
+    def __init__(self):
+        self.holding = False
+        self._pending = ""
+    
+    def feed(self, token: str, native_calls: bool = False) -> str:
+        """Take the next token of the round.
+        
+        Args:
+            token: Response text fragment
+            native_calls: Whether the engine has reported tool calls so far
+            
+        Returns:
+            Text that is safe to show now, possibly empty
+        """
+        text = self._pending + token
+        if self.holding or native_calls:
+            self.holding = True
+            self._pending = text
+            return ""
+        start = text.find(TOOL_CALL_OPEN)
+        if start >= 0:
+            self.holding = True
+            self._pending = text[start:]
+            return text[:start]
+        # Hold back the longest ending that a later token could complete into a tag
+        keep = min(len(text), len(TOOL_CALL_OPEN) - 1)
+        while keep and not TOOL_CALL_OPEN.startswith(text[-keep:]):
+            keep -= 1
+        self._pending = text[len(text) - keep:]
+        return text[:len(text) - keep]
+    
+    def flush(self) -> str:
+        """Return the text held back so far, for a round that called no tools."""
+        text, self._pending = self._pending, ""
+        self.holding = False
+        return text
+
+
+def _format_result(value: Any) -> str:
+    """Convert a tool's return value to the text sent to the model."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=str)
+
+
+class ToolExecutor:
+    """Runs the tool calls of a model response concurrently.
+    
+    Calls requested together cannot depend on each other's results, since
+    the model has seen none of them yet, so all of them are submitted at
+    once: to a thread pool, or a process pool for tools marked process.
+    Each call is given its tool's timeout. Python cannot interrupt a running
+    function, so a call that times out is reported as failed and its result
+    is dropped when it eventually returns.
+    
+    Results of pure tools are memoized until clear_memo is called, and
+    identical pure calls in flight at the same time share one execution.
+    Give each conversation its own executor to keep memoized results
+    within a session, and clear the memo when the conversation is cleared.
+    """
+    
+    def __init__(
+        self,
+        tools: Iterable[Tool] = (),
+        max_workers: int = 4,
+        max_processes: Optional[int] = None
+    ):
+        """Initialize executor.
+        
+        Args:
+            tools: Tools the model may call
+            max_workers: Threads for running calls
+            max_processes: Processes for tools marked process. Defaults to
+                the number of CPUs.
+        """
+        self.tools: Dict[str, Tool] = {}
+        for tool in tools:
+            self.register(tool)
+        self.max_workers = max_workers
+        self.max_processes = max_processes
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._memo: Dict[Tuple[str, str], Future] = {}
+        # Reentrant: a done-callback runs immediately if its call already finished
+        self._lock = threading.RLock()
+    
+    def register(self, tool: Tool) -> None:
+        """Make a tool available, replacing any tool with the same name."""
+        self.tools[tool.name] = tool
+    
+    def schemas(self) -> List[Dict[str, Any]]:
+        """Return the schemas of all tools, for LLMEngine.generate's tools argument."""
+        return [tool.schema() for tool in self.tools.values()]
+    
+    def _executor(self, tool: Tool) -> Executor:
+        """Return the pool a tool runs in, creating it on first use; caller holds the lock."""
+        if tool.process:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.max_processes)
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="jarvis-tool"
+            )
+        return self._threads
+    
+    def _submit(self, tool: Tool, call: ToolCall) -> Tuple[Future, bool]:
+        """Start a call, or join an identical memoized one for pure tools.
+        
+        Returns:
+            Tuple of the call's future and whether it was memoized
+        """
+        with self._lock:
+            if not tool.pure:
+                return self._executor(tool).submit(tool.function, **call.arguments), False
+            key = (tool.name, json.dumps(call.arguments, sort_keys=True, default=str))
+            future = self._memo.get(key)
+            if future is not None:
+                return future, True
+            future = self._executor(tool).submit(tool.function, **call.arguments)
+            self._memo[key] = future
+            # Only successful results are worth reusing
+            future.add_done_callback(lambda done: self._forget(key, done))
+            return future, False
+    
+    def _forget(self, key: Tuple[str, str], future: Future) -> None:
+        """Drop a memoized call that failed."""
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if self._memo.get(key) is future:
+                    del self._memo[key]
+    
+    def clear_memo(self) -> None:
+        """Forget memoized results; calls in flight still finish for their callers."""
+        with self._lock:
+            self._memo.clear()
+    
+    def run(self, calls: List[ToolCall]) -> List[ToolCall]:
+        """Execute calls concurrently, filling in their outcome.
+        
+        Sets result or error, latency and cached on every call. Failures,
+        including unknown tools, bad arguments and timeouts, are recorded
+        in error and never raised.
+        
+        Args:
+            calls: Calls requested by the model
+            
+        Returns:
+            The same calls, in the same order
+        """
+        start = time.perf_counter()
+        finished: Dict[int, float] = {}
+        started: List[Optional[Future]] = []
+        for index, call in enumerate(calls):
+            tool = self.tools.get(call.name)
+            if tool is None:
+                call.error = f"Unknown tool: {call.name}"
+                started.append(None)
+                continue
+            future, call.cached = self._submit(tool, call)
+            future.add_done_callback(
+                lambda _, index=index: finished.setdefault(index, time.perf_counter())
+            )
+            started.append(future)
+        
+        for index, (call, future) in enumerate(zip(calls, started)):
+            if future is None:
+                continue
+            timeout = self.tools[call.name].timeout
+            try:
+                value = future.result(timeout=max(0.0, start + timeout - time.perf_counter()))
+            except FuturesTimeout:
+                call.error = f"Tool {call.name} timed out after {timeout:g}s"
+                call.latency = timeout
+                continue
+            except Exception as e:
+                call.error = f"{type(e).__name__}: {e}"
+            else:
+                call.result = _format_result(value)
+            call.latency = finished.get(index, time.perf_counter()) - start
+        return calls
+    
+    def close(self) -> None:
+        """Shut down the worker pools without waiting for running calls."""
+        with self._lock:
+            for pool in (self._threads, self._processes):
+                if pool is not None:
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+            self._processes = None
@@ -0,0 +1,130 @@
+"""Background model warm-up and keep-alive pings."""
+
+import re
+import threading
+from typing import Optional, Union
+
+from jarvis.llm_engine import LLMEngine
+
+# How long Ollama keeps a model loaded when no keep_alive is sent
+DEFAULT_KEEP_ALIVE_SECONDS = 300.0
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_keep_alive(value: Optional[Union[str, int, float]]) -> Optional[float]:
+    """Convert an Ollama keep_alive value to seconds.
+    
+    Accepts numbers of seconds and duration strings such as "30m" or
+    "1h30m", like Ollama does.
+    
+    Args:
+        value: keep_alive value, or None for the server default
+        
+    Returns:
+        Seconds the model stays loaded, or None if it stays loaded forever
+        
+    Raises:
+        ValueError: If the value is not a valid duration
+    """
+    if value is None:
+        return DEFAULT_KEEP_ALIVE_SECONDS
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            seconds = float(text)
+        except ValueError:
+            sign = -1.0 if text.startswith("-") else 1.0
+            text = text.lstrip("-")
+            parts = DURATION_PART.findall(text)
+            if not text or "".join(number + unit for number, unit in parts) != text:
+                raise ValueError(f"Invalid keep_alive duration: {value!r}")
+            seconds = sign * sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+    else:
+        seconds = float(value)
+    return None if seconds < 0 else seconds
+
+
+class ModelWarmer:
+    """Preloads the model in the background and keeps it loaded.
+    
+    Ollama only loads a model's weights when the first request for it
+    arrives, which makes the first turn of a session slow. The warmer sends
+    a load request on a daemon thread as soon as it is created, so the user
+    can start typing meanwhile, then pings whenever the engine has been
+    idle for ping_interval seconds so the model is not unloaded between
+    turns.
+    """
+    
+    def __init__(
+        self,
+        llm_engine: LLMEngine,
+        ping_interval: Optional[float] = None,
+        check_interval: float = 5.0
+    ):
+        """Start warming up the engine's model.
+        
+        Args:
+            llm_engine: Engine whose default model is preloaded
+            ping_interval: Idle seconds after which the model is pinged.
+                Defaults to half of the configured keep_alive; pings are
+                disabled if the model is kept loaded forever.
+            check_interval: Seconds between idle checks
+        """
+        self.llm_engine = llm_engine
+        if ping_interval is None:
+            keep_alive = parse_keep_alive(llm_engine.config.keep_alive)
+            ping_interval = keep_alive / 2 if keep_alive else None
+        self.ping_interval = ping_interval
+        self.check_interval = check_interval
+        
+        self.ready = threading.Event()
+        self.load_time: Optional[float] = None
+        self.error: Optional[str] = None
+        self.pings = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the warm-up request has finished.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the model was loaded, False on failure or timeout
+        """
+        return self.ready.wait(timeout) and self.error is None
+    
+    def _load(self) -> Optional[float]:
+        """Send one load request, recording a failure in self.error.
+        
+        Returns:
+            Seconds Ollama spent loading the weights, or None on failure
+        """
+        try:
+            load_time = self.llm_engine.load_model()
+        except (ConnectionError, RuntimeError) as e:
+            self.error = str(e)
+            return None
+        self.error = None
+        return load_time
+    
+    def _run(self) -> None:
+        """Worker loop: load once, then ping whenever the engine goes idle."""
+        self.load_time = self._load()
+        self.ready.set()
+        if self.ping_interval is None:
+            return
+        
+        while not self._stop.wait(min(self.check_interval, self.ping_interval)):
+            if self.llm_engine.idle_seconds() >= self.ping_interval:
+                self._load()
+                self.pings += 1
+    
+    def close(self) -> None:
+        """Stop pinging. An in-flight request is left to finish on its own."""
+        self._stop.set()
+        self._thread.join(timeout=self.check_interval)
@@ -12,6 +12,7 @@ setup(
     install_requires=[
         "requests>=2.31.0",
         "aiohttp>=3.9.0",
+        "numpy>=1.24.0",
         "ollama>=0.1.0",
         "openai-whisper>=20231117",
         "pyaudio>=0.2.14",
@@ -0,0 +1,196 @@
+"""Tests for AgentOrchestrator."""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from jarvis.agent_orchestrator import AgentOrchestrator
+from jarvis.llm_engine import CancellationToken, GenerationCancelled, LLMConfig
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+
+@pytest.fixture
+def orchestrator(monkeypatch, tmp_path):
+    """Orchestrator whose preferences live in a temporary home directory."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return AgentOrchestrator()
+
+
+def test_optional_components_are_imported_on_use():
+    """Test that importing the orchestrator loads neither numpy nor the summarizer."""
+    code = (
+        "import sys, jarvis.agent_orchestrator; "
+        "print([m for m in ('numpy', 'jarvis.memory_index', 'jarvis.summarizer') if m in sys.modules])"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
+
+
+def test_process_input_stream_commits_full_response(orchestrator, monkeypatch):
+    """Test that streamed tokens are joined into a single buffered turn."""
+    monkeypatch.setattr(
+        orchestrator.llm_engine,
+        "generate_stream",
+        lambda prompt, context, personality, **kwargs: iter(["Hello", ", ", "world"])
+    )
+    
+    tokens = list(orchestrator.process_input_stream("Hi"))
+    
+    assert tokens == ["Hello", ", ", "world"]
+    assert len(orchestrator.conversation_buffer) == 1
+    assistant_message = orchestrator.conversation_buffer.turns[0].assistant_message
+    assert assistant_message.content == "Hello, world"
+    assert assistant_message.metadata["time_to_first_token"] >= 0
+
+
+def test_process_input_stream_reports_errors(orchestrator, monkeypatch):
+    """Test that a failed stream yields an error message instead of raising."""
+    def failing_stream(prompt, context, personality, **kwargs):
+        raise ConnectionError("Ollama is down")
+        yield  # pragma: no cover
+    
+    monkeypatch.setattr(orchestrator.llm_engine, "generate_stream", failing_stream)
+    
+    tokens = list(orchestrator.process_input_stream("Hi"))
+    
+    assert tokens == ["I encountered an error: Ollama is down"]
+    assert orchestrator.conversation_buffer.turns[0].assistant_message.content == tokens[0]
+
+
+def test_reuse_context_across_turns(monkeypatch, tmp_path):
+    """Test that turns after the first reuse the carried prompt prefix."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    
+    with FakeOllamaServer() as server:
+        config = LLMConfig(endpoint=server.url, reuse_context=True)
+        orchestrator = AgentOrchestrator(config)
+        orchestrator.process_input("first question")
+        list(orchestrator.process_input_stream("second question"))
+        second = orchestrator.conversation_buffer.turns[-1].assistant_message.metadata
+        orchestrator.clear_conversation()
+        orchestrator.process_input("fresh start")
+        orchestrator.close()
+    
+    assert [path for path, _ in server.requests] == ["/api/generate"] * 3
+    assert second["prompt_eval_saved"] > 0
+    assert "context" not in server.requests[2][1]
+    assistant_message = orchestrator.conversation_buffer.turns[0].assistant_message
+    assert assistant_message.metadata["prompt_eval_saved"] == 0
+
+
+def test_process_batch_keeps_input_order_and_bounds_concurrency(orchestrator, monkeypatch):
+    """Test that batch items run in parallel up to the limit and come back in order."""
+    lock = threading.Lock()
+    active = peak = 0
+    
+    def slow_generate(prompt, context, personality, **kwargs):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01 if prompt.endswith("0") else 0.02)
+        with lock:
+            active -= 1
+        if prompt == "fail 3":
+            raise ConnectionError("Ollama is down")
+        return f"{prompt} ({len(context)} earlier)"
+    
+    monkeypatch.setattr(orchestrator.llm_engine, "generate", slow_generate)
+    
+    inputs = (f"prompt {i}" if i != 3 else "fail 3" for i in range(12))
+    results = orchestrator.process_batch(inputs, max_concurrency=3)
+    
+    assert [result.index for result in results] == list(range(12))
+    assert results[0].response == "prompt 0 (0 earlier)"
+    assert results[3].error == "Ollama is down"
+    assert not results[3].ok and all(r.ok for r in results if r.index != 3)
+    assert 1 < peak <= 3
+    assert len(orchestrator.conversation_buffer) == 0
+    assert orchestrator.metrics.turns == 12
+
+
+def test_process_batch_runs_sessions_in_order(orchestrator, monkeypatch):
+    """Test that a session item carries its own history and stops at an error."""
+    def generate(prompt, context, personality, **kwargs):
+        if prompt == "boom":
+            raise RuntimeError("bad request")
+        return f"{prompt} after {len(context)}"
+    
+    monkeypatch.setattr(orchestrator.llm_engine, "generate", generate)
+    
+    good, bad = orchestrator.process_batch([["a", "b", "c"], ["x", "boom", "never"]])
+    
+    assert good.responses == ["a after 0", "b after 2", "c after 4"]
+    assert good.total_time > 0
+    assert bad.responses == ["x after 0", "I encountered an error: bad request"]
+    assert bad.error == "bad request"
+    with pytest.raises(ValueError):
+        orchestrator.process_batch(["a"], max_concurrency=0)
+
+
+def test_iter_batch_yields_results_while_input_blocks(orchestrator, monkeypatch):
+    """Test that a finished result is not held back until the next input arrives."""
+    monkeypatch.setattr(
+        orchestrator.llm_engine, "generate", lambda prompt, context, personality, **kwargs: prompt.upper()
+    )
+    more_input = threading.Event()
+    
+    def inputs():
+        yield "first"
+        assert more_input.wait(5)
+        yield "second"
+    
+    results = orchestrator.iter_batch(inputs())
+    start = time.perf_counter()
+    assert next(results).response == "FIRST"
+    assert time.perf_counter() - start < 1
+    more_input.set()
+    assert [result.response for result in results] == ["SECOND"]
+
+
+def test_iter_batch_can_be_abandoned(orchestrator, monkeypatch):
+    """Test that closing the stream early stops reading input."""
+    monkeypatch.setattr(
+        orchestrator.llm_engine, "generate", lambda prompt, context, personality, **kwargs: prompt
+    )
+    pulled = []
+    
+    def inputs():
+        for i in range(1000):
+            pulled.append(i)
+            yield str(i)
+    
+    results = orchestrator.iter_batch(inputs(), max_concurrency=1)
+    assert next(results).response == "0"
+    results.close()
+    time.sleep(0.1)
+    assert len(pulled) < 10
+
+
+def test_cancelled_turn_keeps_partial_text(orchestrator, monkeypatch):
+    """Test that a cancelled reply is stored as truncated, not as an error."""
+    def stream(prompt, context, personality, cancel_token=None, **kwargs):
+        yield "Once upon"
+        cancel_token.cancel()
+        raise GenerationCancelled("Once upon")
+    
+    def generate(prompt, context, personality, cancel_token=None, **kwargs):
+        raise GenerationCancelled("Partial")
+    
+    monkeypatch.setattr(orchestrator.llm_engine, "generate_stream", stream)
+    monkeypatch.setattr(orchestrator.llm_engine, "generate", generate)
+    
+    tokens = list(orchestrator.process_input_stream("Tell a story", cancel_token=CancellationToken()))
+    assert tokens == ["Once upon"]
+    assert orchestrator.process_input("Again", cancel_token=CancellationToken()) == "Partial"
+    
+    for turn in orchestrator.conversation_buffer.turns:
+        assert turn.assistant_message.metadata["truncated"] is True
+        assert "error" not in turn.assistant_message.metadata
+    assert orchestrator.conversation_buffer.turns[0].assistant_message.content == "Once upon"
+    assert orchestrator.metrics.truncated == 2
+    assert orchestrator.metrics.errors == 0
+
@@ -0,0 +1,111 @@
+"""Tests for AsyncLLMEngine and AsyncAgentOrchestrator."""
+
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from jarvis.async_agent_orchestrator import AsyncAgentOrchestrator
+from jarvis.async_llm_engine import AsyncLLMEngine
+from jarvis.llm_engine import LLMConfig
+from jarvis.memory_index import MemoryIndex
+
+
+async def fake_chat(request):
+    """Echo the last user message back, streamed word by word if requested."""
+    body = await request.json()
+    words = f"echo: {body['messages'][-1]['content']}".split(" ")
+    if not body["stream"]:
+        return web.json_response({"message": {"role": "assistant", "content": " ".join(words)}, "done": True})
+    
+    response = web.StreamResponse()
+    await response.prepare(request)
+    for i, word in enumerate(words):
+        token = word if i == 0 else f" {word}"
+        await response.write((json.dumps({"message": {"content": token}, "done": False}) + "\n").encode())
+        await asyncio.sleep(0)
+    await response.write((json.dumps({"message": {"content": ""}, "done": True}) + "\n").encode())
+    return response
+
+
+@pytest_asyncio.fixture
+async def ollama_endpoint():
+    """Start a fake Ollama server and yield its base URL."""
+    app = web.Application()
+    app.router.add_post("/api/chat", fake_chat)
+    server = TestServer(app)
+    await server.start_server()
+    yield str(server.make_url("")).rstrip("/")
+    await server.close()
+
+
+@pytest.fixture
+def home(monkeypatch, tmp_path):
+    """Keep preferences out of the real home directory."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_async_engine_generate_and_stream(ollama_endpoint):
+    """Test that async generate and generate_stream agree."""
+    async with AsyncLLMEngine(LLMConfig(endpoint=ollama_endpoint)) as engine:
+        full = await engine.generate("hello there", [])
+        tokens = [token async for token in engine.generate_stream("hello there", [])]
+    
+    assert full == "echo: hello there"
+    assert "".join(tokens) == full
+    assert len(tokens) == 3
+
+
+@pytest.mark.asyncio
+async def test_async_engine_reports_connection_error():
+    """Test that an unreachable Ollama raises ConnectionError."""
+    config = LLMConfig(endpoint="http://127.0.0.1:9", max_retries=0)
+    async with AsyncLLMEngine(config) as engine:
+        with pytest.raises(ConnectionError):
+            await engine.generate("hi", [])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_conversations_share_one_engine(ollama_endpoint, home):
+    """Test that many orchestrators run concurrently on one event loop."""
+    engine = AsyncLLMEngine(LLMConfig(endpoint=ollama_endpoint))
+    orchestrators = [AsyncAgentOrchestrator(llm_engine=engine) for _ in range(50)]
+    
+    responses = await asyncio.gather(*(
+        orchestrator.process_input(f"user {i}")
+        for i, orchestrator in enumerate(orchestrators)
+    ))
+    
+    assert responses == [f"echo: user {i}" for i in range(50)]
+    assert all(len(orchestrator.conversation_buffer) == 1 for orchestrator in orchestrators)
+    await engine.close()
+
+
+@pytest.mark.asyncio
+async def test_process_input_stream_commits_turn(ollama_endpoint, home):
+    """Test that an async stream is committed to the buffer when it ends."""
+    orchestrator = AsyncAgentOrchestrator(LLMConfig(endpoint=ollama_endpoint))
+    
+    tokens = [token async for token in orchestrator.process_input_stream("ping")]
+    await orchestrator.close()
+    
+    assistant_message = orchestrator.conversation_buffer.turns[0].assistant_message
+    assert assistant_message.content == "".join(tokens) == "echo: ping"
+    assert "time_to_first_token" in assistant_message.metadata
+
+
+def test_unsupported_options_are_rejected(home, tmp_path):
+    """Test that options the async orchestrator cannot honour fail up front."""
+    with pytest.raises(ValueError, match="single endpoint"):
+        AsyncLLMEngine(LLMConfig(endpoints=["http://a:11434", "http://b:11434"]))
+    assert AsyncLLMEngine(LLMConfig(endpoints=["http://a:11434"]))._url == "http://a:11434"
+    with pytest.raises(ValueError, match="summarize_history"):
+        AsyncAgentOrchestrator(summarize_history=True)
+    index = MemoryIndex(tmp_path / "memory")
+    with pytest.raises(ValueError, match="memory_index"):
+        AsyncAgentOrchestrator(memory_index=index)
+    index.close()
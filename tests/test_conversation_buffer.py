@@ -1,7 +1,11 @@
 """Tests for ConversationBuffer."""
 
 import json
+import time
 from datetime import datetime
+
+import pytest
+
 from jarvis.conversation_buffer import ConversationBuffer
 from jarvis.models import Message
 
@@ -40,6 +44,21 @@ def test_buffer_eviction():
     assert buffer.turns[2].user_message.content == "Message 4"
 
 
+def test_eviction_callback_with_empty_buffer():
+    """Test that on_evict sees each evicted turn, and that a zero-turn buffer works."""
+    evicted = []
+    buffer = ConversationBuffer(max_turns=2)
+    buffer.on_evict = evicted.append
+    for i in range(3):
+        buffer.add_turn(Message(role="user", content=f"Message {i}"), Message(role="assistant", content="ok"))
+    assert [turn.user_message.content for turn in evicted] == ["Message 0"]
+    
+    buffer = ConversationBuffer(max_turns=0)
+    buffer.on_evict = evicted.append
+    buffer.add_turn(Message(role="user", content="hi"), Message(role="assistant", content="ok"))
+    assert len(buffer) == 0
+
+
 def test_get_context_for_llm():
     """Test formatting context for LLM."""
     buffer = ConversationBuffer(max_turns=10)
@@ -82,3 +101,90 @@ def test_clear():
     
     buffer.clear()
     assert len(buffer) == 0
+
+
+def test_from_json_round_trip():
+    """Test that an exported buffer can be loaded back."""
+    buffer = ConversationBuffer(max_turns=5)
+    user_msg = Message(role="user", content="Test")
+    assistant_msg = Message(role="assistant", content="Response", metadata={"total_time": 1.5})
+    buffer.add_turn(user_msg, assistant_msg)
+    
+    restored = ConversationBuffer.from_json(buffer.export_to_json())
+    
+    assert restored.session_id == buffer.session_id
+    assert restored.max_turns == 5
+    assert restored.get_context_for_llm() == buffer.get_context_for_llm()
+    assert restored.turns[0].assistant_message.metadata == {"total_time": 1.5}
+
+
+def test_token_budget_keeps_newest_turns_that_fit():
+    """Test that token budget mode drops the oldest turns first."""
+    buffer = ConversationBuffer(max_turns=10, max_tokens=60)
+    for i in range(5):
+        user_msg = Message(role="user", content=f"Question {i} " + "x" * 40)
+        assistant_msg = Message(role="assistant", content=f"Answer {i} " + "y" * 40)
+        buffer.add_turn(user_msg, assistant_msg)
+    
+    # Each message is roughly 16 tokens, so a turn costs about 32
+    context = buffer.get_context_for_llm()
+    assert len(context) == 2
+    assert context[0]["content"].startswith("Question 4")
+    
+    assert buffer.get_context_for_llm(reserved_tokens=40) == []
+    assert len(buffer) == 5
+
+
+def test_message_token_count_is_cached():
+    """Test that a message's token estimate is computed once."""
+    message = Message(role="user", content="a" * 40)
+    assert message.token_count == message.token_count
+    assert message._token_count is not None
+
+
+def test_context_tracks_eviction_incrementally():
+    """Test that the formatted context follows the ring buffer."""
+    buffer = ConversationBuffer(max_turns=2)
+    for i in range(4):
+        buffer.add_turn(
+            Message(role="user", content=f"Message {i}"),
+            Message(role="assistant", content=f"Response {i}")
+        )
+    
+    context = buffer.get_context_for_llm()
+    assert [message["content"] for message in context] == [
+        "Message 2", "Response 2", "Message 3", "Response 3"
+    ]
+    assert context[-1] is buffer.get_context_for_llm()[-1]
+
+
+def test_context_view_iteration_follows_the_window():
+    """Test that iterating a small window of a huge buffer stays cheap."""
+    buffer = ConversationBuffer(max_turns=200_000, max_tokens=100)
+    for i in range(200_000):
+        buffer.add_turn(Message(role="user", content=f"Q{i}"), Message(role="assistant", content=f"A{i}"))
+    context = buffer.get_context_for_llm()
+    
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        messages = list(context)
+        timings.append(time.perf_counter() - start)
+    
+    assert messages[-1]["content"] == "A199999"
+    assert messages == [context[i] for i in range(len(context))]
+    assert len(messages) < 100
+    assert min(timings) < 0.001
+
+
+def test_context_view_is_read_only_and_goes_stale():
+    """Test that the context view cannot be modified or outlive a change."""
+    buffer = ConversationBuffer(max_turns=3)
+    buffer.add_turn(Message(role="user", content="Hi"), Message(role="assistant", content="Hello"))
+    context = buffer.get_context_for_llm()
+    
+    assert not hasattr(context, "append")
+    
+    buffer.add_turn(Message(role="user", content="Again"), Message(role="assistant", content="Yes"))
+    with pytest.raises(RuntimeError):
+        list(context)
@@ -0,0 +1,102 @@
+"""Tests for the append-only conversation log."""
+
+import io
+import json
+
+import pytest
+
+from jarvis import conversation_log
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.conversation_log import ConversationLog
+from jarvis.models import Message
+
+
+def add_turns(buffer, count, start=0):
+    for i in range(start, start + count):
+        buffer.add_turn(
+            Message(role="user", content=f"question {i}"),
+            Message(role="assistant", content=f"answer {i}")
+        )
+
+
+def test_log_keeps_turns_evicted_from_buffer(tmp_path):
+    buffer = ConversationBuffer(max_turns=3, log_dir=tmp_path)
+    add_turns(buffer, 10)
+    
+    assert len(buffer) == 3
+    logged = list(buffer.log.iter_turns())
+    assert [turn.user_message.content for turn in logged] == [f"question {i}" for i in range(10)]
+    assert buffer.log.header()["session_id"] == buffer.session_id
+
+
+def test_tail_reads_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(conversation_log, "TAIL_BLOCK_SIZE", 64)
+    buffer = ConversationBuffer(max_turns=2, log_dir=tmp_path)
+    add_turns(buffer, 20)
+    
+    log = ConversationLog(buffer.session_id, tmp_path)
+    tail = log.tail(5)
+    assert [turn.user_message.content for turn in tail] == [f"question {i}" for i in range(15, 20)]
+    assert [turn.user_message.content for turn in log.tail(50)] == [
+        f"question {i}" for i in range(20)
+    ]
+
+
+def test_resume_restores_tail_and_keeps_logging(tmp_path):
+    buffer = ConversationBuffer(max_turns=4, log_dir=tmp_path)
+    add_turns(buffer, 6)
+    buffer.close()
+    
+    resumed = ConversationBuffer.resume(buffer.session_id, tmp_path, max_turns=3)
+    assert resumed.session_id == buffer.session_id
+    assert resumed.started_at == buffer.started_at
+    assert [turn.user_message.content for turn in resumed.turns] == [
+        "question 3", "question 4", "question 5"
+    ]
+    assert resumed.get_context_for_llm()[-1] == {"role": "assistant", "content": "answer 5"}
+    
+    add_turns(resumed, 1, start=6)
+    assert len(list(resumed.log.iter_turns())) == 7
+
+
+def test_resume_unknown_session(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ConversationBuffer.resume("missing", tmp_path)
+
+
+def test_export_to_file_streams_full_history(tmp_path):
+    buffer = ConversationBuffer(max_turns=2, log_dir=tmp_path)
+    add_turns(buffer, 5)
+    
+    out = io.StringIO()
+    buffer.export_to_file(out)
+    data = json.loads(out.getvalue())
+    assert data["session_id"] == buffer.session_id
+    assert len(data["turns"]) == 5
+    
+    restored = ConversationBuffer.from_json(out.getvalue())
+    assert [turn.user_message.content for turn in restored.turns] == ["question 3", "question 4"]
+
+
+def test_export_to_file_without_log_matches_export_to_json():
+    buffer = ConversationBuffer(max_turns=3)
+    add_turns(buffer, 2)
+    
+    out = io.StringIO()
+    buffer.export_to_file(out)
+    assert json.loads(out.getvalue()) == json.loads(buffer.export_to_json())
+
+
+def test_clear_starts_new_log(tmp_path):
+    buffer = ConversationBuffer(log_dir=tmp_path)
+    add_turns(buffer, 1)
+    old_path = buffer.log.path
+    
+    buffer.clear()
+    add_turns(buffer, 1)
+    
+    assert buffer.log.path != old_path
+    assert len(list(ConversationLog(buffer.session_id, tmp_path).iter_turns())) == 1
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        [old_path.name, buffer.log.path.name]
+    )
@@ -0,0 +1,194 @@
+"""Tests for chunked document ingestion and map-reduce summarization."""
+
+import hashlib
+import random
+import re
+import threading
+
+import pytest
+
+from jarvis import documents, main
+from jarvis.documents import DocumentSummarizer, iter_chunks, iter_pages
+from jarvis.llm_engine import LLMEngine
+from jarvis.response_cache import ResponseCache
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+WORDS = "cache page token summary model chunk graph vector thread memory index queue".split()
+
+
+class DigestEngine(LLMEngine):
+    """Engine that answers locally with a digest of the prompt."""
+    
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+        self.threads = []
+        self._lock = threading.Lock()
+    
+    def generate(self, prompt, context, personality=None, **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.threads.append(threading.current_thread().name)
+        return "summary " + hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def make_pages(pages=20, paragraphs=6, seed=0):
+    rng = random.Random(seed)
+    return [
+        "\n\n".join(
+            f"Paragraph {page}.{i} " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 80)))
+            for i in range(paragraphs)
+        )
+        for page in range(pages)
+    ]
+
+
+@pytest.fixture
+def summarizer(tmp_path):
+    engine = DigestEngine()
+    summarizer = DocumentSummarizer(
+        engine, cache=ResponseCache(path=tmp_path / "chunks.db"), chunk_tokens=300, fan_in=3
+    )
+    yield summarizer
+    summarizer.cache.close()
+    engine.close()
+
+
+def test_chunks_respect_budget_and_pages():
+    pages = make_pages()
+    pages[3] += "\n\n" + "x" * 5000
+    chunks = list(iter_chunks(pages, max_tokens=300))
+    
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert all(len(chunk.text) <= 300 * 4 for chunk in chunks)
+    assert chunks[0].first_page == 1 and chunks[-1].last_page == 20
+    assert all(a.last_page <= b.first_page for a, b in zip(chunks, chunks[1:]))
+    text = " ".join(" ".join(page.split()) for page in pages)
+    assert "".join(" ".join(chunk.text.split()) for chunk in chunks).replace(" ", "") == text.replace(" ", "")
+
+
+def test_chunk_boundaries_realign_after_an_edit():
+    pages = make_pages()
+    edited = list(pages)
+    edited[5] = edited[5].replace("Paragraph 5.2", "Paragraph 5.2 with a few extra words inserted", 1)
+    
+    before = {chunk.text for chunk in iter_chunks(pages, max_tokens=300)}
+    after = [chunk.text for chunk in iter_chunks(edited, max_tokens=300)]
+    
+    changed = [text for text in after if text not in before]
+    assert 1 <= len(changed) <= 3
+    assert len(after) > 20
+
+
+def test_text_files_are_read_in_pages(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("\n\n".join(make_pages(pages=10)), encoding="utf-8")
+    pages = list(iter_pages(path))
+    assert len(pages) > 1
+    assert "".join(pages) == path.read_text(encoding="utf-8")
+
+
+def test_summary_reduces_hierarchically(summarizer):
+    result = summarizer.summarize_pages(make_pages())
+    
+    assert result.summary.startswith("summary ")
+    assert result.pages == 20
+    assert result.chunks > 9
+    assert result.cached_chunks == 0
+    # Every reduction combines at most fan_in summaries into one
+    assert result.reductions >= (result.chunks - 1) // 2
+    assert len(summarizer.llm_engine.prompts) == result.chunks + result.reductions
+    reduce_prompts = [p for p in summarizer.llm_engine.prompts if "consecutive parts" in p]
+    assert all(len(re.findall(r"summary [0-9a-f]{12}", p)) <= 3 for p in reduce_prompts)
+
+
+def test_reductions_run_on_the_worker_pool(summarizer):
+    result = summarizer.summarize_pages(make_pages())
+    
+    engine = summarizer.llm_engine
+    reduce_threads = [
+        thread for prompt, thread in zip(engine.prompts, engine.threads) if "consecutive parts" in prompt
+    ]
+    assert len(reduce_threads) == result.reductions
+    assert all(thread.startswith("jarvis-doc") for thread in reduce_threads)
+
+
+def test_default_cache_holds_the_whole_document(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(documents, "CHUNK_CACHE_ENTRIES", 5)
+    engine = DigestEngine()
+    summarizer = DocumentSummarizer(engine, chunk_tokens=300, fan_in=3)
+    pages = make_pages()
+    try:
+        first = summarizer.summarize_pages(pages)
+        assert first.chunks > 5
+        engine.prompts.clear()
+        second = summarizer.summarize_pages(pages)
+    finally:
+        summarizer.close()
+        engine.close()
+    
+    assert second.cached_chunks == second.chunks
+    assert engine.prompts == []
+
+
+def test_resummarizing_an_edit_only_pays_for_changed_chunks(summarizer):
+    pages = make_pages()
+    first = summarizer.summarize_pages(pages)
+    assert summarizer.summarize_pages(pages).summary == first.summary
+    
+    engine = summarizer.llm_engine
+    engine.prompts.clear()
+    pages[12] = pages[12].replace("Paragraph 12.3", "Paragraph 12.3 revised", 1)
+    result = summarizer.summarize_pages(pages)
+    
+    assert result.summary != first.summary
+    assert result.chunks - result.cached_chunks <= 3
+    chunk_prompts = [p for p in engine.prompts if "consecutive parts" not in p]
+    assert len(chunk_prompts) == result.chunks - result.cached_chunks
+
+
+def test_pages_are_consumed_lazily(summarizer):
+    pulled = 0
+    pulled_at_first_call = []
+    generate = summarizer.llm_engine.generate
+    
+    def pages():
+        nonlocal pulled
+        for page in make_pages(pages=40):
+            pulled += 1
+            yield page
+    
+    def recording_generate(prompt, context, **kwargs):
+        pulled_at_first_call.append(pulled)
+        return generate(prompt, context, **kwargs)
+    
+    summarizer.llm_engine.generate = recording_generate
+    result = summarizer.summarize_pages(pages())
+    
+    assert result.pages == 40
+    assert pulled_at_first_call[0] < 10
+
+
+def test_empty_document_is_rejected(summarizer):
+    with pytest.raises(ValueError):
+        summarizer.summarize_pages(["", "  \n\n  "])
+
+
+def test_summarize_command(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    path = tmp_path / "lecture.txt"
+    path.write_text("\n\n".join(make_pages(pages=3)), encoding="utf-8")
+    
+    with FakeOllamaServer(reply=lambda prompt: "A short summary.") as server:
+        argv = ["--endpoint", server.url, "summarize", str(path), "--chunk-tokens", "200"]
+        assert main.main(argv) == 0
+        requests_made = len(server.requests)
+        assert main.main(argv) == 0
+        # Every summary of the second run, reductions included, comes from the cache
+        assert len(server.requests) == requests_made
+    
+    captured = capsys.readouterr()
+    assert captured.out == "A short summary.\nA short summary.\n"
+    assert "cached" in captured.err
+    assert main.main(["summarize", str(tmp_path / "missing.txt")]) == 1
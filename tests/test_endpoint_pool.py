@@ -0,0 +1,138 @@
+"""Tests for balancing and failover across several Ollama endpoints."""
+
+import time
+
+import pytest
+
+from jarvis.endpoint_pool import CLOSED, HALF_OPEN, OPEN, EndpointPool
+from jarvis.llm_engine import LLMConfig, LLMEngine
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+DEAD_URL = "http://127.0.0.1:9"
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_pool_prefers_least_loaded_and_fastest():
+    pool = EndpointPool(["http://a", "http://b"])
+    a, b = pool.endpoints
+    
+    assert pool.acquire() is a
+    assert pool.acquire() is b
+    pool.release(a, latency=1.0)
+    pool.release(b, latency=0.1)
+    
+    # b is ten times faster, so it wins until it has far more in flight
+    chosen = [pool.acquire() for _ in range(10)]
+    assert chosen.count(b) == 9
+    assert pool.acquire(exclude=[a, b]) is None
+
+
+def test_breaker_opens_after_failures_and_recovers_through_trial():
+    pool = EndpointPool(["http://a", "http://b"], failure_threshold=2, reset_timeout=0.05)
+    a, b = pool.endpoints
+    
+    for _ in range(2):
+        pool.release(pool.acquire(exclude=[b]), failed=True)
+    assert a.state == OPEN
+    assert [pool.acquire() for _ in range(3)] == [b, b, b]
+    
+    time.sleep(0.06)
+    assert pool.acquire() is a
+    assert a.state == HALF_OPEN
+    assert pool.acquire() is b
+    pool.release(a, latency=0.01)
+    assert a.state == CLOSED
+    
+    pool.report_health(b, False)
+    assert b.state == OPEN
+    pool.report_health(b, True)
+    assert b.state == CLOSED
+
+
+def test_all_open_still_tries_the_oldest_failure():
+    pool = EndpointPool(["http://a"], failure_threshold=1, reset_timeout=60)
+    endpoint = pool.endpoints[0]
+    pool.release(pool.acquire(), failed=True)
+    assert endpoint.state == OPEN
+    assert pool.acquire() is endpoint
+
+
+def test_engine_fails_over_from_dead_endpoint():
+    with FakeOllamaServer() as server:
+        config = LLMConfig(
+            endpoints=[DEAD_URL, server.url],
+            failure_threshold=1,
+            health_check_interval=0
+        )
+        with LLMEngine(config) as engine:
+            metadata = {}
+            assert engine.generate("hi", [], metadata=metadata) == "echo: hi"
+            assert metadata["endpoint"] == server.url
+            dead = engine.pool.endpoints[0]
+            assert dead.state == OPEN
+            
+            # With the breaker open, the dead endpoint is not even tried
+            start = time.perf_counter()
+            assert "".join(engine.generate_stream("again", [])) == "echo: again"
+            assert time.perf_counter() - start < 0.5
+            assert dead.requests == 1
+            assert all(endpoint.outstanding == 0 for endpoint in engine.pool.endpoints)
+
+
+def test_gateway_errors_fail_over():
+    with FakeOllamaServer(error_rate=1.0, error_status=503) as failing, FakeOllamaServer() as healthy:
+        config = LLMConfig(endpoints=[failing.url, healthy.url], health_check_interval=0)
+        with LLMEngine(config) as engine:
+            assert [engine.generate(f"q{i}", []) for i in range(3)] == ["echo: q0", "echo: q1", "echo: q2"]
+            assert engine.pool.endpoints[0].state == OPEN
+            assert len(failing.requests) == 3
+
+
+def test_health_checks_take_down_endpoint_out_of_rotation():
+    first, second = FakeOllamaServer().start(), FakeOllamaServer().start()
+    config = LLMConfig(endpoints=[first.url, second.url], health_check_interval=0.02)
+    with LLMEngine(config) as engine:
+        second.stop()
+        assert wait_for(lambda: engine.pool.endpoints[1].state == OPEN)
+        for _ in range(3):
+            engine.generate("hi", [])
+        assert len(first.requests) == 3
+    first.stop()
+
+
+def test_load_model_warms_every_endpoint():
+    with FakeOllamaServer() as first, FakeOllamaServer() as second:
+        config = LLMConfig(endpoints=[first.url, DEAD_URL, second.url], health_check_interval=0)
+        with LLMEngine(config) as engine:
+            engine.load_model()
+            assert first.is_loaded("mistral:7b") and second.is_loaded("mistral:7b")
+            assert engine.pool.endpoints[1].state == OPEN
+            assert engine.check_availability()
+
+
+def test_slow_request_is_hedged_to_second_endpoint():
+    with FakeOllamaServer(first_token_delay=1.0) as slow, FakeOllamaServer() as fast:
+        config = LLMConfig(endpoints=[slow.url, fast.url], hedge_after=0.05, health_check_interval=0)
+        with LLMEngine(config) as engine:
+            metadata = {}
+            start = time.perf_counter()
+            assert engine.generate("hi", [], metadata=metadata) == "echo: hi"
+            assert time.perf_counter() - start < 0.8
+            assert metadata["hedged"] is True
+            assert metadata["endpoint"] == fast.url
+            assert len(slow.requests) == 1
+            
+            slow_endpoint = engine.pool.endpoints[0]
+            assert wait_for(lambda: slow_endpoint.outstanding == 0)
+            assert slow_endpoint.state == CLOSED
+
+
+def test_pool_requires_endpoints():
+    with pytest.raises(ValueError):
+        EndpointPool([])
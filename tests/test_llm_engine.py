@@ -0,0 +1,236 @@
+"""Tests for LLMEngine."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from jarvis.llm_engine import (
+    CancellationToken,
+    GenerationCancelled,
+    LLMConfig,
+    LLMEngine,
+    PromptCache
+)
+from jarvis.models import PersonalityConfig
+from jarvis.testing.fake_ollama import FakeOllamaServer, tokenize
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+    
+    status_code = 200
+    
+    def __init__(self, chunks):
+        self.lines = [json.dumps(chunk).encode() for chunk in chunks]
+        self.closed = False
+    
+    def raise_for_status(self):
+        pass
+    
+    def iter_lines(self):
+        yield from self.lines
+    
+    def close(self):
+        self.closed = True
+
+
+def test_format_prompt_with_personality():
+    """Test that the system prompt precedes context and user input."""
+    engine = LLMEngine()
+    context = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}]
+    messages = engine.format_prompt("Next", context, PersonalityConfig())
+    
+    assert messages[0]["role"] == "system"
+    assert messages[1:3] == context
+    assert messages[-1] == {"role": "user", "content": "Next"}
+
+
+def test_generate_stream_yields_tokens(monkeypatch):
+    """Test that streamed chunks are yielded in order until done."""
+    response = FakeResponse([
+        {"message": {"content": "Hel"}, "done": False},
+        {"message": {"content": "lo"}, "done": False},
+        {"message": {"content": ""}, "done": True},
+    ])
+    calls = []
+    
+    def fake_post(url, **kwargs):
+        calls.append(kwargs)
+        return response
+    
+    engine = LLMEngine()
+    monkeypatch.setattr(engine.session, "post", fake_post)
+    
+    tokens = list(engine.generate_stream("Hi", []))
+    
+    assert tokens == ["Hel", "lo"]
+    assert calls[0]["json"]["stream"] is True
+    assert response.closed
+
+
+def test_generate_stream_raises_on_error_chunk(monkeypatch):
+    """Test that an error chunk from Ollama surfaces as RuntimeError."""
+    response = FakeResponse([{"error": "model not found"}])
+    engine = LLMEngine()
+    monkeypatch.setattr(engine.session, "post", lambda url, **kwargs: response)
+    
+    with pytest.raises(RuntimeError, match="model not found"):
+        list(engine.generate_stream("Hi", []))
+
+
+def test_session_uses_configured_pool_and_timeouts(monkeypatch):
+    """Test that the pooled session honours connection settings."""
+    config = LLMConfig(pool_size=4, max_retries=3, connect_timeout=1.5, read_timeout=60)
+    calls = []
+    
+    def fake_post(url, **kwargs):
+        calls.append(kwargs)
+        return FakeResponse([{"message": {"content": "ok"}, "done": True}])
+    
+    with LLMEngine(config) as engine:
+        adapter = engine.session.get_adapter(config.endpoint)
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.connect == 3
+        
+        monkeypatch.setattr(engine.session, "post", fake_post)
+        list(engine.generate_stream("Hi", []))
+    
+    assert calls[0]["timeout"] == (1.5, 60)
+
+
+def test_disabling_keep_alive_closes_connections():
+    """Test that http_keep_alive=False asks the server to close connections."""
+    engine = LLMEngine(LLMConfig(http_keep_alive=False))
+    assert engine.session.headers["Connection"] == "close"
+    engine.close()
+
+
+def test_reuse_context_only_prefills_new_message():
+    """Test that carried context spares re-evaluating earlier turns."""
+    personality = PersonalityConfig()
+    cache = PromptCache()
+    context = []
+    
+    with FakeOllamaServer() as server:
+        config = LLMConfig(endpoint=server.url, reuse_context=True, keep_alive="30m")
+        with LLMEngine(config) as engine:
+            first = {}
+            reply = engine.generate("what is a heap", context, personality, cache, first)
+            context = [{"role": "user", "content": "what is a heap"}, {"role": "assistant", "content": reply}]
+            
+            second = {}
+            tokens = list(engine.generate_stream("and a stack", context, personality, cache, second))
+    
+    (first_path, first_payload), (second_path, second_payload) = server.requests
+    assert first_path == second_path == "/api/generate"
+    assert "system" in first_payload and "system" not in second_payload
+    assert second_payload["keep_alive"] == "30m"
+    
+    assert "".join(tokens) == "echo: and a stack"
+    assert second["prompt_eval_saved"] == len(second_payload["context"]) > 0
+    assert second["prompt_eval_count"] == len(tokenize("and a stack"))
+    assert cache.tokens_saved == second["prompt_eval_saved"]
+
+
+def test_reuse_context_falls_back_to_chat_for_existing_history():
+    """Test that a conversation with history but no carried state uses /api/chat."""
+    context = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    
+    with FakeOllamaServer() as server:
+        with LLMEngine(LLMConfig(endpoint=server.url, reuse_context=True)) as engine:
+            engine.generate("again", context, PersonalityConfig(), PromptCache())
+    
+    assert server.requests[0][0] == "/api/chat"
+
+
+def test_personality_change_resets_prompt_cache():
+    """Test that a new system prompt invalidates carried context."""
+    cache = PromptCache()
+    cache.context = [1, 2, 3]
+    cache.system_prompt = "old prompt"
+    
+    with FakeOllamaServer() as server:
+        with LLMEngine(LLMConfig(endpoint=server.url, reuse_context=True)) as engine:
+            engine.generate("hi", [], PersonalityConfig(tone="mentor"), cache)
+    
+    path, payload = server.requests[0]
+    assert path == "/api/generate"
+    assert "context" not in payload
+    assert cache.system_prompt.startswith("You are a patient")
+
+
+def test_cancel_closes_stream_and_keeps_partial_text():
+    """Test that cancelling stops the stream and reports the text so far."""
+    reply = " ".join(f"w{i}" for i in range(200))
+    with FakeOllamaServer(reply=lambda prompt: reply, token_delay=0.01) as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        token = CancellationToken()
+        received = []
+        with pytest.raises(GenerationCancelled) as cancelled:
+            for fragment in engine.generate_stream("go", [], cancel_token=token):
+                received.append(fragment)
+                if len(received) == 5:
+                    token.cancel()
+        
+        assert cancelled.value.partial == "".join(received) == "w0 w1 w2 w3 w4"
+        assert not engine.busy
+        
+        # The server notices the hang-up and stops generating
+        deadline = time.monotonic() + 5
+        while not server.aborted_streams and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert server.aborted_streams == 1
+        engine.close()
+
+
+def test_cancel_does_not_wait_for_the_next_token():
+    """Test that a cancel interrupts a read blocked waiting for Ollama."""
+    with FakeOllamaServer(reply=lambda prompt: "slow reply", first_token_delay=3.0) as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        token = CancellationToken()
+        threading.Timer(0.2, token.cancel).start()
+        start = time.monotonic()
+        with pytest.raises(GenerationCancelled) as cancelled:
+            engine.generate("go", [], cancel_token=token)
+        assert time.monotonic() - start < 1.0
+        assert cancelled.value.partial == ""
+        
+        # Between tokens as well
+        server.first_token_delay = 0.0
+        server.token_delay = 1.0
+        token = CancellationToken()
+        with pytest.raises(GenerationCancelled) as cancelled:
+            for _ in engine.generate_stream("go", [], cancel_token=token):
+                start = time.monotonic()
+                threading.Timer(0.2, token.cancel).start()
+        assert time.monotonic() - start < 0.7
+        assert cancelled.value.partial == "slow"
+        engine.close()
+
+
+def test_generate_with_token_can_be_cancelled_from_another_thread():
+    """Test that a blocking generate call returns early when cancelled."""
+    long_reply = " ".join(["word"] * 500)
+    reply = lambda prompt: long_reply if prompt == "go" else "ok"
+    with FakeOllamaServer(reply=reply, token_delay=0.01) as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        token = CancellationToken()
+        threading.Timer(0.1, token.cancel).start()
+        start = time.monotonic()
+        with pytest.raises(GenerationCancelled) as cancelled:
+            engine.generate("go", [], cancel_token=token)
+        assert time.monotonic() - start < 2
+        assert len(cancelled.value.partial) < len(long_reply)
+        
+        # An already-cancelled token never reaches the server
+        requests_before = len(server.requests)
+        with pytest.raises(GenerationCancelled):
+            engine.generate("go", [], cancel_token=token)
+        assert len(server.requests) == requests_before
+        
+        # An uncancelled token behaves like a plain request
+        assert engine.generate("hi", [], cancel_token=CancellationToken()) == "ok"
+        engine.close()
+
@@ -0,0 +1,41 @@
+"""Smoke tests for the load benchmark harness."""
+
+import json
+
+from benchmarks import load
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert load.percentile(values, 50) == 2.5
+    assert load.percentile(values, 100) == 4.0
+    assert load.percentile([], 99) == 0.0
+
+
+def test_run_level_counts_injected_errors(tmp_path):
+    with FakeOllamaServer(error_rate=0.3, stream_error_rate=0.3, seed=1) as server:
+        result = load.run_level(server.url, concurrency=2, turns=20, preferences_dir=tmp_path)
+    assert result["turns"] == 20
+    assert 0 < result["errors"] < 20
+    assert result["latency_s"]["p50"] <= result["latency_s"]["p99"]
+    assert result["rss_peak_bytes"] > 0
+
+
+def test_main_writes_json_report(tmp_path):
+    output = tmp_path / "load.json"
+    load.main([
+        "--concurrency", "1", "2",
+        "--turns", "4",
+        "--token-delay", "0",
+        "--first-token-delay", "0",
+        "--load-delay", "0.2",
+        "--no-stream",
+        "--output", str(output)
+    ])
+    report = json.loads(output.read_text())
+    assert report["benchmark"] == "load"
+    assert [level["concurrency"] for level in report["results"]] == [1, 2]
+    assert all(level["errors"] == 0 for level in report["results"])
+    assert report["results"][0]["turns_per_second"] > 0
+    assert report["first_turn_s"]["cold"] >= 0.2 > report["first_turn_s"]["warm"]
@@ -0,0 +1,100 @@
+"""Tests for the non-interactive command-line modes."""
+
+import io
+import json
+import subprocess
+import sys
+
+import pytest
+
+from jarvis import main
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+
+@pytest.fixture(autouse=True)
+def home(monkeypatch, tmp_path):
+    """Keep preferences in a temporary home directory."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+
+def test_one_shot_prints_reply(capsys):
+    with FakeOllamaServer() as server:
+        status = main.main(["--endpoint", server.url, "--model", "qwen2:7b", "-p", "hello there"])
+    
+    assert status == 0
+    assert capsys.readouterr().out == "echo: hello there\n"
+    assert server.requests[-1][1]["model"] == "qwen2:7b"
+
+
+def test_one_shot_json_and_errors(capsys):
+    with FakeOllamaServer() as server:
+        assert main.main(["--endpoint", server.url, "-p", "hi", "--json"]) == 0
+    record = json.loads(capsys.readouterr().out)
+    assert record["response"] == "echo: hi"
+    assert record["error"] is None
+    assert record["metadata"]["eval_count"] == 2
+    
+    assert main.main(["--endpoint", "http://127.0.0.1:9", "-p", "hi"]) == 1
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "Cannot connect" in captured.err
+
+
+def test_pipe_writes_jsonl_in_input_order(monkeypatch, capsys):
+    lines = [f"prompt {i}" for i in range(8)]
+    lines[2] = ""
+    lines[3] = json.dumps({"id": "abc", "prompt": "tagged"})
+    lines[4] = json.dumps({"prompt": ["first", "second"]})
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+    
+    with FakeOllamaServer(token_delay=0.001) as server:
+        status = main.main(["--endpoint", server.url, "pipe", "--concurrency", "3"])
+    
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert status == 0
+    assert [record["index"] for record in records] == list(range(7))
+    assert records[0]["response"] == "echo: prompt 0"
+    assert records[2]["id"] == "abc"
+    assert records[2]["response"] == "echo: tagged"
+    assert records[3]["responses"] == ["echo: first", "echo: second"]
+    assert all(record["error"] is None for record in records)
+    assert records[-1]["metadata"]["total_time"] > 0
+
+
+def test_pipe_reports_failures_per_line(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("a\nb\nc\n"))
+    with FakeOllamaServer(error_rate=0.5, seed=3) as server:
+        status = main.main(["--endpoint", server.url, "pipe"])
+    
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert len(records) == 3
+    assert status == 1
+    assert any(record["error"] for record in records)
+
+
+def test_serve_closes_its_engine(monkeypatch, tmp_path):
+    from jarvis import server
+    from jarvis.llm_engine import LLMEngine
+    
+    closed = []
+    monkeypatch.setattr(LLMEngine, "close", lambda self: closed.append(self))
+    monkeypatch.setattr(server, "serve", lambda host, port, sessions: sessions.close())
+    
+    with FakeOllamaServer() as fake:
+        main.main(["--endpoint", fake.url, "--no-warmup", "serve", "--spill-dir", str(tmp_path)])
+    
+    assert len(closed) == 1
+
+
+def test_read_pipe_requests_falls_back_to_text():
+    requests = list(main.read_pipe_requests(iter(["{not json\n", '{"other": 1}\n', "  \n", "x\r\n"])))
+    assert requests == [{"prompt": "{not json"}, {"prompt": '{"other": 1}'}, {"prompt": "x"}]
+
+
+def test_import_is_lazy():
+    code = (
+        "import sys, jarvis.main; "
+        "print(sorted(m for m in sys.modules if m.startswith(('jarvis.', 'requests', 'numpy'))))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "['jarvis.main']"
@@ -0,0 +1,183 @@
+"""Tests for the long-term memory index."""
+
+import time
+
+import numpy as np
+import pytest
+
+from jarvis.agent_orchestrator import AgentOrchestrator
+from jarvis.llm_engine import LLMConfig, LLMEngine
+from jarvis.memory_index import HashingEmbedder, MemoryIndex, OllamaEmbedder
+from jarvis.models import ConversationTurn, Message
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+
+class CountingEmbedder(HashingEmbedder):
+    """HashingEmbedder that records the size of every batch."""
+    
+    def __init__(self, dim=64):
+        super().__init__(dim)
+        self.batches = []
+    
+    def embed(self, texts):
+        self.batches.append(len(texts))
+        return super().embed(texts)
+
+
+class RandomEmbedder:
+    """Embedder producing random vectors, for filling a large index quickly."""
+    
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.rng = np.random.default_rng(0)
+    
+    def embed(self, texts):
+        return self.rng.standard_normal((len(texts), self.dim)).astype(np.float32)
+
+
+def make_turn(user, assistant="ok"):
+    return ConversationTurn(
+        user_message=Message(role="user", content=user),
+        assistant_message=Message(role="assistant", content=assistant)
+    )
+
+
+def test_search_finds_relevant_turn(tmp_path):
+    index = MemoryIndex(tmp_path, HashingEmbedder(), batch_size=1)
+    index.add(make_turn("my cat is called Miso", "What a lovely name!"), "s1")
+    index.add(make_turn("how do I reverse a list in python", "Use reversed()"), "s1")
+    index.add(make_turn("what is the capital of France", "Paris"), "s1")
+    index.flush()
+    
+    results = index.search("what is my cat called")
+    assert results[0][1]["user"] == "my cat is called Miso"
+    assert results[0][1]["assistant"] == "What a lovely name!"
+    assert all(score >= index.min_score for score, _ in results)
+    index.close()
+
+
+def test_turns_are_embedded_in_batches(tmp_path):
+    embedder = CountingEmbedder()
+    index = MemoryIndex(tmp_path, embedder, batch_size=4)
+    for i in range(10):
+        index.add(make_turn(f"question {i}"), "s1")
+    
+    index.flush()
+    assert embedder.batches == [4, 4, 2]
+    assert len(index) == 10
+    index.close()
+
+
+def test_index_persists_and_grows(tmp_path):
+    index = MemoryIndex(tmp_path, CountingEmbedder(), batch_size=8, initial_capacity=4)
+    for i in range(20):
+        index.add(make_turn(f"note number {i} about topic{i}"), "s1")
+    index.close()
+    
+    reopened = MemoryIndex(tmp_path, CountingEmbedder(), initial_capacity=4)
+    assert len(reopened) == 20
+    assert reopened.search("topic17")[0][1]["user"] == "note number 17 about topic17"
+    reopened.close()
+    
+    with pytest.raises(ValueError):
+        MemoryIndex(tmp_path, HashingEmbedder(dim=32))
+
+
+def test_query_at_100k_turns_is_fast(tmp_path):
+    # nomic-embed-text's dimension; a query reads all 300 MB of vectors
+    index = MemoryIndex(tmp_path, RandomEmbedder(dim=768), batch_size=10_000, min_score=-1.0)
+    for i in range(100_000):
+        index.add(make_turn(f"turn {i}"), "s1")
+    index.flush()
+    assert len(index) == 100_000
+    
+    index.search("warm up", k=5)
+    timings = []
+    for _ in range(10):
+        start = time.perf_counter()
+        results = index.search("query", k=5)
+        timings.append(time.perf_counter() - start)
+    
+    assert len(results) == 5
+    # About 25 ms on a laptop; allow for a slower, shared machine
+    assert min(timings) < 0.06
+    index.close()
+
+
+def test_embedding_failures_do_not_fail_turns(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    
+    class FailingEmbedder(HashingEmbedder):
+        failing = True
+        
+        def embed(self, texts):
+            if self.failing:
+                raise ConnectionError("embedding model unavailable")
+            return super().embed(texts)
+    
+    embedder = FailingEmbedder()
+    index = MemoryIndex(tmp_path / "memory", embedder, batch_size=2, max_pending=5)
+    orchestrator = AgentOrchestrator(memory_index=index)
+    monkeypatch.setattr(
+        orchestrator.llm_engine, "generate", lambda prompt, context, personality, **kwargs: "ok"
+    )
+    
+    for i in range(8):
+        assert orchestrator.process_input(f"turn {i}") == "ok"
+    with pytest.raises(ConnectionError):
+        index.flush()
+    assert index.error == "embedding model unavailable"
+    assert len(orchestrator.conversation_buffer) == 8
+    
+    orchestrator.close()
+    embedder.failing = False
+    index.close()
+    reopened = MemoryIndex(tmp_path / "memory", HashingEmbedder())
+    # Only the newest max_pending turns were kept
+    assert len(reopened) == 5
+    assert reopened.search("turn 7", k=1)[0][1]["user"] == "turn 7"
+    reopened.close()
+
+
+def test_orchestrator_recalls_turns_outside_window(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    with FakeOllamaServer() as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        index = MemoryIndex(tmp_path / "memory", OllamaEmbedder(engine), batch_size=1)
+        orchestrator = AgentOrchestrator(llm_engine=engine, memory_index=index, memory_top_k=1)
+        orchestrator.conversation_buffer.max_turns = 2
+        
+        orchestrator.process_input("my favourite colour is teal")
+        orchestrator.process_input("tell me a joke")
+        orchestrator.process_input("what is the weather like")
+        index.flush()
+        orchestrator.process_input("which colour is my favourite")
+        
+        chats = [payload for path, payload in server.requests if path == "/api/chat"]
+        recalled = chats[-1]["messages"][1]
+        assert recalled["role"] == "system"
+        assert "my favourite colour is teal" in recalled["content"]
+        assert "/api/embed" in [path for path, _ in server.requests]
+        
+        orchestrator.close()
+        engine.close()
+        index.close()
+
+
+def test_turns_in_window_are_not_recalled(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    with FakeOllamaServer() as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        index = MemoryIndex(tmp_path / "memory", HashingEmbedder(), batch_size=1)
+        orchestrator = AgentOrchestrator(llm_engine=engine, memory_index=index)
+        
+        orchestrator.process_input("my favourite colour is teal")
+        index.flush()
+        orchestrator.process_input("which colour is my favourite")
+        
+        _, payload = server.requests[-1]
+        assert [m["role"] for m in payload["messages"]] == ["system", "user", "assistant", "user"]
+        
+        orchestrator.close()
+        engine.close()
+        index.close()
@@ -0,0 +1,107 @@
+"""Tests for per-turn metrics."""
+
+import threading
+import urllib.request
+
+from jarvis.agent_orchestrator import AgentOrchestrator
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.llm_engine import LLMConfig, LLMEngine
+from jarvis.metrics import Histogram, MetricsRegistry
+from jarvis.preference_manager import PreferenceManager
+from jarvis.server import JarvisServer
+from jarvis.session_manager import SessionManager
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = Histogram("latency_seconds", "Latency", (0.1, 1.0), window=3)
+    for value in (0.05, 0.5, 0.7, 2.0):
+        histogram.observe(value)
+    
+    # Percentiles follow the rolling window, buckets are cumulative
+    assert list(histogram.recent) == [0.5, 0.7, 2.0]
+    assert histogram.percentile(50) == 0.7
+    assert histogram.percentile(99) == 2.0
+    lines = histogram.to_prometheus()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_count 4" in lines
+    assert Histogram("empty", "Empty", (1,)).percentile(50) is None
+
+
+def test_registry_counts_turns_errors_and_models():
+    registry = MetricsRegistry()
+    registry.observe_turn({"total_time": 0.2, "model": "tiny", "cache": "hit"})
+    registry.observe_turn({"total_time": 0.4, "model": "tiny", "error": "boom"})
+    
+    assert (registry.turns, registry.errors, registry.cache_hits) == (2, 1, 1)
+    text = registry.to_prometheus()
+    assert "jarvis_turns_total 2" in text
+    assert 'jarvis_model_turns_total{model="tiny"} 2' in text
+    assert "jarvis_turn_seconds_count 2" in text
+    stats = registry.format_stats()
+    assert "total_time" in stats
+    assert "eval_duration" not in stats
+
+
+def test_engine_records_timings():
+    with FakeOllamaServer(token_delay=0.001, first_token_delay=0.01) as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        for stream in (False, True):
+            metadata = {}
+            if stream:
+                list(engine.generate_stream("hello there", [], metadata=metadata))
+            else:
+                engine.generate("hello there", [], metadata=metadata)
+            for key in ("prepare_time", "http_time", "eval_duration", "prompt_eval_duration"):
+                assert metadata[key] > 0, key
+            assert metadata["eval_count"] > 0
+            assert metadata["tokens_per_second"] > 0
+        engine.close()
+
+
+def test_orchestrator_observes_each_turn(tmp_path):
+    with FakeOllamaServer(error_rate=1.0) as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url, max_retries=0))
+        orchestrator = AgentOrchestrator(
+            llm_engine=engine,
+            conversation_buffer=ConversationBuffer(),
+            preference_manager=PreferenceManager(config_dir=tmp_path)
+        )
+        orchestrator.process_input("hello")
+        server.error_rate = 0.0
+        orchestrator.process_input("hello again")
+        orchestrator.close()
+        engine.close()
+    
+    metrics = orchestrator.metrics
+    assert (metrics.turns, metrics.errors) == (2, 1)
+    assert metrics.histograms["total_time"].count == 2
+
+
+def test_server_exposes_prometheus_metrics(tmp_path):
+    with FakeOllamaServer() as server:
+        manager = SessionManager(
+            llm_engine=LLMEngine(LLMConfig(endpoint=server.url)),
+            preference_manager=PreferenceManager(config_dir=tmp_path / "config"),
+            spill_dir=tmp_path / "sessions"
+        )
+        session_id = manager.create_session()
+        with manager.use(session_id) as orchestrator:
+            orchestrator.process_input("hello")
+        
+        httpd = JarvisServer(("127.0.0.1", 0), manager)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            url = f"http://127.0.0.1:{httpd.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                assert response.headers["Content-Type"].startswith("text/plain")
+                body = response.read().decode()
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            manager.close()
+    
+    assert "jarvis_turns_total 1" in body
+    assert "# TYPE jarvis_http_seconds histogram" in body
@@ -0,0 +1,57 @@
+"""Smoke tests for the microbenchmark harness and its regression gate."""
+
+import json
+
+from benchmarks import micro
+
+
+def test_message_sizes_are_reproducible():
+    sizes = micro.message_sizes(50, max_chars=300)
+    assert sizes == micro.message_sizes(50, max_chars=300)
+    assert len(set(sizes)) > 10
+    assert all(1 <= size <= 300 for size in sizes)
+
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = {"results": [
+        {"name": "fast", "seconds": 1e-3},
+        {"name": "noisy", "seconds": 1e-3},
+        {"name": "tiny", "seconds": 100e-9}
+    ]}
+    results = [
+        {"name": "fast", "seconds": 1.5e-3},
+        {"name": "noisy", "seconds": 1.5e-3, "threshold": 1.0},
+        {"name": "tiny", "seconds": 300e-9},
+        {"name": "new", "seconds": 1.0}
+    ]
+    regressions = micro.compare(results, baseline, threshold=0.25)
+    assert [regression["name"] for regression in regressions] == ["fast"]
+    assert regressions[0]["change"] == 0.5
+
+
+def test_main_records_baseline_and_fails_on_regression(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    argv = ["--scales", "10", "--repeat", "1", "-k", "buffer.", "--baseline", str(baseline)]
+    
+    assert micro.main(argv + ["--update-baseline"]) == 0
+    report = json.loads(baseline.read_text())
+    assert report["benchmark"] == "micro"
+    assert [result["name"] for result in report["results"]] == [
+        "buffer.add_turn[10]",
+        "buffer.get_context_for_llm[10]",
+        "buffer.get_context_for_llm_budget[10]",
+        "buffer.export_to_json[10]"
+    ]
+    
+    assert micro.main(argv + ["--threshold", "100"]) == 0
+    
+    assert "warning" not in capsys.readouterr().err
+    
+    for result in report["results"]:
+        result["seconds"] /= 1000
+    report["platform"] = "Other-1.0"
+    baseline.write_text(json.dumps(report))
+    assert micro.main(argv) == 1
+    err = capsys.readouterr().err
+    assert "REGRESSION buffer.export_to_json[10]" in err
+    assert "recorded on Other-1.0" in err
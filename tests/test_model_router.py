@@ -0,0 +1,78 @@
+"""Tests for ModelRouter."""
+
+import pytest
+
+from jarvis.llm_engine import LLMConfig, LLMEngine
+from jarvis.model_router import ModelProfile, ModelRouter
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+MODELS = [
+    ModelProfile("tiny", quality=1, max_context_tokens=2048, tokens_per_second=120),
+    ModelProfile("medium", quality=2, max_context_tokens=8192, tokens_per_second=50),
+    ModelProfile("large", quality=3, max_context_tokens=32768, tokens_per_second=15)
+]
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("thanks!", "trivial"),
+    ("what's 2^10", "trivial"),
+    ("What is the capital of Peru?", "standard"),
+    ("Please refactor this function to use a generator", "complex"),
+    ("```python\nprint(1)\n```", "complex")
+])
+def test_classify(prompt, expected):
+    assert ModelRouter.classify(prompt) == expected
+
+
+def test_route_matches_model_to_prompt():
+    router = ModelRouter(MODELS)
+    assert router.route("thanks", 100)[0] == "tiny"
+    assert router.route("What is the capital of Peru?", 100)[0] == "medium"
+    assert router.route("Implement a binary search tree in Python", 100)[0] == "large"
+
+
+def test_speed_weight_trades_quality_for_speed():
+    prompt = "Implement a binary search tree in Python"
+    assert ModelRouter(MODELS, speed_weight=0.0).route(prompt, 100)[0] == "large"
+    assert ModelRouter(MODELS, speed_weight=1.0).route(prompt, 100)[0] == "tiny"
+    assert ModelRouter(MODELS, speed_weight=0.0).route("thanks", 100)[0] == "large"
+    
+    with pytest.raises(ValueError):
+        ModelRouter(MODELS, speed_weight=2.0)
+
+
+def test_route_skips_models_whose_context_is_too_small():
+    router = ModelRouter(MODELS)
+    assert router.route("thanks", 5000)[0] == "medium"
+    model, reason = router.route("thanks", 100_000)
+    assert model == "large"
+    assert "largest context window" in reason
+
+
+def test_observed_speed_changes_route():
+    router = ModelRouter(MODELS, speed_weight=0.7)
+    prompt = "What is the capital of Peru?"
+    assert router.route(prompt, 100)[0] == "medium"
+    
+    # medium turns out to be slower than large
+    for _ in range(10):
+        router.observe({"model": "medium", "eval_count": 100, "eval_duration": 20e9})
+    assert router.stats()["medium"]["tokens_per_second"] < 10
+    assert router.route(prompt, 100)[0] == "large"
+
+
+def test_engine_records_chosen_model():
+    with FakeOllamaServer() as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url, route_models=MODELS))
+        
+        metadata = {}
+        engine.generate("thanks", [], metadata=metadata)
+        assert server.requests[-1][1]["model"] == "tiny"
+        assert metadata["model"] == "tiny"
+        assert metadata["route_reason"].startswith("trivial prompt")
+        
+        metadata = {}
+        list(engine.generate_stream("Debug this traceback for me", [], metadata=metadata))
+        assert server.requests[-1][1]["model"] == "large"
+        assert metadata["model"] == "large"
+        engine.close()
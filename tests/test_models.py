@@ -0,0 +1,51 @@
+"""Tests for the conversation data models."""
+
+import sys
+from datetime import datetime
+
+from benchmarks import memory
+from jarvis.models import ConversationTurn, Message
+
+
+def test_message_is_slotted_with_lazy_metadata():
+    message = Message(role="".join(["us", "er"]), content="Hello")
+    
+    assert not hasattr(message, "__dict__")
+    assert message.role is sys.intern("user")
+    assert message._metadata is None
+    assert message.to_dict()["metadata"] == {}
+    assert message._metadata is None
+    
+    message.metadata["total_time"] = 1.5
+    assert message.metadata == {"total_time": 1.5}
+
+
+def test_message_timestamp_round_trips():
+    when = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    message = Message(role="assistant", content="Hi", timestamp=when, metadata={"model": "tiny"})
+    
+    assert message.timestamp == when
+    assert message.created_at == when.timestamp()
+    assert Message(role="user", content="x", timestamp=when.timestamp()).timestamp == when
+    
+    restored = Message.from_dict(message.to_dict())
+    assert restored == message
+    assert restored != Message(role="assistant", content="Hi", timestamp=when)
+    assert "content='Hi'" in repr(restored)
+
+
+def test_turn_round_trips_and_allocates_tool_calls_lazily():
+    turn = ConversationTurn(Message(role="user", content="Q"), Message(role="assistant", content="A"))
+    
+    assert not hasattr(turn, "__dict__")
+    assert turn._tool_calls is None
+    assert ConversationTurn.from_dict(turn.to_dict()) == turn
+    turn.tool_calls.append("search")
+    assert turn.tool_calls == ["search"]
+
+
+def test_memory_benchmark_shows_savings():
+    report = memory.run(turns=2000)
+    for result in report["results"]:
+        assert result["saved_bytes_per_turn"] > 0
+        assert result["current"]["overhead_bytes_per_turn"] < result["legacy"]["overhead_bytes_per_turn"]
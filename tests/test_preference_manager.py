@@ -76,3 +76,60 @@ def test_set_personality_config():
         assert loaded_personality.tone == "enthusiastic"
         assert loaded_personality.verbosity == "detailed"
         assert loaded_personality.response_style == "energetic"
+
+
+def test_preferences_are_cached_until_file_changes(monkeypatch):
+    """Test that the file is only re-read when its mtime or size changes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pm = PreferenceManager(config_dir=Path(tmpdir), write_delay=0)
+        pm.save_preferences({"personality": {"tone": "mentor"}})
+        
+        reads = []
+        original_read = pm._read_file
+        monkeypatch.setattr(pm, "_read_file", lambda: reads.append(1) or original_read())
+        
+        for _ in range(5):
+            assert pm.get_personality_config().tone == "mentor"
+        assert reads == []
+        
+        # Another writer replaces the file
+        pm.preferences_file.write_text(json.dumps({"personality": {"tone": "sarcastic"}}))
+        assert pm.get_personality_config().tone == "sarcastic"
+        assert reads == [1]
+
+
+def test_saves_are_coalesced_until_flush():
+    """Test that write-behind saves reach disk once, atomically."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pm = PreferenceManager(config_dir=Path(tmpdir), write_delay=60)
+        for tone in ["mentor", "sarcastic", "enthusiastic"]:
+            pm.set_personality_config(PersonalityConfig(tone=tone))
+        
+        assert not pm.preferences_file.exists()
+        assert pm.get_personality_config().tone == "enthusiastic"
+        
+        pm.close()
+        saved = json.loads(pm.preferences_file.read_text())
+        assert saved["personality"]["tone"] == "enthusiastic"
+        assert [p.name for p in Path(tmpdir).glob(".preferences.*")] == []
+
+
+def test_concurrent_managers_merge_changes():
+    """Test that managers sharing a config dir keep each other's changes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        first = PreferenceManager(config_dir=Path(tmpdir), write_delay=60)
+        second = PreferenceManager(config_dir=Path(tmpdir), write_delay=60)
+        first.load_preferences()
+        second.load_preferences()
+        
+        first.set_personality_config(PersonalityConfig(tone="mentor"))
+        prefs = second.load_preferences()
+        prefs["wake_word"] = "Hey Computer"
+        second.save_preferences(prefs)
+        
+        first.flush()
+        second.flush()
+        
+        merged = PreferenceManager(config_dir=Path(tmpdir)).load_preferences()
+        assert merged["personality"]["tone"] == "mentor"
+        assert merged["wake_word"] == "Hey Computer"
@@ -0,0 +1,116 @@
+"""Tests for ResponseCache."""
+
+import time
+
+from jarvis.llm_engine import LLMConfig, LLMEngine
+from jarvis.response_cache import ResponseCache
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+
+def payload(content, **extra):
+    """Build a minimal /api/chat payload."""
+    data = {
+        "model": "mistral:7b",
+        "messages": [{"role": "user", "content": content}],
+        "options": {"temperature": 0.2}
+    }
+    data.update(extra)
+    return data
+
+
+def test_key_ignores_transport_fields():
+    """Test that streaming and keep-alive settings don't change the key."""
+    assert ResponseCache.make_key(payload("hi", stream=True)) == ResponseCache.make_key(
+        payload("hi", stream=False, keep_alive="5m")
+    )
+    assert ResponseCache.make_key(payload("hi")) != ResponseCache.make_key(payload("hello"))
+
+
+def test_lru_eviction_and_counters(tmp_path):
+    """Test that the least recently used entry is evicted first."""
+    cache = ResponseCache(max_entries=2, path=tmp_path / "cache.db")
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+    assert stats["disk_entries"] == 2
+    cache.close()
+
+
+def test_hits_do_not_write_until_the_next_put(tmp_path):
+    """Test that lookups are read-only but still count for LRU eviction."""
+    cache = ResponseCache(max_entries=2, path=tmp_path / "cache.db")
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache._memory.clear()
+    writes = cache._db.total_changes
+    
+    assert cache.get("a") == "A"
+    assert cache.get("a") == "A"
+    assert cache._db.total_changes == writes
+    
+    cache.put("c", "C")
+    cache._memory.clear()
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    cache.close()
+
+
+def test_ttl_expiry(tmp_path):
+    """Test that expired entries are not served."""
+    cache = ResponseCache(ttl_seconds=0.01, path=tmp_path / "cache.db")
+    cache.put("a", "A")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    cache.close()
+
+
+def test_entries_persist_on_disk(tmp_path):
+    """Test that a new cache instance reads entries from the backing store."""
+    cache = ResponseCache(path=tmp_path / "cache.db")
+    cache.put("a", "A")
+    cache.close()
+    
+    reopened = ResponseCache(path=tmp_path / "cache.db")
+    assert reopened.get("a") == "A"
+    reopened.close()
+
+
+def test_engine_serves_repeated_requests_from_cache(tmp_path):
+    """Test that identical requests reach Ollama once, streamed or not."""
+    cache = ResponseCache(path=tmp_path / "cache.db")
+    
+    with FakeOllamaServer() as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url, temperature=0.2), cache)
+        first = engine.generate("explain heaps", [])
+        metadata = {}
+        second = "".join(engine.generate_stream("explain heaps", [], metadata=metadata))
+        engine.close()
+    
+    assert first == second == "echo: explain heaps"
+    assert len(server.requests) == 1
+    assert metadata["cache"] == "hit"
+    cache.close()
+
+
+def test_engine_bypasses_cache_at_high_temperature(tmp_path):
+    """Test that sampling above the threshold always reaches Ollama."""
+    cache = ResponseCache(path=tmp_path / "cache.db")
+    config = LLMConfig(temperature=0.9, cache_max_temperature=0.5)
+    
+    with FakeOllamaServer() as server:
+        config.endpoint = server.url
+        engine = LLMEngine(config, cache)
+        engine.generate("explain heaps", [])
+        engine.generate("explain heaps", [])
+        engine.close()
+    
+    assert len(server.requests) == 2
+    assert cache.stats()["hits"] == 0
+    cache.close()
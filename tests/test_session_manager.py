@@ -0,0 +1,201 @@
+"""Tests for SessionManager and the HTTP server."""
+
+import http.client
+import json
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.llm_engine import GenerationCancelled, LLMEngine
+from jarvis.models import Message
+from jarvis.preference_manager import PreferenceManager
+from jarvis.server import JarvisServer
+from jarvis.session_manager import SessionManager
+
+
+class EchoEngine(LLMEngine):
+    """Engine that answers locally by echoing the prompt."""
+    
+    def generate(self, prompt, context, personality=None, **kwargs):
+        return f"echo: {prompt}"
+    
+    def generate_stream(self, prompt, context, personality=None, **kwargs):
+        yield "echo: "
+        yield prompt
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Session manager with a small memory cap and a temporary spill dir."""
+    manager = SessionManager(
+        llm_engine=EchoEngine(),
+        preference_manager=PreferenceManager(config_dir=tmp_path / "config"),
+        memory_cap_bytes=10_000,
+        spill_dir=tmp_path / "sessions"
+    )
+    yield manager
+    manager.close()
+
+
+def test_sessions_are_isolated(manager):
+    """Test that each session keeps its own conversation."""
+    first = manager.create_session()
+    second = manager.create_session()
+    
+    with manager.use(first) as orchestrator:
+        orchestrator.process_input("one")
+    with manager.use(second) as orchestrator:
+        orchestrator.process_input("two")
+        orchestrator.process_input("three")
+    
+    assert len(json.loads(manager.export_session(first))["turns"]) == 1
+    assert len(json.loads(manager.export_session(second))["turns"]) == 2
+
+
+def test_idle_sessions_spill_and_reload(manager):
+    """Test that LRU sessions are spilled over the cap and reloaded on demand."""
+    session_ids = [manager.create_session() for _ in range(4)]
+    for session_id in session_ids:
+        with manager.use(session_id) as orchestrator:
+            orchestrator.process_input("x" * 500)
+    
+    stats = manager.stats()
+    assert stats["memory_bytes"] <= manager.memory_cap_bytes
+    assert stats["sessions_spilled"] >= 1
+    assert (manager.spill_dir / f"{session_ids[0]}.snap").exists()
+    
+    exported = json.loads(manager.export_session(session_ids[0]))
+    assert exported["session_id"] == session_ids[0]
+    assert exported["turns"][0]["user_message"]["content"] == "x" * 500
+
+
+def test_empty_sessions_count_against_the_cap(manager):
+    """Test that idle sessions without turns are spilled too."""
+    session_ids = [manager.create_session() for _ in range(10)]
+    
+    stats = manager.stats()
+    assert 0 < stats["memory_bytes"] <= manager.memory_cap_bytes
+    assert stats["sessions_spilled"] == 10 - stats["sessions_in_memory"] > 0
+    with manager.use(session_ids[0]) as orchestrator:
+        assert len(orchestrator.conversation_buffer) == 0
+
+
+def test_spilling_does_not_block_other_sessions(manager, monkeypatch):
+    """Test that snapshots are written without holding the manager lock."""
+    spill = manager._spill
+    lock_free = []
+    
+    def try_lock():
+        acquired = manager._lock.acquire(timeout=1)
+        lock_free.append(acquired)
+        if acquired:
+            manager._lock.release()
+    
+    def checking_spill(session):
+        other = threading.Thread(target=try_lock)
+        other.start()
+        other.join()
+        spill(session)
+    
+    monkeypatch.setattr(manager, "_spill", checking_spill)
+    session_ids = [manager.create_session() for _ in range(3)]
+    for session_id in session_ids:
+        with manager.use(session_id) as orchestrator:
+            orchestrator.process_input("x" * 800)
+    
+    assert lock_free and all(lock_free)
+    assert manager.stats()["memory_bytes"] <= manager.memory_cap_bytes
+    with manager.use(session_ids[0]) as orchestrator:
+        assert len(orchestrator.conversation_buffer) == 1
+
+
+def test_unknown_session_raises_key_error(manager):
+    """Test that unknown session ids are reported."""
+    with pytest.raises(KeyError):
+        with manager.use("missing"):
+            pass
+
+
+def test_server_streams_server_sent_events(manager):
+    """Test session creation and an SSE reply over HTTP."""
+    server = JarvisServer(("127.0.0.1", 0), manager)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    try:
+        request = urllib.request.Request(f"{base}/sessions", method="POST")
+        session_id = json.loads(urllib.request.urlopen(request).read())["session_id"]
+        
+        request = urllib.request.Request(
+            f"{base}/sessions/{session_id}/messages",
+            data=json.dumps({"content": "hello"}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request) as response:
+            assert response.headers["Content-Type"] == "text/event-stream"
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    events = [block for block in body.split("\n\n") if block]
+    tokens = [json.loads(e.split("data: ", 1)[1])["token"] for e in events if e.startswith("event: token")]
+    assert "".join(tokens) == "echo: hello"
+    assert events[-1].startswith("event: done")
+
+
+class SlowEngine(EchoEngine):
+    """Engine streaming a long reply slowly, stopping when cancelled."""
+    
+    def generate_stream(self, prompt, context, personality=None, cancel_token=None, **kwargs):
+        for i in range(500):
+            if cancel_token is not None and cancel_token.cancelled:
+                raise GenerationCancelled()
+            yield f"w{i} "
+            time.sleep(0.01)
+
+
+def test_server_rejects_bad_bodies_and_keeps_disconnected_replies(tmp_path):
+    """Test 400s for non-object bodies and that a hang-up still records the turn."""
+    manager = SessionManager(
+        llm_engine=SlowEngine(),
+        preference_manager=PreferenceManager(config_dir=tmp_path / "config"),
+        spill_dir=tmp_path / "sessions"
+    )
+    server = JarvisServer(("127.0.0.1", 0), manager)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+    
+    try:
+        session_id = manager.create_session()
+        path = f"/sessions/{session_id}/messages"
+        
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request("POST", path, body="[]", headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        assert response.status == 400
+        assert "object" in json.loads(response.read())["error"]
+        connection.close()
+        
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request("POST", path, body=json.dumps({"content": "hello"}))
+        response = connection.getresponse()
+        assert response.fp.readline().startswith(b"event: token")
+        # Hang up mid-reply
+        response.close()
+        
+        with manager.use(session_id) as orchestrator:
+            turns = orchestrator.conversation_buffer.turns
+            assert len(turns) == 1
+            assert turns[0].assistant_message.metadata["truncated"] is True
+            assert 0 < len(turns[0].assistant_message.content) < len("w499 ") * 500
+    finally:
+        server.shutdown()
+        server.server_close()
+        manager.close()
@@ -0,0 +1,81 @@
+"""Tests for binary conversation snapshots."""
+
+import pytest
+
+from jarvis import snapshot
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.models import Message
+from jarvis.snapshot import SnapshotReader
+
+
+def make_buffer(turns, max_turns=10):
+    buffer = ConversationBuffer(max_turns=max_turns, max_tokens=2048)
+    buffer.summary = "Earlier: greetings"
+    for i in range(turns):
+        buffer.add_turn(
+            Message(role="user", content=f"question {i} ✓"),
+            Message(
+                role="assistant",
+                content=f"answer {i} " * 20,
+                metadata={"model": "mistral:7b", "eval_count": i, "total_time": 0.25}
+            )
+        )
+    return buffer
+
+
+def test_round_trip_matches_json_export(tmp_path):
+    buffer = make_buffer(8)
+    path = tmp_path / "session.snap"
+    size = buffer.save_snapshot(path)
+    
+    assert size == path.stat().st_size
+    assert size < len(buffer.export_to_json()) / 3
+    restored = ConversationBuffer.load_snapshot(path)
+    assert restored.export_to_json() == buffer.export_to_json()
+    assert restored.turns[0].user_message.role == "user"
+    assert restored.turns[-1].assistant_message.metadata["eval_count"] == 7
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_empty_buffer_round_trip(tmp_path):
+    buffer = ConversationBuffer()
+    buffer.save_snapshot(tmp_path / "empty.snap")
+    restored = ConversationBuffer.load_snapshot(tmp_path / "empty.snap")
+    assert len(restored) == 0
+    assert restored.session_id == buffer.session_id
+
+
+def test_reader_decodes_only_requested_turns(tmp_path, monkeypatch):
+    path = tmp_path / "session.snap"
+    make_buffer(10).save_snapshot(path)
+    
+    decoded = []
+    decode_turn = snapshot._decode_turn
+    monkeypatch.setattr(snapshot, "_decode_turn", lambda record: decoded.append(record) or decode_turn(record))
+    
+    with SnapshotReader(path) as reader:
+        assert len(reader) == 10
+        assert reader.header["max_tokens"] == 2048
+        assert reader[-1].user_message.content == "question 9 ✓"
+        assert len(decoded) == 1
+        with pytest.raises(IndexError):
+            reader[10]
+    
+    restored = ConversationBuffer.load_snapshot(path, max_turns=3)
+    assert [turn.user_message.content for turn in restored.turns] == [
+        f"question {i} ✓" for i in range(7, 10)
+    ]
+    assert len(decoded) == 4
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: b"NOTSNAP!" + data[8:],
+    lambda data: data[:-3],
+    lambda data: b""
+])
+def test_invalid_files_raise_value_error(tmp_path, damage):
+    path = tmp_path / "session.snap"
+    make_buffer(2).save_snapshot(path)
+    path.write_bytes(damage(path.read_bytes()))
+    with pytest.raises(ValueError):
+        ConversationBuffer.load_snapshot(path)
@@ -0,0 +1,114 @@
+"""Tests for background summarization of evicted turns."""
+
+import time
+
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.llm_engine import LLMConfig, LLMEngine
+from jarvis.models import Message
+from jarvis.summarizer import ConversationSummarizer
+from jarvis.testing.fake_ollama import FakeOllamaServer
+
+
+def summary_reply(prompt):
+    """Fake summarizer that lists every topic the user raised so far."""
+    if not prompt.startswith("Update the running summary"):
+        return f"echo: {prompt}"
+    lines = prompt.splitlines()
+    previous = lines[lines.index("Current summary:") + 1]
+    topics = [] if previous == "(none)" else previous[len("user asked about "):].split(", ")
+    topics += [line[len("User: "):] for line in lines if line.startswith("User: ")]
+    return "user asked about " + ", ".join(topics)
+
+
+def add_turns(buffer, count, start=0):
+    for i in range(start, start + count):
+        buffer.add_turn(
+            Message(role="user", content=f"topic{i}"),
+            Message(role="assistant", content=f"answer {i}")
+        )
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_format_prompt_injects_summary():
+    engine = LLMEngine()
+    messages = engine.format_prompt(
+        "Hi", [{"role": "user", "content": "Hello"}], summary="we talked about cats"
+    )
+    assert messages[0] == {
+        "role": "system",
+        "content": "Summary of the earlier conversation: we talked about cats"
+    }
+    assert messages[-1] == {"role": "user", "content": "Hi"}
+    assert engine.estimate_prompt_tokens("Hi", summary="we talked about cats") > (
+        engine.estimate_prompt_tokens("Hi")
+    )
+
+
+def test_evicted_turns_are_summarized_in_background():
+    with FakeOllamaServer(reply=summary_reply) as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        buffer = ConversationBuffer(max_turns=2)
+        summarizer = ConversationSummarizer(engine, buffer, min_interval=0, idle_delay=0)
+        try:
+            add_turns(buffer, 4)
+            wait_for(lambda: buffer.summary == "user asked about topic0, topic1")
+            assert summarizer.pending == 0
+            assert [turn.user_message.content for turn in buffer.turns] == ["topic2", "topic3"]
+        finally:
+            summarizer.close()
+            engine.close()
+
+
+def test_summarizer_waits_while_engine_is_busy():
+    with FakeOllamaServer(reply=summary_reply) as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        buffer = ConversationBuffer(max_turns=1)
+        summarizer = ConversationSummarizer(engine, buffer, min_interval=0, idle_delay=0.05)
+        try:
+            with engine._track_request():
+                add_turns(buffer, 2)
+                time.sleep(0.2)
+                assert buffer.summary is None
+                assert summarizer.pending == 1
+            wait_for(lambda: buffer.summary is not None)
+        finally:
+            summarizer.close()
+            engine.close()
+
+
+def test_summary_is_clipped_and_sent_with_chat_requests():
+    with FakeOllamaServer(reply=lambda prompt: "word " * 500) as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        buffer = ConversationBuffer(max_turns=1)
+        summarizer = ConversationSummarizer(
+            engine, buffer, max_summary_tokens=10, min_interval=3600, idle_delay=3600
+        )
+        try:
+            add_turns(buffer, 2)
+            assert summarizer.summarize_pending()
+            assert len(buffer.summary) <= 40
+            
+            engine.generate("next", buffer.get_context_for_llm(), summary=buffer.summary)
+            path, payload = server.requests[-1]
+            assert path == "/api/chat"
+            assert payload["messages"][0]["content"].endswith(buffer.summary)
+        finally:
+            summarizer.close()
+            engine.close()
+
+
+def test_clear_discards_summary_of_old_session():
+    buffer = ConversationBuffer(max_turns=1)
+    buffer.summary = "old"
+    buffer.clear()
+    assert buffer.summary is None
+    
+    buffer.summary = "kept"
+    restored = ConversationBuffer.from_json(buffer.export_to_json())
+    assert restored.summary == "kept"
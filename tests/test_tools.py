@@ -0,0 +1,261 @@
+"""Tests for tool calling and the concurrent tool executor."""
+
+import time
+
+import pytest
+
+from jarvis.agent_orchestrator import AgentOrchestrator
+from jarvis.async_agent_orchestrator import AsyncAgentOrchestrator
+from jarvis.conversation_buffer import ConversationBuffer
+from jarvis.llm_engine import GenerationCancelled, LLMConfig
+from jarvis.models import Message, ToolCall
+from jarvis.testing.fake_ollama import FakeOllamaServer
+from jarvis.tools import Tool, ToolExecutor, ToolMarkupFilter, parse_tool_calls, tool_messages
+
+ADD_CALL = '<tool_call>{"name": "add", "arguments": {"a": 2, "b": 3}}</tool_call>'
+
+
+def add(a, b):
+    return a + b
+
+
+def test_parse_native_and_tagged_tool_calls():
+    native = [
+        {"function": {"name": "add", "arguments": {"a": 1, "b": 2}}},
+        {"function": {"name": "clock", "arguments": '{"zone": "UTC"}'}},
+        {"function": {"arguments": {}}}
+    ]
+    calls = parse_tool_calls(native, ADD_CALL)
+    assert [(call.name, call.arguments) for call in calls] == [
+        ("add", {"a": 1, "b": 2}), ("clock", {"zone": "UTC"})
+    ]
+    
+    calls = parse_tool_calls(None, f"Let me check. {ADD_CALL} <tool_call>{{broken</tool_call>")
+    assert [(call.name, call.arguments) for call in calls] == [("add", {"a": 2, "b": 3})]
+    assert parse_tool_calls([], "no tools here") == []
+
+
+def test_markup_filter_holds_back_only_possible_tool_calls():
+    markup = ToolMarkupFilter()
+    assert markup.feed("Let me check <b>this</b> <to") == "Let me check <b>this</b> "
+    assert markup.feed("ol_call>{") == ""
+    assert markup.feed("more") == ""
+    assert markup.flush() == '<tool_call>{more'
+    
+    assert markup.feed("a <tool") == "a "
+    assert markup.feed("box") == "<toolbox"
+    assert markup.feed("done", native_calls=True) == ""
+    assert markup.flush() == "done"
+
+
+def test_calls_run_concurrently():
+    tool = Tool("nap", lambda seconds: time.sleep(seconds) or "rested")
+    executor = ToolExecutor([tool], max_workers=4)
+    calls = [ToolCall("nap", {"seconds": 0.2}) for _ in range(4)]
+    
+    start = time.perf_counter()
+    executor.run(calls)
+    elapsed = time.perf_counter() - start
+    executor.close()
+    
+    assert elapsed < 0.5
+    assert [call.result for call in calls] == ["rested"] * 4
+    assert all(0.15 < call.latency < 0.5 for call in calls)
+
+
+def test_failures_are_recorded_not_raised():
+    executor = ToolExecutor([
+        Tool("slow", lambda: time.sleep(1.0), timeout=0.05),
+        Tool("broken", lambda: 1 / 0),
+        Tool("add", add)
+    ])
+    calls = executor.run([
+        ToolCall("slow"), ToolCall("broken"), ToolCall("missing"), ToolCall("add", {"a": 1})
+    ])
+    executor.close()
+    
+    assert calls[0].error == "Tool slow timed out after 0.05s"
+    assert calls[0].latency == 0.05
+    assert calls[1].error.startswith("ZeroDivisionError")
+    assert calls[2].error == "Unknown tool: missing"
+    assert calls[3].error.startswith("TypeError")
+    assert all(call.result is None for call in calls)
+    
+    messages = tool_messages("", calls)
+    assert messages[0]["tool_calls"][2] == {"function": {"name": "missing", "arguments": {}}}
+    assert messages[3] == {"role": "tool", "content": "Error: Unknown tool: missing", "tool_name": "missing"}
+
+
+def test_pure_tools_are_memoized():
+    runs = []
+    
+    def lookup(key):
+        runs.append(key)
+        time.sleep(0.05)
+        return {"key": key}
+    
+    executor = ToolExecutor([Tool("lookup", lookup, pure=True)])
+    first = executor.run([ToolCall("lookup", {"key": "a"}), ToolCall("lookup", {"key": "a"})])
+    second = executor.run([ToolCall("lookup", {"key": "a"}), ToolCall("lookup", {"key": "b"})])
+    executor.close()
+    
+    assert runs == ["a", "b"]
+    assert [call.cached for call in first + second] == [False, True, True, False]
+    assert {call.result for call in first + second} == {'{"key": "a"}', '{"key": "b"}'}
+
+
+def test_failed_pure_calls_are_retried():
+    attempts = []
+    
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("try again")
+        return "ok"
+    
+    executor = ToolExecutor([Tool("flaky", flaky, pure=True)])
+    assert executor.run([ToolCall("flaky")])[0].error == "RuntimeError: try again"
+    assert executor.run([ToolCall("flaky")])[0].result == "ok"
+    executor.close()
+
+
+def test_process_tools_run_in_worker_processes():
+    executor = ToolExecutor([Tool("pow", pow, process=True)], max_processes=2)
+    calls = executor.run([ToolCall("pow", {"base": 2, "exp": 10}), ToolCall("pow", {"base": 3, "exp": 3})])
+    executor.close()
+    assert [call.result for call in calls] == ["1024", "27"]
+
+
+def test_tool_calls_survive_json_and_snapshots(tmp_path):
+    buffer = ConversationBuffer()
+    call = ToolCall("add", {"a": 2, "b": 3}, result="5", latency=0.01, cached=True)
+    buffer.add_turn(Message(role="user", content="2+3?"), Message(role="assistant", content="5"), [call])
+    buffer.add_turn(Message(role="user", content="hi"), Message(role="assistant", content="hello"))
+    
+    buffer.save_snapshot(tmp_path / "session.snap")
+    
+    for restored in (
+        ConversationBuffer.from_json(buffer.export_to_json()),
+        ConversationBuffer.load_snapshot(tmp_path / "session.snap")
+    ):
+        assert restored.turns[0].tool_calls == [call]
+        assert restored.turns[1].tool_calls == []
+    assert "tool_calls" not in buffer.turns[1].to_dict()
+
+
+def test_orchestrator_feeds_tool_results_back(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    reply = lambda prompt: ADD_CALL if prompt == "what is 2+3?" else f"The answer is {prompt}."
+    
+    with FakeOllamaServer(reply=reply) as server:
+        orchestrator = AgentOrchestrator(
+            LLMConfig(endpoint=server.url), tools=[Tool("add", add, "Add two numbers")]
+        )
+        assert orchestrator.process_input("what is 2+3?") == "The answer is 5."
+        streamed = "".join(orchestrator.process_input_stream("what is 2+3?"))
+        orchestrator.close()
+    
+    assert streamed == "The answer is 5."
+    first, second = server.requests[0][1], server.requests[1][1]
+    assert first["tools"][0]["function"]["name"] == "add"
+    assert [m["role"] for m in second["messages"][-3:]] == ["user", "assistant", "tool"]
+    assert second["messages"][-1] == {"role": "tool", "content": "5", "tool_name": "add"}
+    
+    for turn in orchestrator.conversation_buffer.turns:
+        assert [(call.name, call.result) for call in turn.tool_calls] == [("add", "5")]
+        assert turn.assistant_message.content == "The answer is 5."
+    turn = orchestrator.conversation_buffer.turns[0]
+    assert turn.assistant_message.metadata["tool_time"] >= 0
+    assert orchestrator.metrics.tool_calls == 2
+    assert "jarvis_tool_calls_total 2" in orchestrator.metrics.to_prometheus()
+
+
+def test_streaming_with_tools_yields_answers_as_they_arrive(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    orchestrator = AgentOrchestrator(tools=[Tool("add", add)])
+    events = []
+    rounds = {
+        "add": ["Let me add. ", ADD_CALL[:5], ADD_CALL[5:]],
+        "answer": ["The ", "answer ", "is ", "5."],
+        "cancel": ["Partial ", "answer"]
+    }
+    
+    def generate_stream(prompt, context, personality, metadata=None, tool_messages=None, **kwargs):
+        if prompt == "add" and tool_messages:
+            prompt = "answer"
+        for token in rounds[prompt]:
+            events.append(("sent", token))
+            yield token
+        if prompt == "cancel":
+            raise GenerationCancelled("".join(rounds[prompt]))
+    
+    monkeypatch.setattr(orchestrator.llm_engine, "generate_stream", generate_stream)
+    streamed = []
+    for token in orchestrator.process_input_stream("add"):
+        events.append(("shown", token))
+        streamed.append(token)
+    cancelled = "".join(orchestrator.process_input_stream("cancel"))
+    orchestrator.close()
+    
+    assert "".join(streamed) == "Let me add. The answer is 5."
+    # Every answer token is shown before the next one is generated
+    assert events.index(("shown", "The ")) < events.index(("sent", "answer "))
+    assert cancelled == "Partial answer"
+    first, second = orchestrator.conversation_buffer.turns
+    assert first.assistant_message.content == "Let me add. The answer is 5."
+    assert [call.result for call in first.tool_calls] == ["5"]
+    assert second.assistant_message.content == "Partial answer"
+    assert second.assistant_message.metadata["truncated"] is True
+
+
+def test_tool_rounds_are_bounded(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    orchestrator = AgentOrchestrator(tools=[Tool("add", add)], max_tool_rounds=2)
+    offered = []
+    
+    def generate(prompt, context, personality, metadata=None, tools=None, **kwargs):
+        offered.append(tools is not None)
+        metadata["tool_calls"] = [{"function": {"name": "add", "arguments": {"a": 1, "b": 1}}}]
+        return ""
+    
+    monkeypatch.setattr(orchestrator.llm_engine, "generate", generate)
+    orchestrator.process_input("loop forever")
+    orchestrator.close()
+    
+    assert offered == [True, True, False]
+    assert len(orchestrator.conversation_buffer.turns[0].tool_calls) == 2
+
+
+def test_clearing_the_conversation_clears_the_memo(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    runs = []
+    
+    def lookup(key):
+        runs.append(key)
+        return key.upper()
+    
+    orchestrator = AgentOrchestrator(tools=[Tool("lookup", lookup, pure=True)])
+    rounds = []
+    
+    def generate(prompt, context, personality, metadata=None, tools=None, **kwargs):
+        rounds.append(prompt)
+        if len(rounds) % 2:
+            metadata["tool_calls"] = [{"function": {"name": "lookup", "arguments": {"key": "a"}}}]
+            return ""
+        return "done"
+    
+    monkeypatch.setattr(orchestrator.llm_engine, "generate", generate)
+    orchestrator.process_input("look it up")
+    orchestrator.process_input("look it up")
+    assert runs == ["a"]
+    
+    orchestrator.clear_conversation()
+    orchestrator.process_input("look it up")
+    orchestrator.close()
+    assert runs == ["a", "a"]
+
+
+def test_async_orchestrator_rejects_tools(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    with pytest.raises(ValueError):
+        AsyncAgentOrchestrator(tools=[Tool("add", add)])
@@ -0,0 +1,82 @@
+"""Tests for background model warm-up."""
+
+import time
+
+import pytest
+
+from jarvis.llm_engine import LLMConfig, LLMEngine
+from jarvis.testing.fake_ollama import FakeOllamaServer
+from jarvis.warmup import ModelWarmer, parse_keep_alive
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, 300.0),
+    ("30m", 1800.0),
+    ("1h30m", 5400.0),
+    ("45s", 45.0),
+    ("600", 600.0),
+    (120, 120.0),
+    ("0", 0.0),
+    ("-1", None),
+    (-1, None),
+    ("-5m", None)
+])
+def test_parse_keep_alive(value, expected):
+    assert parse_keep_alive(value) == expected
+
+
+def test_parse_keep_alive_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_keep_alive("soon")
+    with pytest.raises(ValueError):
+        parse_keep_alive("5 minutes")
+
+
+def test_warmer_preloads_model_so_first_turn_is_warm():
+    with FakeOllamaServer(load_delay=0.2) as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url, keep_alive="30m"))
+        warmer = ModelWarmer(engine)
+        assert warmer.ping_interval == 900.0
+        assert warmer.wait(5)
+        assert warmer.load_time == pytest.approx(0.2)
+        
+        path, payload = server.requests[0]
+        assert path == "/api/generate"
+        assert payload == {"model": "mistral:7b", "stream": False, "keep_alive": "30m"}
+        
+        metadata = {}
+        engine.generate("hello", [], metadata=metadata)
+        assert metadata["load_duration"] == 0
+        warmer.close()
+        
+        # Unloading makes the next turn cold again
+        engine.load_model(keep_alive="0")
+        metadata = {}
+        engine.generate("hello", [], metadata=metadata)
+        assert metadata["load_duration"] == pytest.approx(0.2)
+        engine.close()
+
+
+def test_warmer_pings_while_idle():
+    with FakeOllamaServer() as server:
+        engine = LLMEngine(LLMConfig(endpoint=server.url))
+        warmer = ModelWarmer(engine, ping_interval=0.05, check_interval=0.01)
+        deadline = time.monotonic() + 5
+        while warmer.pings < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        warmer.close()
+        engine.close()
+    
+    assert warmer.pings >= 2
+    assert len(server.requests) >= 3
+
+
+def test_warmer_records_failure_and_keep_alive_forever_disables_pings():
+    engine = LLMEngine(LLMConfig(endpoint="http://127.0.0.1:9", keep_alive="-1", max_retries=0))
+    warmer = ModelWarmer(engine)
+    assert warmer.ping_interval is None
+    assert not warmer.wait(10)
+    assert "Cannot connect" in warmer.error
+    assert warmer.load_time is None
+    warmer.close()
+    engine.close()